@@ -12,14 +12,18 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.security.websocket import AllowedHostsOriginValidator
 import tracker.routing
+from tracker.lifespan import lifespan_app, start_on_first_scope
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'codecracker.settings')
 
-application = ProtocolTypeRouter({
+# Daphne sends no lifespan events: start_on_first_scope runs the startup
+# hooks on the first connection instead (tracker/lifespan.py)
+application = start_on_first_scope(ProtocolTypeRouter({
     "http": get_asgi_application(),
+    "lifespan": lifespan_app,
     "websocket": AllowedHostsOriginValidator(
         URLRouter(
             tracker.routing.websocket_urlpatterns
         )
     ),
-})
\ No newline at end of file
+}))
\ No newline at end of file
@@ -84,6 +84,109 @@ else:
         }
     }
 
+# Outbound HTTP pools shared by all platform fetchers (tracker/utils/http_clients.py)
+HTTP_POOL_LIMIT          = int(os.getenv('HTTP_POOL_LIMIT', '100'))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '10'))
+HTTP_DNS_TTL             = int(os.getenv('HTTP_DNS_TTL', '300'))
+HTTP_KEEPALIVE_TIMEOUT   = int(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '30'))
+
+# Shared outbound rate limits per platform host: (tokens per second, burst).
+# Enforced across all processes through Redis (tracker/utils/rate_limiter.py).
+# Codeforces documents ~1 call per 2 seconds; kenkoooo asks for >= 1s spacing.
+PLATFORM_RATE_LIMITS = {
+    'codeforces.com': (0.5, 1),
+    'leetcode.com':   (2.0, 4),
+    'codechef.com':   (1.0, 2),
+    'atcoder.jp':     (1.0, 2),
+    'kenkoooo.com':   (1.0, 1),
+}
+# Callers that would queue longer than this get "serve cached" instead
+RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', '5'))
+
+# Validators / body digests of platform responses (tracker/utils/response_cache.py)
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', str(7 * 24 * 3600)))
+
+# Per-host circuit breakers (tracker/utils/circuit_breaker.py); keys not
+# set here fall back to the module defaults.
+CIRCUIT_BREAKER = {
+    'window':          60,
+    'min_calls':       5,
+    'error_threshold': 0.5,
+    'slow_call':       5.0,
+    'slow_threshold':  0.5,
+    'cooldown':        30,
+}
+
+# Background refresh scheduler (tracker/utils/refresh_scheduler.py).
+# `workers` is per node; run_in_asgi starts it inside the web process
+# (on the first request under daphne — tracker/lifespan.py) instead of
+# `manage.py refresh_scheduler`. Ratings only move after
+# contests, which the contest watcher reports as nudges, so the timed
+# intervals are only a safety net.
+REFRESH_SCHEDULER = {
+    'workers':         int(os.getenv('REFRESH_WORKERS', '4')),
+    'tick':            60,
+    'active_interval': 2 * 3600,
+    'idle_interval':   24 * 3600,
+    'run_in_asgi':     os.getenv('REFRESH_SCHEDULER_IN_ASGI', 'False') == 'True',
+}
+
+# Fetch job queue (tracker/utils/fetch_queue.py). When enabled, web
+# processes only enqueue refreshes and render stored data; run
+# `python manage.py fetch_worker` processes to execute them.
+FETCH_QUEUE_ENABLED = os.getenv('FETCH_QUEUE_ENABLED', 'False') == 'True'
+FETCH_QUEUE = {
+    'concurrency':        int(os.getenv('FETCH_WORKER_CONCURRENCY', '4')),
+    'visibility_timeout': 180,
+    'max_attempts':       5,
+    'backoff':            30,
+    'max_backoff':        3600,
+    'dead_cooldown':      3600,
+}
+
+# Stats views render stored stats at once and refresh stale ones in the
+# background (tracker/utils/stale_while_revalidate.py)
+STALE_WHILE_REVALIDATE = {
+    'enabled': os.getenv('STALE_WHILE_REVALIDATE', 'True') == 'True',
+    'max_age': 15 * 60,
+}
+
+# Contest calendar watcher (tracker/utils/contest_watcher.py)
+CONTEST_WATCHER = {
+    'interval':      600,
+    'lookback_days': 7,
+    'publish_delay': {'CodeChef': 6 * 3600, 'LeetCode': 72 * 3600},
+    'run_in_asgi':   os.getenv('CONTEST_WATCHER_IN_ASGI', 'False') == 'True',
+}
+
+# `manage.py refresh_all` (tracker/utils/refresh_all.py)
+REFRESH_ALL = {
+    'concurrency':          int(os.getenv('REFRESH_ALL_CONCURRENCY', '16')),
+    'platform_concurrency': {'Codeforces': 8, 'LeetCode': 8, 'CodeChef': 4, 'AtCoder': 6},
+    'checkpoint':           os.getenv('REFRESH_ALL_CHECKPOINT', 'refresh_all.checkpoint'),
+    # Bulk runs wait for rate-limit tokens instead of skipping platforms
+    'max_wait':             float(os.getenv('REFRESH_ALL_MAX_WAIT', '300')),
+}
+
+# Compressed archive of raw upstream responses for `manage.py reparse`
+# (tracker/utils/raw_archive.py)
+RAW_ARCHIVE = {
+    'enabled':      os.getenv('RAW_ARCHIVE_ENABLED', 'True') == 'True',
+    'keep_per_key': 3,
+    'max_age_days': int(os.getenv('RAW_ARCHIVE_MAX_AGE_DAYS', '180')),
+}
+
+# Server-side rating analytics for the performance pages (tracker/utils/analytics.py)
+ANALYTICS = {
+    'rolling_window': 5,
+    'cache_timeout':  24 * 3600,
+}
+
+# Log and count UserStats loads without a projection (tracker/utils/query_audit.py)
+QUERY_AUDIT = {
+    'enabled': os.getenv('QUERY_AUDIT', str(DEBUG)) == 'True',
+}
+
 # Middleware
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
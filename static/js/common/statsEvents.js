@@ -0,0 +1,28 @@
+// static/js/common/statsEvents.js
+/**
+ * Pushes on the stats_<username> socket — shared by performance/ and compare/ pages.
+ *
+ * Besides the full { user1, compare_to } responses, the socket carries:
+ *   stats_updated   — { username, fields, inserted, updated, removed } (incremental)
+ *   stats_refreshed — { user1 } after a background refresh (no compare user)
+ * Entries are identified by (platform, contest, date), like the server's history_merge.
+ */
+
+export function entryKey(e) {
+  const date = (e.date || '1970-01-01T00:00:00').slice(0, 19);
+  return `${e.platform || ''}|${e.contest || ''}|${date}`;
+}
+
+/** userData with a stats_updated event applied: fields patched, entries deleted / upserted. */
+export function applyStatsUpdate(userData, event) {
+  const out = { ...userData, ...(event.fields || {}) };
+  const history = new Map((userData.rating_history || []).map(e => [entryKey(e), e]));
+  (event.removed || []).forEach(e => history.delete(entryKey(e)));
+  [...(event.inserted || []), ...(event.updated || [])].forEach(e => history.set(entryKey(e), {
+    ...e, change: e.change ?? ((e.new_rating || 0) - (e.old_rating || 0)),
+  }));
+  out.rating_history = [...history.values()]
+    .sort((a, b) => (a.date || '').localeCompare(b.date || ''));
+  out.leetcode_contests = out.rating_history.filter(e => e.platform === 'LeetCode').length;
+  return out;
+}
@@ -3,11 +3,31 @@ import { showError, showNotification } from './main.js';
 import { updateStats, updateHistoryTable } from './statsUtils.js';
 import { updateChart } from './chartUtils.js';
 import { animateStats } from './uiUtils.js';
+import { applyStatsUpdate } from '../common/statsEvents.js';
 
 let ws = null;
 let reconnectAttempts = 0;
 const MAX_RECONNECT_ATTEMPTS = 5;
 let pendingComparison = null;
+let lastUser1 = null;       // last rendered data, patched by stats_updated / stats_refreshed pushes
+let lastCompare = null;
+
+function render(user1Data, compareData) {
+    lastUser1 = user1Data;
+    lastCompare = compareData;
+    updateHistoryTable(user1Data, compareData);
+    updateChart(user1Data, compareData, user1Data?.username, compareData?.username);
+    animateStats();
+
+    const statsContainer = document.getElementById('stats-container');
+    const chartContainer = document.getElementById('chart-container');
+    const historySection = document.getElementById('history-section');
+    const spinner = document.getElementById('loading-spinner');
+    if (statsContainer) statsContainer.style.display = 'block';
+    if (chartContainer) chartContainer.style.display = 'block';
+    if (historySection) historySection.style.display = 'block';
+    if (spinner) spinner.style.display = 'none';
+}
 
 export function initWebSocket(username) {
     if (!('WebSocket' in window)) {
@@ -60,12 +80,27 @@ export function initWebSocket(username) {
                 return;
             }
 
+            // Pushes for the logged-in user: patch what is shown, keep the compare user
+            if (data.type === 'stats_updated') {
+                if (lastUser1 && data.username === lastUser1.username) {
+                    const user1Data = applyStatsUpdate(lastUser1, data);
+                    updateStats('user1', user1Data);
+                    render(user1Data, lastCompare);
+                }
+                return;
+            }
+            if (data.type === 'stats_refreshed') {
+                if (data.user1) {
+                    const user1Data = { ...lastUser1, ...data.user1 };
+                    updateStats('user1', user1Data);
+                    render(user1Data, lastCompare);
+                }
+                return;
+            }
+
             const user1Data = data.user1;
             const compareData = data.compare_to || null;
 
-            console.log('user1Data:', JSON.stringify(user1Data, null, 2));
-            console.log('compareData:', JSON.stringify(compareData, null, 2));
-
             if (user1Data) {
                 updateStats('user1', user1Data);
                 const user1Status = document.getElementById('user1-status');
@@ -89,18 +124,7 @@ export function initWebSocket(username) {
                 showNotification('No comparison data available', 'warning');
             }
 
-            updateHistoryTable(user1Data, compareData);
-            updateChart(user1Data, compareData, user1Data?.username, compareData?.username);
-            animateStats();
-
-            const statsContainer = document.getElementById('stats-container');
-            const chartContainer = document.getElementById('chart-container');
-            const historySection = document.getElementById('history-section');
-            const spinner = document.getElementById('loading-spinner');
-            if (statsContainer) statsContainer.style.display = 'block';
-            if (chartContainer) chartContainer.style.display = 'block';
-            if (historySection) historySection.style.display = 'block';
-            if (spinner) spinner.style.display = 'none';
+            render(user1Data, compareData);
         } catch (error) {
             console.error('Error processing WebSocket message:', error);
             showError(`Failed to process real-time update: ${error.message}`);
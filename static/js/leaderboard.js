@@ -1,70 +1,99 @@
 // static/js/leaderboard.js
 document.addEventListener('DOMContentLoaded', function () {
-    // ── Load data from embedded JSON block ─────────────────────────────
-    let leaderboardData = [];
+    // ── First page, rendered server-side into an embedded JSON block ───
+    // Later pages, sorting and search are indexed reads of
+    // /leaderboard/page/ — the full table is never sent to the browser.
+    let pageData = { rows: [], page: 1, pages: 1, total: 0 };
     try {
         const raw = document.getElementById('leaderboard-data').textContent.trim();
-        if (raw) leaderboardData = JSON.parse(raw);
+        if (raw) pageData = JSON.parse(raw);
     } catch (e) {
         console.error('Failed to parse leaderboard data:', e);
         showNotification('Error loading leaderboard data');
     }
 
-    let currentPage   = 1;
+    const pageUrl      = document.getElementById('leaderboard-page-url').dataset.url;
     const itemsPerPage = 10;
-    let filteredData  = [...leaderboardData];
-    let sortKey       = 'total_score';
-    let isAscending   = false;
+    let currentPage    = pageData.page || 1;
+    let sortKey        = 'total_score';
+    let isAscending    = false;
+    let searchQuery    = '';
+    let requestSeq     = 0;
 
     // ── Grab logged-in username from the DOM (set by template) ─────────
     const currentUserEl = document.getElementById('current-username');
     const currentUser   = currentUserEl ? currentUserEl.dataset.username : '';
 
+    async function loadPage(page) {
+        const seq    = ++requestSeq;
+        const params = new URLSearchParams({
+            page, per_page: itemsPerPage, sort: sortKey,
+            order: isAscending ? 'asc' : 'desc', q: searchQuery,
+        });
+        try {
+            const resp = await fetch(`${pageUrl}?${params}`, { headers: { 'Accept': 'application/json' } });
+            if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+            const data = await resp.json();
+            if (seq !== requestSeq) return;          // a newer request superseded this one
+            pageData    = data;
+            currentPage = data.page;
+            updateLeaderboard(data);
+        } catch (e) {
+            console.error('Leaderboard page failed:', e);
+            showNotification('Error loading leaderboard page');
+        }
+    }
+
     // ── WebSocket for live updates ──────────────────────────────────────
     let ws;
     function connectWS() {
         try {
             const proto = window.location.protocol === 'https:' ? 'wss' : 'ws';
             ws = new WebSocket(`${proto}://${window.location.host}/ws/leaderboard/`);
+            ws.binaryType = 'arraybuffer';
 
             ws.onopen  = () => showNotification('Connected to live updates');
             ws.onerror = (e) => console.error('WebSocket error:', e);
             ws.onclose = () => setTimeout(connectWS, 5000);
 
-            ws.onmessage = throttle(function (event) {
-                const data = JSON.parse(event.data);
-                if (data.leaderboard_data) {
-                    leaderboardData = data.leaderboard_data;
-                    filteredData    = [...leaderboardData];
-                    sortTable(sortKey, isAscending);
-                    showNotification('Leaderboard updated!');
+            // Not throttled: the server already coalesces rank updates
+            ws.onmessage = function (event) {
+                const data = JSON.parse(typeof event.data === 'string'
+                    ? event.data
+                    : pako.inflate(new Uint8Array(event.data), { to: 'string' }));
+                if (data.rank_updates) {
+                    applyRankUpdates(data);
                 }
-            }, 1000);
+            };
         } catch (e) {
             console.error('WebSocket init failed:', e);
         }
     }
+    // Coalesced server push: rows whose scores changed. Any of them can
+    // move into or out of the visible page, so the page is re-read.
+    function applyRankUpdates(data) {
+        const n = data.rank_updates.length + (data.removed || []).length;
+        loadPage(currentPage);
+        showNotification(`${n} ranking${n === 1 ? '' : 's'} updated`);
+    }
+
     connectWS();
     window.addEventListener('beforeunload', () => ws?.close());
 
-    // ── Render a page of the (filtered+sorted) data ────────────────────
+    // ── Render the current page ────────────────────────────────────────
     function updateLeaderboard(data) {
         const tbody = document.getElementById('leaderboard-body');
         tbody.innerHTML = '';
 
-        const start        = (currentPage - 1) * itemsPerPage;
-        const end          = Math.min(start + itemsPerPage, data.length);
-        const paginatedData = data.slice(start, end);
-
-        if (!paginatedData.length) {
+        if (!data.rows.length) {
             tbody.innerHTML = '<tr><td colspan="8" style="text-align:center;padding:2rem;">No data found.</td></tr>';
         }
 
-        paginatedData.forEach((entry, index) => {
+        data.rows.forEach(entry => {
             const row       = document.createElement('tr');
             row.className   = entry.username === currentUser ? 'current-user' : '';
             row.innerHTML   = `
-                <td>${start + index + 1}</td>
+                <td>${entry.rank}</td>
                 <td>${escapeHtml(entry.username)}</td>
                 <td>${entry.codeforces_rating || '—'}</td>
                 <td>${entry.leetcode_solved   || 0}</td>
@@ -75,68 +104,48 @@ document.addEventListener('DOMContentLoaded', function () {
             tbody.appendChild(row);
         });
 
-        document.getElementById('page-info').textContent = `Page ${currentPage}`;
-        document.getElementById('prev-page').disabled = currentPage === 1;
-        document.getElementById('next-page').disabled = end >= data.length;
+        document.getElementById('page-info').textContent = `Page ${data.page} of ${data.pages}`;
+        document.getElementById('prev-page').disabled = data.page <= 1;
+        document.getElementById('next-page').disabled = data.page >= data.pages;
     }
 
-    // ── Column-click sorting ────────────────────────────────────────────
+    // ── Column-click sorting (server side; rank sorts by score) ─────────
     document.querySelectorAll('#leaderboard-table th[data-sort]').forEach(th => {
         th.style.cursor = 'pointer';
-        th.addEventListener('click', () => {
-            sortKey     = th.dataset.sort;
+        const sortBy = () => {
+            sortKey     = th.dataset.sort === 'rank' ? 'total_score' : th.dataset.sort;
             isAscending = th.classList.toggle('asc');
-            sortTable(sortKey, isAscending);
-        });
+            if (th.dataset.sort === 'rank') isAscending = !isAscending;
+            loadPage(1);
+        };
+        th.addEventListener('click', sortBy);
         th.addEventListener('keypress', e => {
             if (e.key === 'Enter' || e.key === ' ') {
                 e.preventDefault();
-                sortKey     = th.dataset.sort;
-                isAscending = th.classList.toggle('asc');
-                sortTable(sortKey, isAscending);
+                sortBy();
             }
         });
     });
 
-    function sortTable(key, ascending) {
-        filteredData.sort((a, b) => {
-            let av = a[key] ?? (key.includes('rating') ? -Infinity : 0);
-            let bv = b[key] ?? (key.includes('rating') ? -Infinity : 0);
-            if (key === 'username') return ascending ? av.localeCompare(bv) : bv.localeCompare(av);
-            return ascending ? av - bv : bv - av;
-        });
-        currentPage = 1;
-        updateLeaderboard(filteredData);
-    }
-
     // ── Search ──────────────────────────────────────────────────────────
     let searchTimeout;
     document.getElementById('leaderboard-search').addEventListener('input', function () {
         clearTimeout(searchTimeout);
         searchTimeout = setTimeout(() => {
-            const q  = this.value.toLowerCase();
-            filteredData = leaderboardData.filter(e => e.username.toLowerCase().includes(q));
-            currentPage  = 1;
-            sortTable(sortKey, isAscending);
+            searchQuery = this.value.trim();
+            loadPage(1);
         }, 300);
     });
 
     // ── Pagination ──────────────────────────────────────────────────────
     document.getElementById('prev-page').addEventListener('click', () => {
-        if (currentPage > 1) { currentPage--; updateLeaderboard(filteredData); }
+        if (currentPage > 1) loadPage(currentPage - 1);
     });
     document.getElementById('next-page').addEventListener('click', () => {
-        if (currentPage * itemsPerPage < filteredData.length) { currentPage++; updateLeaderboard(filteredData); }
+        if (currentPage < pageData.pages) loadPage(currentPage + 1);
     });
 
     // ── Helpers ─────────────────────────────────────────────────────────
-    function throttle(fn, limit) {
-        let throttled = false;
-        return function (...args) {
-            if (!throttled) { fn.apply(this, args); throttled = true; setTimeout(() => throttled = false, limit); }
-        };
-    }
-
     function escapeHtml(s) {
         return String(s || '').replace(/&/g,'&amp;').replace(/</g,'&lt;').replace(/>/g,'&gt;')
                                .replace(/"/g,'&quot;').replace(/'/g,'&#039;');
@@ -151,5 +160,5 @@ document.addEventListener('DOMContentLoaded', function () {
     }
 
     // ── Initial render ──────────────────────────────────────────────────
-    sortTable('total_score', false);
+    updateLeaderboard(pageData);
 });
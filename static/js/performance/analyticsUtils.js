@@ -0,0 +1,52 @@
+import { showError } from './main.js';
+
+const fmtDelta = (d) => d ? `${d.change > 0 ? '+' : ''}${d.change} (${d.contest || 'N/A'})` : 'N/A';
+const fmtStreak = (s) => s.current > 0 ? `▲ ${s.current}` : s.current < 0 ? `▼ ${-s.current}` : '–';
+
+async function loadAnalytics() {
+    const url = document.getElementById('analytics-url')?.dataset.url;
+    const tbody = document.getElementById('analytics-body');
+    const section = document.getElementById('analytics-section');
+    if (!url || !tbody || !section) return;
+
+    try {
+        const response = await fetch(url, {
+            credentials: 'same-origin',
+            headers: { 'Accept': 'application/json' }
+        });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const platforms = (await response.json())?.user1?.platforms || {};
+
+        tbody.innerHTML = '';
+        const names = Object.keys(platforms);
+        if (names.length === 0) {
+            tbody.innerHTML = '<tr><td colspan="8">No contest history available.</td></tr>';
+        }
+        names.forEach(name => {
+            const p = platforms[name];
+            const row = document.createElement('tr');
+            // textContent throughout: contest names come straight from the upstream APIs
+            [
+                name,
+                `${p.current ?? 'N/A'} / ${p.peak ?? 'N/A'}`,
+                p.rolling_avg ?? 'N/A',
+                p.volatility ?? 'N/A',
+                fmtDelta(p.best),
+                fmtDelta(p.worst),
+                `${p.frequency?.per_30_days ?? 0} / 30d`,
+                p.streaks ? `${fmtStreak(p.streaks)} (best ▲ ${p.streaks.longest_up})` : '–',
+            ].forEach(text => {
+                const cell = document.createElement('td');
+                cell.textContent = text;
+                row.appendChild(cell);
+            });
+            tbody.appendChild(row);
+        });
+        section.style.display = 'block';
+    } catch (error) {
+        console.error('Error loading analytics:', error);
+        showError(`Failed to load analytics: ${error.message}`);
+    }
+}
+
+export { loadAnalytics };
@@ -1,4 +1,5 @@
 import { updateHistoryTable } from './statsUtils.js';
+import { loadAnalytics } from './analyticsUtils.js';
 import { updateChart, renderPlatformToggles } from '../common/chartUtils.js';
 import { initWebSocket, sendWebSocketMessage } from './websocket.js';
 
@@ -32,6 +33,7 @@ document.addEventListener('DOMContentLoaded', function () {
 
     initWebSocket(username);
     fetchUserData(username);
+    loadAnalytics();
 
     // Theme change observer
     const observer = new MutationObserver((mutations) => {
@@ -1,10 +1,12 @@
 import { showError, showNotification } from './main.js';
 import { updateHistoryTable } from './statsUtils.js';
 import { updateChart } from './chartUtils.js';
+import { applyStatsUpdate } from '../common/statsEvents.js';
 
 let ws = null;
 let reconnectAttempts = 0;
 const MAX_RECONNECT_ATTEMPTS = 5;
+let lastUser = null;        // last rendered data, patched by stats_updated pushes
 
 export function initWebSocket(username) {
     if (!('WebSocket' in window)) {
@@ -42,11 +44,16 @@ export function initWebSocket(username) {
                 return;
             }
 
-            const userData = data.user1;
+            let userData = data.user1;
+            if (data.type === 'stats_updated') {
+                if (!lastUser || data.username !== lastUser.username) return;
+                userData = applyStatsUpdate(lastUser, data);
+            }
             if (!userData) {
                 console.warn('No user data received');
                 return;
             }
+            lastUser = userData;
 
             updateChart(userData, null, userData.username, null);
             updateHistoryTable(userData, null);
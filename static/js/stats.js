@@ -33,7 +33,15 @@ document.addEventListener('DOMContentLoaded', () => {
                 const decompressedData = pako.inflate(event.data, { to: 'string' });
                 const data = JSON.parse(decompressedData);
                 console.log("Received WebSocket data:", JSON.stringify(data, null, 2));
+                if (data.type === "stats_updated") {
+                    applyUpdate(data);
+                    return;
+                }
                 updateStats(data);
+                if (data.type === "stats_refreshed") {
+                    const staleNotice = document.getElementById("stale-notice");
+                    if (staleNotice) staleNotice.remove();
+                }
                 showNotification("Stats updated!", 2000);
             } catch (error) {
                 console.error("Error processing WebSocket message:", error);
@@ -104,6 +112,30 @@ document.addEventListener('DOMContentLoaded', () => {
         return table.querySelector("#history-body");
     }
 
+    // Entries are identified by (platform, contest, date), like the server's history_merge
+    function entryKey(e) {
+        const date = (e.date || "1970-01-01T00:00:00").slice(0, 19);
+        return `${e.platform || ""}|${e.contest || ""}|${date}`;
+    }
+
+    // Incremental "stats updated" event: patch the last payload instead of re-fetching.
+    // Removed entries are deleted first, then inserted / updated ones upserted by key.
+    function applyUpdate(event) {
+        if (!lastData || event.username !== username) return;
+        const userData = { ...(lastData.user1 || lastData) };
+        Object.assign(userData, event.fields || {});
+        const history = new Map((userData.rating_history || []).map(e => [entryKey(e), e]));
+        (event.removed || []).forEach(e => history.delete(entryKey(e)));
+        [...(event.inserted || []), ...(event.updated || [])].forEach(e => history.set(entryKey(e), {
+            ...e, change: e.change ?? ((e.new_rating || 0) - (e.old_rating || 0))
+        }));
+        userData.rating_history = [...history.values()]
+            .sort((a, b) => (a.date || "").localeCompare(b.date || ""));
+        userData.leetcode_contests = userData.rating_history.filter(e => e.platform === "LeetCode").length;
+        updateStats({ ...lastData, user1: userData });
+        showNotification("Stats updated!", 2000);
+    }
+
     // Main Update Function with optimization
     function updateStats(data) {
         const userData = data.user1 || {};
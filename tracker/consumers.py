@@ -2,14 +2,17 @@ import json
 import zlib
 import logging
 from datetime import datetime
-from django.core.cache import cache
 from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
-import aiohttp
 from django_ratelimit.core import is_ratelimited
 from functools import wraps
 from tracker.utils.async_fetchers import fetch_leetcode
-from tracker.utils.sync_fetchers import fetch_and_store_rating_history
+from tracker.utils import history_codec
+from tracker.utils.analytics import peaks
+from tracker.utils.circuit_breaker import platform_status
+from tracker.utils.refresh_scheduler import anote_activity
+from tracker.utils.stale_while_revalidate import aload_history, schedule_refresh
+from tracker.utils.stats_events import LEADERBOARD_GROUP
 from tracker.models import UserStats
 
 # Configure logging with detailed output
@@ -60,6 +63,7 @@ class StatsConsumer(AsyncWebsocketConsumer):
         self.compare_to = None
         await self.channel_layer.group_add(f"stats_{self.username}", self.channel_name)
         await self.accept()
+        await anote_activity(self.username)
         logger.info(f"WebSocket connected for user: {self.username}")
         await self.send_initial_data()
 
@@ -67,6 +71,22 @@ class StatsConsumer(AsyncWebsocketConsumer):
         await self.channel_layer.group_discard(f"stats_{self.username}", self.channel_name)
         logger.info(f"WebSocket disconnected for user: {self.username} with code {close_code}")
 
+    async def stats_refreshed(self, event):
+        """Background refresh finished (stale_while_revalidate / fetch worker) — forward it."""
+        await self._send_compressed(event["payload"])
+
+    async def stats_updated(self, event):
+        """Changed summary fields + inserted / updated / removed entries (tracker/utils/stats_events.py)."""
+        await self._send_compressed({
+            'type': 'stats_updated',
+            'username': event['username'],
+            'fields': event['fields'],
+            'inserted': event.get('inserted', []),
+            'updated': event.get('updated', []),
+            'removed': event.get('removed', []),
+            'timestamp': event.get('at', datetime.now().isoformat()),
+        })
+
     @async_ratelimit(key=get_username_from_scope, rate=RATE_LIMIT)
     async def receive(self, text_data=None, bytes_data=None):
         try:
@@ -134,7 +154,7 @@ class StatsConsumer(AsyncWebsocketConsumer):
 
     async def send_initial_data(self, force_refresh=False):
         try:
-            user_stats = await sync_to_async(UserStats.objects.filter(username=self.username).first)()
+            user_stats = await sync_to_async(UserStats.objects.filter(username=self.username).summary().first)()
             if not user_stats:
                 logger.warning(f"No stats found for {self.username}")
                 await self._send_compressed({
@@ -143,45 +163,43 @@ class StatsConsumer(AsyncWebsocketConsumer):
                 })
                 return
 
-            cache_key = f'rating_history_{self.username}'
-            cached_data = None if force_refresh else await sync_to_async(cache.get)(cache_key)
+            cached_data = None if force_refresh else await sync_to_async(history_codec.load)(self.username, dicts=True)
 
-            async with aiohttp.ClientSession() as session:
-                user1_data = await self._fetch_user_data(self.username, user_stats, cached_data, cache_key, session)
-                user1_data['status'] = 'fresh' if force_refresh or not cached_data else 'cached'
+            user1_data = await self._fetch_user_data(self.username, user_stats, cached_data, force_refresh)
 
-                response = {
-                    'user1': user1_data,
-                    'timestamp': datetime.now().isoformat()
-                }
-
-                if self.compare_to:
-                    logger.info(f"Fetching data for compare_to: {self.compare_to}")
-                    try:
-                        compare_stats = await sync_to_async(UserStats.objects.filter(username=self.compare_to).first)()
-                        if compare_stats and self.compare_to != self.username:
-                            compare_cache_key = f'rating_history_{self.compare_to}'
-                            compare_cached_data = None if force_refresh else await sync_to_async(cache.get)(compare_cache_key)
-                            compare_data = await self._fetch_user_data(self.compare_to, compare_stats, compare_cached_data, compare_cache_key, session)
-                            compare_data['status'] = 'fresh' if force_refresh or not compare_cached_data else 'cached'
-                            response['compare_to'] = compare_data
-                        else:
-                            logger.warning(f"No stats found or same as primary user for compare_to: {self.compare_to}")
-                            response['compare_to'] = {
-                                'username': self.compare_to,
-                                'error': 'User stats not found or same as primary user',
-                                'status': 'unavailable'
-                            }
-                    except Exception as e:
-                        logger.error(f"Error fetching compare_to data for {self.compare_to}: {e}", exc_info=True)
+            response = {
+                'user1': user1_data,
+                'timestamp': datetime.now().isoformat()
+            }
+
+            if self.compare_to:
+                logger.info(f"Fetching data for compare_to: {self.compare_to}")
+                try:
+                    compare_stats = await sync_to_async(UserStats.objects.filter(username=self.compare_to).summary().first)()
+                    if compare_stats and self.compare_to != self.username:
+                        compare_cached_data = None if force_refresh else await sync_to_async(history_codec.load)(self.compare_to, dicts=True)
+                        compare_data = await self._fetch_user_data(self.compare_to, compare_stats, compare_cached_data, force_refresh)
+                        response['compare_to'] = compare_data
+                    else:
+                        logger.warning(f"No stats found or same as primary user for compare_to: {self.compare_to}")
                         response['compare_to'] = {
                             'username': self.compare_to,
-                            'error': f"Failed to fetch data: {str(e)}",
-                            'status': 'error'
+                            'error': 'User stats not found or same as primary user',
+                            'status': 'unavailable'
                         }
-
-                logger.info(f"Sending data for {self.username} with response: {json.dumps(response, default=str)}")
-                await self._send_compressed(response)
+                except Exception as e:
+                    logger.error(f"Error fetching compare_to data for {self.compare_to}: {e}", exc_info=True)
+                    response['compare_to'] = {
+                        'username': self.compare_to,
+                        'error': f"Failed to fetch data: {str(e)}",
+                        'status': 'error'
+                    }
+
+            # Breaker state: "open" platforms were served from stored data
+            response['platform_status'] = platform_status()
+
+            logger.info(f"Sending data for {self.username} with response: {json.dumps(response, default=str)}")
+            await self._send_compressed(response)
         except Exception as e:
             logger.error(f"Error in send_initial_data for {self.username}: {e}", exc_info=True)
             await self._send_compressed({
@@ -189,55 +207,51 @@ class StatsConsumer(AsyncWebsocketConsumer):
                 'timestamp': datetime.now().isoformat()
             })
 
-    async def _fetch_user_data(self, username, stats, cached_data, cache_key, session):
-        """Fetch and cache user data"""
-        if cached_data and isinstance(cached_data, dict):
+    async def _fetch_user_data(self, username, stats, cached_history, force_refresh=False):
+        """
+        User data from the cached history (tracker/utils/history_codec.py), the
+        stored history on a miss. status: cached, fresh, stale (refresh scheduled)
+        or refreshing (force_refresh — a refresh is scheduled even for fresh stats).
+        """
+        if cached_history:
             logger.debug(f"Using cached data for {username}")
-            return self._process_cached_data(cached_data, username, stats)
+            user_data = self._user_data(username, stats, cached_history, stats.leetcode_solved)
+            user_data['status'] = 'cached'
+            return user_data
 
-        logger.info(f"Fetching fresh data for {username}")
+        logger.info(f"Loading stored data for {username}")
         try:
-            history, lc_solved = await sync_to_async(fetch_and_store_rating_history)(username)
-            rating_history = [h.to_mongo().to_dict() for h in history] if history else []
-
-            leetcode_history = [h for h in rating_history if h.get('platform') == 'LeetCode']
-            leetcode_rating = max([self._safe_int(h['new_rating']) for h in leetcode_history], default=0) if leetcode_history else 0
-
-            user_data = {
-                'username': username,
-                'codeforces_rating': self._safe_int(stats.codeforces_rating),
-                'leetcode_solved': self._safe_int(lc_solved),
-                'leetcode_rating': leetcode_rating,
-                'leetcode_contests': len(leetcode_history),
-                'codechef_rating': self._safe_int(stats.codechef_rating),
-                'rating_history': self._serialize_history(rating_history),
-                'last_updated': datetime.now().isoformat()
-            }
-
-            has_no_ratings = not any([
-                user_data['codeforces_rating'],
-                user_data['codechef_rating'],
-                user_data['leetcode_solved'],
-                user_data['rating_history']
-            ])
-            user_data['has_no_ratings'] = has_no_ratings
-
-            await sync_to_async(cache.set)(cache_key, user_data, timeout=86400)
+            # A stale result is refreshed in the background and pushed as stats_refreshed
+            history, lc_solved, stale = await aload_history(username, stats)
+            if force_refresh and not stale:
+                await schedule_refresh(username)
+            user_data = self._user_data(username, stats, [h.to_dict() for h in history or []], lc_solved)
+            user_data['status'] = 'refreshing' if force_refresh else 'stale' if stale else 'fresh'
             return user_data
         except Exception as e:
             logger.error(f"Error fetching fresh data for {username}: {e}", exc_info=True)
             raise
 
-    def _process_cached_data(self, cached_data, username, stats):
-        """Process cached data with validation"""
-        user_data = cached_data.copy()
-        user_data['username'] = username
-        user_data['codeforces_rating'] = self._safe_int(stats.codeforces_rating)
-        user_data['leetcode_solved'] = self._safe_int(user_data.get('leetcode_solved'))
-        user_data['leetcode_rating'] = self._safe_int(user_data.get('leetcode_rating'))
-        user_data['codechef_rating'] = self._safe_int(stats.codechef_rating)
-        user_data['rating_history'] = self._serialize_history(user_data.get('rating_history', []))
-        user_data['leetcode_contests'] = len([h for h in user_data['rating_history'] if h.get('platform') == 'LeetCode'])
+    def _user_data(self, username, stats, rating_history, lc_solved):
+        leetcode_history = [h for h in rating_history if h.get('platform') == 'LeetCode']
+        leetcode_rating = peaks(leetcode_history).get('LeetCode', 0)
+
+        user_data = {
+            'username': username,
+            'codeforces_rating': self._safe_int(stats.codeforces_rating),
+            'leetcode_solved': self._safe_int(lc_solved),
+            'leetcode_rating': leetcode_rating,
+            'leetcode_contests': len(leetcode_history),
+            'codechef_rating': self._safe_int(stats.codechef_rating),
+            'rating_history': self._serialize_history(rating_history),
+            'last_updated': datetime.now().isoformat()
+        }
+        user_data['has_no_ratings'] = not any([
+            user_data['codeforces_rating'],
+            user_data['codechef_rating'],
+            user_data['leetcode_solved'],
+            user_data['rating_history']
+        ])
         return user_data
 
     async def _send_compressed(self, data):
@@ -252,12 +266,23 @@ class StatsConsumer(AsyncWebsocketConsumer):
 
 class LeaderboardConsumer(AsyncWebsocketConsumer):
     async def connect(self):
+        await self.channel_layer.group_add(LEADERBOARD_GROUP, self.channel_name)
         await self.accept()
         logger.info("Leaderboard WebSocket connected")
 
     async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(LEADERBOARD_GROUP, self.channel_name)
         logger.info(f"Leaderboard WebSocket disconnected with code {close_code}")
 
+    async def leaderboard_ranks(self, event):
+        """Coalesced rank updates for the users whose scores changed."""
+        await self._send_compressed({
+            'rank_updates': event['updates'],
+            'removed': event['removed'],
+            'size': event['size'],
+            'timestamp': datetime.now().isoformat()
+        })
+
     async def receive(self, text_data=None, bytes_data=None):
         try:
             if not bytes_data:
@@ -0,0 +1,103 @@
+# tracker/lifespan.py
+"""
+ASGI lifespan handler — mounted under the "lifespan" key in codecracker/asgi.py.
+
+Servers that speak the lifespan protocol (uvicorn, hypercorn) send startup
+and shutdown events. Daphne (the Dockerfile's server) sends neither, so
+codecracker/asgi.py also wraps the application in start_on_first_scope():
+the startup hooks then run on the first HTTP or WebSocket connection, on
+daphne's event loop. That is what starts REFRESH_SCHEDULER / CONTEST_WATCHER
+"run_in_asgi" tasks under daphne — after the first request, not at boot.
+
+Daphne never runs the shutdown hooks: background tasks end with the
+process (their Redis claims expire) and the sync HTTP session has an
+atexit fallback. To stop them cleanly, run `manage.py refresh_scheduler`
+and `manage.py contest_watcher` as their own processes instead.
+
+Register extra hooks with on_startup.append(coro_fn) / on_shutdown.append(coro_fn).
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def _close_http_clients():
+    from tracker.utils.http_clients import close_all
+    await close_all()
+
+
+async def _start_refresh_scheduler():
+    # No-op unless REFRESH_SCHEDULER["run_in_asgi"] is set
+    from tracker.utils.refresh_scheduler import start_in_background
+    await start_in_background()
+
+
+async def _stop_refresh_scheduler():
+    from tracker.utils.refresh_scheduler import stop_background
+    await stop_background()
+
+
+async def _start_contest_watcher():
+    # No-op unless CONTEST_WATCHER["run_in_asgi"] is set
+    from tracker.utils.contest_watcher import start_in_background
+    await start_in_background()
+
+
+async def _stop_contest_watcher():
+    from tracker.utils.contest_watcher import stop_background
+    await stop_background()
+
+
+on_startup  = [_start_refresh_scheduler, _start_contest_watcher]
+on_shutdown = [_stop_contest_watcher, _stop_refresh_scheduler, _close_http_clients]
+
+
+_started = False
+_lock    = None
+
+
+async def _run_hooks(hooks, phase):
+    for hook in hooks:
+        try:
+            await hook()
+        except Exception as e:
+            logger.error(f"lifespan {phase} hook {hook.__name__} failed: {e}", exc_info=True)
+
+
+async def startup():
+    """Run the startup hooks once per process, whichever path gets here first."""
+    global _started, _lock
+    if _started:
+        return
+    _lock = _lock or asyncio.Lock()
+    async with _lock:
+        if _started:
+            return
+        _started = True
+        await _run_hooks(on_startup, "startup")
+
+
+def start_on_first_scope(app):
+    """
+    Wrap an ASGI app so the startup hooks run before its first non-lifespan
+    scope — for servers without lifespan events (daphne). A no-op once
+    lifespan.startup has run.
+    """
+    async def wrapped(scope, receive, send):
+        if not _started and scope["type"] != "lifespan":
+            await startup()
+        return await app(scope, receive, send)
+    return wrapped
+
+
+async def lifespan_app(scope, receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await startup()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await _run_hooks(on_shutdown, "shutdown")
+            await send({"type": "lifespan.shutdown.complete"})
+            return
@@ -0,0 +1,36 @@
+# tracker/management/commands/contest_watcher.py
+"""
+Watch platform contest calendars and queue refreshes for affected users.
+
+    python manage.py contest_watcher [--once] [--platform Codeforces ...]
+"""
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from tracker.utils import contest_watcher
+
+
+class Command(BaseCommand):
+    help = "Queue refreshes for tracked users when a finished contest's ratings are published."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Run a single pass and print what was queued")
+        parser.add_argument("--platform", action="append",
+                            choices=["Codeforces", "AtCoder", "CodeChef", "LeetCode"],
+                            help="Limit --once to these platforms")
+        parser.add_argument("--interval", type=float, default=None,
+                            help="Seconds between passes (default: CONTEST_WATCHER['interval'])")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            summary = contest_watcher.watch_once(platforms=options["platform"])
+            for platform, row in summary.items():
+                self.stdout.write(f"{platform:<11} {row['finished']} finished, "
+                                  f"{row['published']} published, {row['refreshes']} refreshes queued")
+            return
+        try:
+            asyncio.run(contest_watcher.run(interval=options["interval"]))
+        except KeyboardInterrupt:
+            self.stdout.write("Interrupted")
@@ -0,0 +1,52 @@
+# tracker/management/commands/fetch_worker.py
+"""
+Process queued fetch_and_store_all jobs (tracker/utils/fetch_queue.py).
+
+    python manage.py fetch_worker [--concurrency 4] [--once]
+    python manage.py fetch_worker --dead [--requeue-dead]
+
+Start one per CPU core / node as needed; jobs are leased, so workers never
+run the same user at the same time.
+"""
+import asyncio
+import signal
+
+from django.core.management.base import BaseCommand
+
+from tracker.utils import fetch_queue
+
+
+class Command(BaseCommand):
+    help = "Run a fetch worker for the Redis-backed job queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=None,
+                            help="Jobs in flight in this process (default: FETCH_QUEUE['concurrency'])")
+        parser.add_argument("--once", action="store_true",
+                            help="Exit once nothing is due and all jobs have finished")
+        parser.add_argument("--dead", action="store_true",
+                            help="List dead-lettered jobs and exit")
+        parser.add_argument("--requeue-dead", action="store_true",
+                            help="Move dead-lettered jobs back to the queue and exit")
+
+    def handle(self, *args, **options):
+        if options["dead"] or options["requeue_dead"]:
+            for username, at, error in fetch_queue.dead_letters():
+                self.stdout.write(f"{username:<20} {error}")
+            if options["requeue_dead"]:
+                self.stdout.write(self.style.SUCCESS(f"{fetch_queue.requeue_dead()} jobs requeued"))
+            return
+
+        worker = fetch_queue.FetchWorker(concurrency=options["concurrency"])
+
+        async def _run():
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, worker.stop)   # finish running jobs, then exit
+            return await worker.run(once=options["once"])
+
+        stats = asyncio.run(_run())
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats.get('done', 0)} done, {stats.get('failed', 0)} failed, "
+            f"{stats.get('dead_lettered', 0)} dead-lettered, {stats.get('reaped', 0)} reaped"
+        ))
@@ -0,0 +1,32 @@
+# tracker/management/commands/ingest_contest.py
+"""
+Append one contest's rating changes to every tracked participant at once.
+
+    python manage.py ingest_contest Codeforces 1900
+    python manage.py ingest_contest AtCoder abc300
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.utils.contest_ingest import ingest_atcoder, ingest_codeforces
+
+_INGEST = {"Codeforces": ingest_codeforces, "AtCoder": ingest_atcoder}
+
+
+class Command(BaseCommand):
+    help = "Ingest a contest's full rating-change table into tracked users' histories."
+
+    def add_arguments(self, parser):
+        parser.add_argument("platform", choices=sorted(_INGEST))
+        parser.add_argument("contest_id", help="Codeforces contest id or AtCoder contest slug")
+
+    def handle(self, *args, **options):
+        summary = _INGEST[options["platform"]](options["contest_id"])
+        if not summary["published"]:
+            raise CommandError(f"No rating changes published for {options['contest_id']} yet")
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['participants']} rows — {summary['matched']} tracked, "
+            f"{summary['pushed']} appended"
+        ))
+        if summary["missing"]:
+            self.stdout.write(f"Without stored stats (need a full fetch): "
+                              f"{', '.join(sorted(summary['missing']))}")
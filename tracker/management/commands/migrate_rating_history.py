@@ -0,0 +1,38 @@
+# tracker/management/commands/migrate_rating_history.py
+"""
+Move embedded UserStats.rating_history lists into rating_entries.
+
+    python manage.py migrate_rating_history [--users alice bob]
+
+Safe to rerun and to run while the site is up: each user's list is claimed
+atomically, and users it has not reached are migrated on first read.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from tracker.models import RatingEntry
+from tracker.utils.history_store import migrate_user, unmigrated
+
+
+class Command(BaseCommand):
+    help = "Migrate embedded rating history into the rating_entries collection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", nargs="+", default=None,
+                            help="Only these usernames (default: every user with an embedded list)")
+
+    def handle(self, *args, **options):
+        RatingEntry.ensure_indexes()
+        started = time.monotonic()
+        users = moved = 0
+        for username in options["users"] or unmigrated():
+            n = migrate_user(username)
+            if n or options["users"]:
+                users += 1
+                moved += n
+            if users and users % 500 == 0:
+                self.stdout.write(f"{users} users, {moved} entries moved")
+        self.stdout.write(self.style.SUCCESS(
+            f"{moved} entries of {users} users moved in {time.monotonic() - started:.1f}s"
+        ))
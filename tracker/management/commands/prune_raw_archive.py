@@ -0,0 +1,26 @@
+# tracker/management/commands/prune_raw_archive.py
+"""
+Apply the raw-response archive's age limit (RAW_ARCHIVE["max_age_days"]).
+
+    python manage.py prune_raw_archive [--days 90]
+
+Per-key limits are enforced on every write; run this periodically (cron).
+"""
+from django.core.management.base import BaseCommand
+
+from tracker.utils.raw_archive import archive_stats, prune
+
+
+class Command(BaseCommand):
+    help = "Delete archived upstream responses older than the retention limit."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Override RAW_ARCHIVE['max_age_days']")
+
+    def handle(self, *args, **options):
+        deleted = prune(options["days"])
+        for platform, row in sorted(archive_stats().items()):
+            self.stdout.write(f"{platform:<12} {row['documents']:>7} docs "
+                              f"{row['raw_bytes'] / 1e6:>9.1f} MB raw  since {row['oldest']}")
+        self.stdout.write(self.style.SUCCESS(f"{deleted} archived responses deleted"))
@@ -0,0 +1,27 @@
+# tracker/management/commands/rebuild_leaderboard.py
+"""
+Recompute the materialized leaderboard collection from UserStats.
+
+    python manage.py rebuild_leaderboard
+
+Rows are kept up to date on every write; run this after deploying the
+collection, after changing leaderboard.WEIGHTS, or after bulk edits made
+outside the app.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from tracker.models import LeaderboardEntry
+from tracker.utils.leaderboard import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed leaderboard rows."
+
+    def handle(self, *args, **options):
+        LeaderboardEntry.ensure_indexes()
+        started = time.monotonic()
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"{rows} leaderboard rows rebuilt in {time.monotonic() - started:.1f}s"))
@@ -0,0 +1,86 @@
+# tracker/management/commands/refresh_all.py
+"""
+Refresh every tracked user with bounded concurrency, resumably.
+
+    python manage.py refresh_all [--concurrency 16] [--platform CodeChef=2 ...]
+                                 [--checkpoint PATH | --no-checkpoint] [--restart]
+                                 [--users alice bob]
+
+Ctrl-C / SIGTERM stops starting new users; rerun to resume from the checkpoint.
+"""
+import asyncio
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.utils.circuit_breaker import PLATFORM_HOSTS
+from tracker.utils.refresh_all import BulkRefresh, Checkpoint, config
+
+
+def _platform_limit(value):
+    platform, _, n = value.partition("=")
+    if platform not in PLATFORM_HOSTS or not n.isdigit():
+        raise ValueError(value)
+    return platform, int(n)
+
+
+class Command(BaseCommand):
+    help = "Refresh all users' stats concurrently, with checkpoints and latency percentiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=None,
+                            help="Users refreshed at once (default: REFRESH_ALL['concurrency'])")
+        parser.add_argument("--platform", type=_platform_limit, action="append", default=[],
+                            metavar="PLATFORM=N",
+                            help="Concurrent fetches for one platform, e.g. CodeChef=2 (repeatable)")
+        parser.add_argument("--checkpoint", default=None,
+                            help="Checkpoint file (default: REFRESH_ALL['checkpoint'])")
+        parser.add_argument("--no-checkpoint", action="store_true",
+                            help="Neither read nor write a checkpoint")
+        parser.add_argument("--restart", action="store_true",
+                            help="Discard an existing checkpoint and start over")
+        parser.add_argument("--users", nargs="+", default=None,
+                            help="Only these usernames")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] is not None and options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+        path = "" if options["no_checkpoint"] else (options["checkpoint"] or config()["checkpoint"])
+        if options["restart"]:
+            Checkpoint(path).clear()
+
+        async def _run():
+            runner = BulkRefresh(concurrency=options["concurrency"],
+                                 platform_concurrency=dict(options["platform"]),
+                                 checkpoint=path, usernames=options["users"],
+                                 report=self.stdout.write)
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, runner.stop)
+            return await runner.run()
+
+        summary = asyncio.run(_run())
+        self._print(summary, path)
+
+    def _print(self, s, path):
+        w = self.stdout.write
+        w(f"{s['refreshed']} refreshed, {s['incomplete']} incomplete, {s['failed']} failed, "
+          f"{s['resumed']} skipped from checkpoint "
+          f"— {s['elapsed']}s, {s['throughput']} users/s, error rate {s['error_rate']:.1%}")
+        if s["users"]:
+            w("per user      " + "  ".join(f"{k} {v:.2f}s" for k, v in s["users"].items()))
+        for platform, row in s["platforms"].items():
+            lat = "  ".join(f"{k} {row[k]:.2f}s" for k in ("p50", "p90", "p99") if k in row)
+            w(f"{platform:<13} {lat}  ({row['fetches']} fetches, {row['failed']} failed, "
+              f"{row['skipped']} skipped)")
+        for username, error in s["errors"].items():
+            self.stderr.write(f"{username:<20} {error}")
+        for username, platforms in s["incomplete_users"].items():
+            self.stderr.write(f"{username:<20} not fetched: {', '.join(platforms)}")
+        if not s["finished"]:
+            w(self.style.WARNING(f"Stopped early — rerun to resume from {path or 'the start'}"))
+        elif s["failed"] or s["incomplete"]:
+            w(self.style.WARNING(f"Rerun to retry the {s['failed'] + s['incomplete']} failed or "
+                                 f"incomplete users ({path})"))
+        else:
+            w(self.style.SUCCESS("All users refreshed"))
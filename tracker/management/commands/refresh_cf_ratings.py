@@ -0,0 +1,24 @@
+# tracker/management/commands/refresh_cf_ratings.py
+"""
+Refresh every user's Codeforces rating with batched user.info calls.
+
+    python manage.py refresh_cf_ratings [--batch-size 300]
+"""
+from django.core.management.base import BaseCommand
+
+from tracker.utils.bulk_refresh import CF_INFO_BATCH, refresh_codeforces_ratings
+
+
+class Command(BaseCommand):
+    help = "Bulk-refresh UserStats.codeforces_rating via batched Codeforces user.info calls."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=CF_INFO_BATCH,
+                            help="Handles per user.info request")
+
+    def handle(self, *args, **options):
+        summary = refresh_codeforces_ratings(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['handles']} handles in {summary['requests']} requests — "
+            f"{summary['matched']} matched, {summary['updated']} updated"
+        ))
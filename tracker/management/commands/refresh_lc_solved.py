@@ -0,0 +1,24 @@
+# tracker/management/commands/refresh_lc_solved.py
+"""
+Refresh every user's LeetCode solved count with aliased GraphQL batches.
+
+    python manage.py refresh_lc_solved [--batch-size 20]
+"""
+from django.core.management.base import BaseCommand
+
+from tracker.utils.bulk_refresh import LC_BATCH, refresh_leetcode_solved
+
+
+class Command(BaseCommand):
+    help = "Bulk-refresh UserStats.leetcode_solved via aliased LeetCode GraphQL batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=LC_BATCH,
+                            help="Handles per GraphQL request")
+
+    def handle(self, *args, **options):
+        summary = refresh_leetcode_solved(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['handles']} handles in {summary['requests']} requests — "
+            f"{summary['matched']} matched, {summary['updated']} updated"
+        ))
@@ -0,0 +1,35 @@
+# tracker/management/commands/refresh_scheduler.py
+"""
+Keep every user's stats warm in the background.
+
+    python manage.py refresh_scheduler [--workers 4] [--tick 60] [--once]
+"""
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from tracker.utils.refresh_scheduler import RefreshScheduler
+
+
+class Command(BaseCommand):
+    help = "Run the background refresh scheduler (staleness-priority queue + async workers)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Concurrent refreshes on this node (default: REFRESH_SCHEDULER['workers'])")
+        parser.add_argument("--tick", type=float, default=None,
+                            help="Seconds between planning passes")
+        parser.add_argument("--once", action="store_true",
+                            help="Refresh everything currently due, then exit")
+
+    def handle(self, *args, **options):
+        scheduler = RefreshScheduler(workers=options["workers"], tick=options["tick"])
+        try:
+            stats = asyncio.run(scheduler.run(once=options["once"]))
+        except KeyboardInterrupt:
+            self.stdout.write("Interrupted")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['refreshed']} refreshed, {stats['failed']} failed, "
+            f"{stats['skipped_claimed']} claimed elsewhere"
+        ))
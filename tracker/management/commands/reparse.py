@@ -0,0 +1,50 @@
+# tracker/management/commands/reparse.py
+"""
+Rebuild UserStats from the raw-response archive with the current parsers.
+
+    python manage.py reparse [--users alice bob] [--workers 8] [--dry-run]
+
+No upstream is contacted; users with nothing archived are left alone.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from tracker.models import UserProfile
+from tracker.utils.reparse import reparse_users
+
+
+class Command(BaseCommand):
+    help = "Re-parse archived upstream responses into UserStats without network access."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", nargs="+", default=None,
+                            help="Only these usernames (default: every UserProfile)")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Worker processes (default: CPU count; 1 = in process)")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Parse and count, but write nothing")
+
+    def handle(self, *args, **options):
+        usernames = options["users"] or [p.username for p in UserProfile.objects.only("username")]
+        started   = time.monotonic()
+        counts    = {"rebuilt": 0, "unchanged": 0, "not_archived": 0, "failed": 0}
+
+        for summary in reparse_users(usernames, options["workers"], options["dry_run"]):
+            if "error" in summary:
+                counts["failed"] += 1
+                self.stderr.write(f"{summary['username']:<20} {summary['error']}")
+            elif not summary["platforms"]:
+                counts["not_archived"] += 1
+            elif summary["wrote"] or options["dry_run"]:
+                counts["rebuilt"] += 1
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"{summary['username']:<20} {summary['entries']:>5} entries "
+                                      f"({', '.join(summary['platforms'])})")
+            else:
+                counts["unchanged"] += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(usernames)} users in {time.monotonic() - started:.1f}s — "
+            + ", ".join(f"{v} {k.replace('_', ' ')}" for k, v in counts.items())
+        ))
@@ -1,7 +1,10 @@
 # tracker/models.py
 """
-UserStats  — rating data, history, handles_hash for stale-detection
+UserStats  — rating data, handles_hash for stale-detection
+RatingEntry — one contest result per document (rating_entries), the rating history
 UserProfile — platform handles, bio, avatar, RBAC role, leaderboard toggle
+RawResponse — compressed upstream payloads kept for offline re-parsing
+LeaderboardEntry — materialized leaderboard row per visible user
 
 Sync contract:
   - Both documents are always created together via UserStats.get_or_create()
@@ -11,9 +14,9 @@ Sync contract:
 """
 import hashlib
 from mongoengine import (
-    Document, EmbeddedDocument,
+    Document, EmbeddedDocument, QuerySet, QuerySetNoCache,
     StringField, IntField, ListField,
-    EmbeddedDocumentField, DateTimeField, BooleanField
+    EmbeddedDocumentField, DateTimeField, BooleanField, BinaryField, FloatField
 )
 from datetime import datetime
 
@@ -46,6 +49,76 @@ class RatingHistory(EmbeddedDocument):
         }
 
 
+class RatingEntryQuerySet(QuerySet):
+    """Slices of one user's rating history — see RatingEntry."""
+
+    def of(self, username, platforms=None):
+        qs = self.filter(username=username)
+        if platforms:
+            qs = qs.filter(platform__in=list(platforms))
+        return qs
+
+    def between(self, since=None, until=None):
+        qs = self
+        if since:
+            qs = qs.filter(date__gte=since)
+        if until:
+            qs = qs.filter(date__lt=until)
+        return qs
+
+    def latest(self, n):
+        """The newest n entries, newest first."""
+        return self.order_by('-date').limit(n)
+
+    def histories(self):
+        """RatingHistory values, oldest first."""
+        return [e.to_history() for e in self.order_by('date')]
+
+
+class RatingEntry(Document):
+    """
+    One contest result. Replaces the embedded UserStats.rating_history list
+    so a refresh writes only what changed and readers fetch only the slice
+    they need:
+
+        RatingEntry.objects.of(username, ["Codeforces"]).between(since).histories()
+        RatingEntry.objects.of(username).latest(10)
+
+    Reads and writes go through tracker/utils/history_store.py.
+    """
+    username   = StringField(required=True)
+    platform   = StringField(required=True)
+    contest    = StringField()
+    old_rating = IntField()
+    new_rating = IntField()
+    date       = DateTimeField()
+    rank       = IntField()
+    change     = IntField()
+
+    meta = {
+        'collection': 'rating_entries',
+        'strict': False,
+        'queryset_class': RatingEntryQuerySet,
+        'indexes': [
+            ('username', 'platform', 'date'),
+            ('username', 'date'),
+            ('platform', 'contest'),
+        ],
+    }
+
+    _FIELDS = ('platform', 'contest', 'old_rating', 'new_rating', 'date', 'rank', 'change')
+
+    @classmethod
+    def from_history(cls, username, h):
+        return cls(username=username, **{f: getattr(h, f) for f in cls._FIELDS})
+
+    def to_history(self):
+        return RatingHistory(**{f: getattr(self, f) for f in self._FIELDS})
+
+    def to_dict(self):
+        return self.to_history().to_dict()
+
+
 class UserProfile(Document):
     """
     Extended user profile — linked to Django User by username.
@@ -119,12 +192,72 @@ class UserProfile(Document):
         return profile
 
 
+RATING_FIELDS = ('codeforces_rating', 'leetcode_solved', 'codechef_rating', 'atcoder_rating')
+
+
+class _UserStatsQueries:
+    """
+    Named projections of UserStats — readers load only what they show:
+
+        UserStats.objects(username=u).summary().first()   # all but the legacy history
+        UserStats.objects.ratings()                        # username + RATING_FIELDS
+
+    History slices come from RatingEntry.objects (tracker/utils/history_store.py).
+    A document built without a projection is reported to
+    tracker/utils/query_audit.py unless the queryset asked for .full().
+    """
+    _full = False
+
+    def summary(self):
+        return self.exclude('rating_history')
+
+    def ratings(self):
+        return self.only('username', *RATING_FIELDS)
+
+    def full(self):
+        """Every field, on purpose — not reported as a full load."""
+        qs = self.clone()
+        qs._full = True
+        return qs
+
+    def no_cache(self):
+        return self._clone_into(UserStatsNoCacheQuerySet(self._document, self._collection))
+
+    def _clone_into(self, new_qs):
+        new_qs = super()._clone_into(new_qs)
+        new_qs._full = self._full
+        return new_qs
+
+    def _audit(self, doc):
+        if isinstance(doc, Document) and not (self._full or self._loaded_fields):
+            from tracker.utils.query_audit import full_load
+            full_load(self._document)
+        return doc
+
+    def __next__(self):
+        return self._audit(super().__next__())
+
+    def __getitem__(self, key):
+        return self._audit(super().__getitem__(key))
+
+
+class UserStatsQuerySet(_UserStatsQueries, QuerySet):
+    pass
+
+
+class UserStatsNoCacheQuerySet(_UserStatsQueries, QuerySetNoCache):
+    pass
+
+
 class UserStats(Document):
     username          = StringField(required=True, unique=True)
     codeforces_rating = IntField(default=0)
     leetcode_solved   = IntField(default=0)
     codechef_rating   = IntField(default=0)
     atcoder_rating    = IntField(default=0)
+    # Legacy embedded history. Entries now live in rating_entries
+    # (RatingEntry); `manage.py migrate_rating_history` moves them out and
+    # unsets this field, and history_store migrates stragglers on first read.
     rating_history    = ListField(EmbeddedDocumentField(RatingHistory))
     last_updated      = DateTimeField(default=datetime.utcnow)
 
@@ -133,12 +266,23 @@ class UserStats(Document):
     # the fetcher ignores Redis cache and refetches immediately.
     handles_hash      = StringField(default='')
 
-    meta = {'collection': 'user_stats', 'strict': False}
+    # Newest Codeforces ratingUpdateTimeSeconds already stored.
+    # Incremental refreshes only convert and $push rounds newer than this
+    # (see tracker/utils/history_sync.py); 0 forces a full Codeforces sync.
+    codeforces_synced_at = IntField(default=0)
+
+    meta = {'collection': 'user_stats', 'strict': False,
+            'queryset_class': UserStatsQuerySet}
 
     def save(self, *args, **kwargs):
         self.last_updated = datetime.utcnow()
         super().save(*args, **kwargs)
 
+    def history_for(self, platforms):
+        """Stored RatingHistory entries belonging to the given platform names."""
+        from tracker.utils.history_store import load
+        return load(self.username, platforms=platforms) if platforms else []
+
     def is_stale(self, profile):
         """
         Returns True if platform handles have changed since last fetch.
@@ -153,10 +297,72 @@ class UserStats(Document):
         Always creates both UserStats and UserProfile together.
         Never call UserStats(username=...).save() directly — use this.
         """
-        stats = cls.objects(username=username).first()
+        stats = cls.objects(username=username).summary().first()
         if not stats:
             stats = cls(username=username)
             stats.save()
         # Ensure matching profile always exists
         UserProfile.get_or_create(username)
         return stats
+
+
+class RawResponse(Document):
+    """
+    One archived upstream body (tracker/utils/raw_archive.py), stored only
+    when its digest differs from the previous fetch of the same key.
+    `body` is zlib-compressed; `size` is the uncompressed length.
+    """
+    platform   = StringField(required=True)
+    handle     = StringField(required=True)     # lower-cased
+    endpoint   = StringField(required=True)
+    fetched_at = DateTimeField(default=datetime.utcnow)
+    digest     = StringField()
+    size       = IntField(default=0)
+    body       = BinaryField()
+
+    meta = {
+        'collection': 'raw_responses',
+        'strict': False,
+        'indexes': [
+            ('platform', 'handle', 'endpoint', '-fetched_at'),
+            'fetched_at',
+        ],
+    }
+
+
+class LeaderboardEntry(Document):
+    """
+    Precomputed leaderboard row (tracker/utils/leaderboard.py). Only
+    visible users have one: rated on some platform and not opted out.
+    Maintained whenever a user's summary fields or show_on_leaderboard
+    change; `manage.py rebuild_leaderboard` recomputes it from scratch.
+    """
+    username          = StringField(required=True, unique=True)
+    codeforces_rating = IntField(default=0)
+    leetcode_solved   = IntField(default=0)
+    codechef_rating   = IntField(default=0)
+    atcoder_rating    = IntField(default=0)
+    total_score       = FloatField(default=0)
+    updated_at        = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'leaderboard',
+        'strict': False,
+        'indexes': [
+            ('-total_score', 'username'),
+            ('-codeforces_rating', 'username'),
+            ('-leetcode_solved', 'username'),
+            ('-codechef_rating', 'username'),
+            ('-atcoder_rating', 'username'),
+        ],
+    }
+
+    def to_row(self):
+        return {
+            'username':          self.username,
+            'codeforces_rating': self.codeforces_rating or 0,
+            'leetcode_solved':   self.leetcode_solved or 0,
+            'codechef_rating':   self.codechef_rating or 0,
+            'atcoder_rating':    self.atcoder_rating or 0,
+            'total_score':       self.total_score or 0,
+        }
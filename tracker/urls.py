@@ -11,15 +11,17 @@ from .views.auth_views import (
     verify_email_view, resend_verification_view,
 )
 from .views.dashboard_views import dashboard_view
-from .views.leaderboard_views import leaderboard_view
+from .views.leaderboard_views import leaderboard_view, leaderboard_page_view
 from .views.profile_views import profile_view
 from .views.admin_views import (
     admin_panel_view, set_user_role_view, delete_user_view,
+    fetcher_metrics_view, cohort_view,
 )
 from .views.export_views import export_csv_view, export_pdf_view
 from .views.stats_views import (
     fetch_user_stats, fetch_user_rating_history,
     user_performance_view, user_stats, compare_performance,
+    performance_analytics_view,
 )
 from .views.comparison_views import compare_stats, compare_stats_api, save_comparison, check_user_status
 from .views.user_management_views import add_user
@@ -54,6 +56,8 @@ urlpatterns = [
     path("admin-panel/",             admin_panel_view,   name="admin_panel"),
     path("admin-panel/set-role/",    set_user_role_view, name="set_user_role"),
     path("admin-panel/delete-user/", delete_user_view,   name="delete_user"),
+    path("admin-panel/metrics/",     fetcher_metrics_view, name="fetcher_metrics"),
+    path("admin-panel/cohort/",      cohort_view,        name="cohort"),
 
     # ── Export ───────────────────────────────────────────────────────────
     path("export/csv/<str:username>/", export_csv_view, name="export_csv"),
@@ -61,11 +65,13 @@ urlpatterns = [
 
     # ── Leaderboard ──────────────────────────────────────────────────────
     path("leaderboard/", leaderboard_view, name="leaderboard"),
+    path("leaderboard/page/", leaderboard_page_view, name="leaderboard_page"),
 
     # ── Stats & performance ───────────────────────────────────────────────
     path("stats/<str:username>/",          fetch_user_stats,          name="fetch_user_stats"),
     path("user-stats/<str:username>/",     user_stats,                name="user_stats"),
     path("performance/<str:username>/",    user_performance_view,     name="user_performance"),
+    path("performance/<str:username>/analytics/", performance_analytics_view, name="performance_analytics"),
     path("compare-performance/",           compare_performance,       name="compare_performance"),
     path("check_status/<str:username>/",   check_user_status,         name="check_user_status"),
     path("rating-history/<str:username>/", fetch_user_rating_history, name="fetch_user_rating_history"),
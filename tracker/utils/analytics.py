@@ -0,0 +1,272 @@
+# tracker/utils/analytics.py
+"""
+Server-side rating analytics on NumPy arrays.
+
+A history (RatingHistory documents, their dicts, or rating_entries rows)
+is loaded once into HistoryArrays — one column per field, sorted by date —
+and every metric is computed on those columns, per platform:
+
+  peak / current rating, rolling average of new_rating (`rolling_window`
+  contests), volatility (std of the rating change), best and worst delta,
+  contest frequency (per 30 days over the active span and in the last
+  365 days) and rating streaks (longest up / down run, current run).
+
+user_analytics() caches the result per user, keyed by UserStats.last_updated,
+so a new refresh invalidates it without a delete. cohort() computes the
+same per-user figures for many users from ONE rating_entries query and
+aggregates them per platform (admin cohort endpoint).
+
+peaks() is the one-pass replacement for the per-platform max(...) scans
+the views, the consumer and history_sync used to run.
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+PLATFORMS = ("Codeforces", "LeetCode", "CodeChef", "AtCoder")
+
+_DEFAULTS = {
+    "rolling_window": 5,
+    "cache_timeout":  24 * 3600,
+}
+
+_DAY = 86400
+_NO_INT = np.iinfo(np.int64).min
+
+
+def config() -> dict:
+    return {**_DEFAULTS, **getattr(settings, "ANALYTICS", {})}
+
+
+def _field(entry, name):
+    return entry.get(name) if isinstance(entry, dict) else getattr(entry, name, None)
+
+
+class HistoryArrays:
+    """Column view of a rating history, oldest first (undated entries first)."""
+
+    def __init__(self, platform, date, new, old, change, rank, contest):
+        order = np.argsort(date, kind="stable")
+        self.platform = platform[order]        # int8 index into PLATFORMS, -1 = other
+        self.date     = date[order]            # int64 epoch seconds, _NO_INT = undated
+        self.new      = new[order]
+        self.old      = old[order]
+        self.change   = change[order]
+        self.rank     = rank[order]
+        self.contest  = contest[order]         # object array of names
+
+    @classmethod
+    def from_history(cls, history):
+        history = list(history)
+        codes   = {p: i for i, p in enumerate(PLATFORMS)}
+
+        def ints(name):
+            return np.array([_field(h, name) or 0 for h in history], dtype=np.int64)
+
+        dates = np.array([_field(h, "date") for h in history], dtype="datetime64[s]")
+        date  = np.where(np.isnat(dates), _NO_INT, dates.astype(np.int64))
+        return cls(np.array([codes.get(_field(h, "platform"), -1) for h in history], dtype=np.int8),
+                   date, ints("new_rating"), ints("old_rating"), ints("change"), ints("rank"),
+                   np.array([_field(h, "contest") or "" for h in history], dtype=object))
+
+    def __len__(self):
+        return len(self.date)
+
+    def of(self, platform: str) -> "HistoryArrays":
+        mask = self.platform == PLATFORMS.index(platform)
+        out  = HistoryArrays.__new__(HistoryArrays)
+        for name in ("platform", "date", "new", "old", "change", "rank", "contest"):
+            setattr(out, name, getattr(self, name)[mask])
+        return out
+
+
+# ─── Metrics ──────────────────────────────────────────────────────────────────
+
+def deltas(new, old, change, starts=None) -> np.ndarray:
+    """
+    Rating change per contest. LeetCode entries carry no old rating or
+    change; theirs is the difference to the previous new_rating of the same
+    group (`starts`: first index of each group, default one group).
+    """
+    prev   = np.r_[new[:1], new[:-1]]
+    starts = [0] if starts is None else starts
+    if len(new):
+        prev[starts] = new[starts]
+    return np.where((change == 0) & (old == 0), new - prev, change)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the last `window` values at each position (shorter at the start)."""
+    if not len(values):
+        return values.astype(float)
+    sums  = np.cumsum(values, dtype=float)
+    sums[window:] = sums[window:] - sums[:-window]
+    count = np.minimum(np.arange(1, len(values) + 1), window)
+    return sums / count
+
+
+def streaks(change: np.ndarray) -> dict:
+    """Longest run of rating gains / losses and the current run (+gains, -losses)."""
+    sign = np.sign(change)
+    if not len(sign):
+        return {"longest_up": 0, "longest_down": 0, "current": 0}
+    starts  = np.flatnonzero(np.r_[True, sign[1:] != sign[:-1]])
+    lengths = np.diff(np.r_[starts, len(sign)])
+    signs   = sign[starts]
+    return {
+        "longest_up":   int(lengths[signs > 0].max(initial=0)),
+        "longest_down": int(lengths[signs < 0].max(initial=0)),
+        "current":      int(lengths[-1] * signs[-1]),
+    }
+
+
+def _iso(seconds):
+    return None if seconds == _NO_INT else str(np.datetime64(int(seconds), "s"))
+
+
+def _delta(arrays, change, i):
+    return {"change": int(change[i]), "contest": arrays.contest[i], "date": _iso(arrays.date[i])}
+
+
+def _frequency(date: np.ndarray, now: int) -> dict:
+    dated = date[date != _NO_INT]
+    if not len(dated):
+        return {"per_30_days": 0.0, "last_365_days": 0}
+    span = max((dated[-1] - dated[0]) / _DAY, 30.0)
+    return {"per_30_days": round(float(len(dated) / span * 30), 2),
+            "last_365_days": int(np.count_nonzero(dated >= now - 365 * _DAY))}
+
+
+def platform_summary(arrays: HistoryArrays, window: int = None, now: int = None) -> dict:
+    """Every metric for one platform's arrays (see HistoryArrays.of)."""
+    window = window or config()["rolling_window"]
+    now    = now or int(np.datetime64("now", "s").astype(np.int64))
+    if not len(arrays):
+        return {"contests": 0}
+    rolling = rolling_mean(arrays.new, window)
+    change  = deltas(arrays.new, arrays.old, arrays.change)
+    return {
+        "contests":   len(arrays),
+        "peak":       int(arrays.new.max()),
+        "current":    int(arrays.new[-1]),
+        "rolling":    [[_iso(d), round(float(v), 1)] for d, v in zip(arrays.date, rolling)],
+        "rolling_avg": round(float(rolling[-1]), 1),
+        "volatility": round(float(change.std()), 1),
+        "best":       _delta(arrays, change, int(change.argmax())),
+        "worst":      _delta(arrays, change, int(change.argmin())),
+        "frequency":  _frequency(arrays.date, now),
+        "streaks":    streaks(change),
+    }
+
+
+def summarize(history, window: int = None) -> dict:
+    """{platform: platform_summary} for the platforms present in `history`."""
+    arrays = history if isinstance(history, HistoryArrays) else HistoryArrays.from_history(history)
+    return {p: platform_summary(arrays.of(p), window)
+            for i, p in enumerate(PLATFORMS) if np.any(arrays.platform == i)}
+
+
+def peaks(history) -> dict:
+    """{platform: highest new_rating} for the platforms present in `history`."""
+    arrays = history if isinstance(history, HistoryArrays) else HistoryArrays.from_history(history)
+    if not len(arrays):
+        return {}
+    known = arrays.platform >= 0
+    codes, new = arrays.platform[known], arrays.new[known]
+    best  = np.full(len(PLATFORMS), _NO_INT)
+    np.maximum.at(best, codes, new)
+    return {p: int(best[i]) for i, p in enumerate(PLATFORMS) if best[i] != _NO_INT}
+
+
+# ─── Per-user cache ───────────────────────────────────────────────────────────
+
+def user_analytics(username: str, stats=None) -> dict:
+    """summarize() of `username`'s stored history, cached until the stats change."""
+    from tracker.models import UserStats
+    from tracker.utils import history_store
+
+    if stats is None:
+        stats = UserStats.objects(username=username).only("username", "last_updated").first()
+    stamp = int(stats.last_updated.timestamp()) if stats and stats.last_updated else 0
+    key   = f"analytics_{username}_{stamp}"
+    out   = cache.get(key)
+    if out is None:
+        out = summarize(history_store.load(username))
+        cache.set(key, out, timeout=config()["cache_timeout"])
+    return out
+
+
+# ─── Cohorts ──────────────────────────────────────────────────────────────────
+
+def _cohort_columns(usernames):
+    from tracker.models import RatingEntry
+
+    rows = list(RatingEntry.objects(username__in=list(usernames))
+                .only("username", "platform", "date", "new_rating", "old_rating", "change")
+                .as_pymongo())
+    codes = {p: i for i, p in enumerate(PLATFORMS)}
+    users = sorted({r["username"] for r in rows})
+    index = {u: i for i, u in enumerate(users)}
+    user     = np.array([index[r["username"]] for r in rows], dtype=np.int64)
+    platform = np.array([codes.get(r.get("platform"), -1) for r in rows], dtype=np.int64)
+    dates    = np.array([r.get("date") for r in rows], dtype="datetime64[s]")
+    date     = np.where(np.isnat(dates), _NO_INT, dates.astype(np.int64))
+    new      = np.array([r.get("new_rating") or 0 for r in rows], dtype=np.int64)
+    old      = np.array([r.get("old_rating") or 0 for r in rows], dtype=np.int64)
+    change   = np.array([r.get("change") or 0 for r in rows], dtype=np.int64)
+    return users, user, platform, date, new, old, change
+
+
+def _stats(values: np.ndarray) -> dict:
+    if not len(values):
+        return {}
+    p50, p90 = np.percentile(values, [50, 90])
+    return {"mean": round(float(values.mean()), 1), "p50": round(float(p50), 1),
+            "p90": round(float(p90), 1), "max": round(float(values.max()), 1)}
+
+
+def cohort(usernames) -> dict:
+    """
+    Per-user peak / current / contests / volatility for every (user, platform)
+    of `usernames`, and their distribution per platform — all from one query,
+    grouped with reduceat instead of per-user loops.
+    """
+    users, user, platform, date, new, old, change = _cohort_columns(usernames)
+    known = platform >= 0
+    user, platform, date, new, old, change = (a[known] for a in (user, platform, date, new, old, change))
+    out = {"users": len(users), "platforms": {}, "per_user": {}}
+    if not len(user):
+        return out
+
+    order = np.lexsort((date, platform, user))
+    user, platform, new = user[order], platform[order], new[order]
+    group  = np.r_[True, (user[1:] != user[:-1]) | (platform[1:] != platform[:-1])]
+    starts = np.flatnonzero(group)
+    ends   = np.r_[starts[1:], len(user)] - 1
+    change = deltas(new, old[order], change[order], starts)
+
+    counts     = np.diff(np.r_[starts, len(user)])
+    peak       = np.maximum.reduceat(new, starts)
+    current    = new[ends]
+    mean       = np.add.reduceat(change, starts) / counts
+    sq_mean    = np.add.reduceat(change.astype(float) ** 2, starts) / counts
+    volatility = np.sqrt(np.maximum(sq_mean - mean ** 2, 0))
+    g_user, g_platform = user[starts], platform[starts]
+
+    for i in range(len(starts)):
+        out["per_user"].setdefault(users[g_user[i]], {})[PLATFORMS[g_platform[i]]] = {
+            "peak": int(peak[i]), "current": int(current[i]),
+            "contests": int(counts[i]), "volatility": round(float(volatility[i]), 1),
+        }
+    for code, name in enumerate(PLATFORMS):
+        mask = g_platform == code
+        if not mask.any():
+            continue
+        out["platforms"][name] = {
+            "users":      int(mask.sum()),
+            "peak":       _stats(peak[mask]),
+            "current":    _stats(current[mask]),
+            "contests":   _stats(counts[mask]),
+            "volatility": _stats(volatility[mask]),
+        }
+    return out
@@ -6,106 +6,62 @@ IMPORTANT: This module no longer resolves handles from UserProfile.
 Handle resolution is the sole responsibility of fetch_coordinator.py,
 which passes resolved handles as explicit keyword arguments.
 This keeps fetchers pure — they fetch, parse, and return data only.
+
+Every outbound call first takes a token from the shared rate limiter.
+When the limiter says "serve cached" (ServeCached), that platform is
+skipped and its previously stored RatingHistory entries are reused.
 """
 import asyncio
-import aiohttp
 from datetime import datetime
+from asgiref.sync import sync_to_async
 from tracker.utils.codechef_api import fetch_codechef_async
 from tracker.utils.atcoder import fetch_atcoder_async
+from tracker.utils.http_clients import get_async_session
+from tracker.utils.platform_gate import platform_slot
+from tracker.utils.rate_limiter import ServeCached, acquire_async
+from tracker.utils.history_sync import codeforces_entries
+from tracker.utils.leetcode_graphql import (
+    LEETCODE_GRAPHQL, headers as lc_headers, profile_query, parse_profile_body,
+)
+from tracker.utils.codeforces import CF_RATING_URL, parse_api_result
+from tracker.utils.response_cache import aget_parsed
+from tracker.utils.single_flight import run_async, platform_key
 
 
 async def fetch_codeforces(http_session, handle):
-    url = f"https://codeforces.com/api/user.rating?handle={handle}"
-    try:
-        async with http_session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-            if resp.status != 200:
-                return []
-            data = await resp.json()
-            if data["status"] != "OK":
-                return []
-            return data["result"]
-    except Exception as e:
-        print(f"Codeforces error ({handle}): {e}")
-        return []
-
-
-async def fetch_leetcode_solved(http_session, handle):
-    url = "https://leetcode.com/graphql/"
-    query = {
-        "query": """query getUserProfile($username: String!) {
-            matchedUser(username: $username) {
-                submitStats: submitStatsGlobal { acSubmissionNum { difficulty count } }
-            }
-        }""",
-        "variables": {"username": handle}
-    }
-    headers = {
-        "Content-Type": "application/json",
-        "Referer": f"https://leetcode.com/{handle}/",
-        "User-Agent": "Mozilla/5.0"
-    }
-    try:
-        async with http_session.post(url, json=query, headers=headers,
-                                     timeout=aiohttp.ClientTimeout(total=10)) as resp:
-            if resp.status != 200:
-                return 0
-            data = await resp.json()
-            mu = data.get("data", {}).get("matchedUser")
-            if not mu:
-                return 0
-            all_entry = next(
-                (i for i in mu["submitStats"]["acSubmissionNum"] if i["difficulty"] == "All"),
-                None
-            )
-            return all_entry["count"] if all_entry else 0
-    except Exception as e:
-        print(f"LeetCode solved error ({handle}): {e}")
-        return 0
+    """Rated rounds of `handle`. Errors propagate — _or_stored keeps the stored entries."""
+    await acquire_async("codeforces.com")
+    _, result = await aget_parsed("codeforces", handle, "user.rating", CF_RATING_URL,
+                                  parse_api_result, params={"handle": handle})
+    return result or []
 
 
 async def fetch_leetcode(http_session, handle, include_non_attended=False):
-    url = "https://leetcode.com/graphql/"
-    query = {
-        "operationName": "userContestRankingInfo",
-        "query": """query userContestRankingInfo($username: String!) {
-            userContestRankingHistory(username: $username) {
-                attended rating ranking
-                contest { title startTime }
-            }
-        }""",
-        "variables": {"username": handle}
-    }
-    headers = {
-        "Content-Type": "application/json",
-        "Referer": f"https://leetcode.com/{handle}/",
-        "User-Agent": "Mozilla/5.0"
-    }
+    """Solved count and contest history in one GraphQL round trip."""
+    await acquire_async("leetcode.com")
+    _, result = await aget_parsed(
+        "leetcode", handle, "profile" + ("+unattended" if include_non_attended else ""),
+        LEETCODE_GRAPHQL, lambda body: parse_profile_body(body, include_non_attended),
+        method="POST", json=profile_query(handle), headers=lc_headers(handle))
+    return result or (0, [])
+
+
+async def _or_stored(platform, handle, fetch, empty, skipped):
+    """
+    Run fetch() once per (platform, handle) across concurrent callers;
+    on ServeCached or a fetch error, mark the platform skipped and return
+    `empty` — its stored entries are kept, never replaced by an empty list.
+    Bulk runs cap concurrent fetches per platform (platform_gate).
+    """
     try:
-        async with http_session.post(url, json=query, headers=headers,
-                                     timeout=aiohttp.ClientTimeout(total=10)) as resp:
-            if resp.status != 200:
-                return await fetch_leetcode_solved(http_session, handle), []
-            data = await resp.json()
-            if "errors" in data or not data.get("data"):
-                return await fetch_leetcode_solved(http_session, handle), []
-
-            history = []
-            for e in data["data"].get("userContestRankingHistory", []):
-                if not e["attended"] and not include_non_attended:
-                    continue
-                dt = datetime.fromtimestamp(e["contest"]["startTime"])
-                history.append({
-                    "contest":    e["contest"]["title"],
-                    "rank":       int(e.get("ranking", 0)),
-                    "old_rating": 0,
-                    "new_rating": int(e["rating"]),
-                    "date":       dt.strftime("%Y-%m-%d %H:%M:%S"),
-                })
-            solved = await fetch_leetcode_solved(http_session, handle)
-            return solved, history
+        async with platform_slot(platform):
+            return await run_async(platform_key(platform, handle), fetch)
+    except ServeCached as e:
+        print(f"[async] {platform} skipped — {e}")
     except Exception as e:
-        print(f"LeetCode error ({handle}): {e}")
-        return await fetch_leetcode_solved(http_session, handle), []
+        print(f"[async] {platform} error ({handle}), keeping stored entries: {e}")
+    skipped.add(platform)
+    return empty
 
 
 async def fetch_and_store_rating_history_async(
@@ -115,6 +71,8 @@ async def fetch_and_store_rating_history_async(
     cc_handle=None,
     ac_handle=None,
     include_atcoder=True,
+    cf_since=0,
+    skipped=None,
 ):
     """
     Fetch from all four platforms concurrently using asyncio.gather().
@@ -123,6 +81,13 @@ async def fetch_and_store_rating_history_async(
     no longer queries UserProfile itself. If handles are not passed
     (e.g. called directly in tests), username is used as fallback.
 
+    cf_since > 0 enables incremental Codeforces mode: only rounds newer
+    than that ratingUpdateTimeSeconds are converted and returned
+    (the caller merges them via history_sync.store_history).
+
+    Platforms that could not be fetched (rate limited, breaker open,
+    error) keep their stored entries and are added to `skipped`, if given.
+
     Returns (history: list[RatingHistory], lc_solved: int).
     """
     # Fallback only if called without explicit handles (e.g. tests)
@@ -133,31 +98,34 @@ async def fetch_and_store_rating_history_async(
 
     print(f"[async] fetching — CF:{cf_handle} LC:{lc_handle} CC:{cc_handle} AC:{ac_handle}")
 
-    async with aiohttp.ClientSession() as session:
-        cf_task = fetch_codeforces(session, cf_handle)
-        cc_task = fetch_codechef_async(cc_handle)
-        lc_task = fetch_leetcode(session, lc_handle)
-        ac_task = (fetch_atcoder_async(ac_handle)
-                   if include_atcoder
-                   else asyncio.sleep(0, result=([], 0)))
-
-        cf_data, cc_data, (lc_solved, lc_hist), (ac_hist, _) = await asyncio.gather(
-            cf_task, cc_task, lc_task, ac_task
-        )
-
-    from tracker.models import RatingHistory
+    session = get_async_session()
+    skipped = set() if skipped is None else skipped
+    cf_task = _or_stored("Codeforces", cf_handle,
+                         lambda: fetch_codeforces(session, cf_handle), [], skipped)
+    cc_task = _or_stored("CodeChef", cc_handle,
+                         lambda: fetch_codechef_async(cc_handle), [], skipped)
+    lc_task = _or_stored("LeetCode", lc_handle,
+                         lambda: fetch_leetcode(session, lc_handle), (0, []), skipped)
+    ac_task = (_or_stored("AtCoder", ac_handle,
+                          lambda: fetch_atcoder_async(ac_handle), ([], 0), skipped)
+               if include_atcoder
+               else asyncio.sleep(0, result=([], 0)))
+
+    cf_data, cc_data, (lc_solved, lc_hist), (ac_hist, _) = await asyncio.gather(
+        cf_task, cc_task, lc_task, ac_task
+    )
+
+    from tracker.models import RatingHistory, UserStats
     history = []
 
-    for e in cf_data:
-        try:
-            dt = datetime.fromtimestamp(e["ratingUpdateTimeSeconds"])
-            history.append(RatingHistory(
-                platform="Codeforces", contest=e["contestName"],
-                rank=e["rank"], old_rating=e["oldRating"], new_rating=e["newRating"],
-                date=dt, change=e["newRating"] - e["oldRating"]
-            ))
-        except (KeyError, ValueError):
-            pass
+    if skipped:
+        stored = await sync_to_async(UserStats.objects(username=username).summary().first)()
+        if stored:
+            history.extend(stored.history_for(skipped))
+            if "LeetCode" in skipped:
+                lc_solved = stored.leetcode_solved or 0
+
+    history.extend(codeforces_entries(cf_data, since=cf_since))
 
     for e in cc_data:
         try:
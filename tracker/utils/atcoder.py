@@ -11,10 +11,14 @@ The AtCoder Problems API (kenkoooo) is community-maintained and open.
 Respect their rate-limit: https://github.com/kenkoooo/AtCoderProblems
 """
 
+import asyncio
+import json
 import logging
-import requests
 from datetime import datetime
+
 from django.core.cache import cache
+from tracker.utils.rate_limiter import ServeCached, acquire, acquire_async
+from tracker.utils.response_cache import get_parsed, aget_parsed
 
 logger = logging.getLogger(__name__)
 
@@ -46,29 +50,33 @@ def fetch_atcoder_history(username: str) -> tuple[list, int]:
 
 def _fetch_rating_history(username: str) -> list[dict]:
     """Fetch contest rating history from kenkoooo API."""
+    acquire("atcoder.jp")
     try:
-        r = requests.get(
+        _, history = get_parsed(
+            "atcoder", username, "history:atcoder.jp",
             "https://atcoder.jp/users/{}/history/json".format(username),
+            lambda body: _parse_history(json.loads(body), username),
             headers={"User-Agent": "CodeCracker/2.0"},
             timeout=12,
         )
-        if r.status_code == 200:
-            data = r.json()
-            return _parse_history(data, username)
+        if history is not None:
+            return history
     except Exception as e:
         logger.error(f"AtCoder rating history error for {username}: {e}")
 
     # Fallback: try kenkoooo rating endpoint
+    acquire("kenkoooo.com")
     try:
-        r = requests.get(
+        _, history = get_parsed(
+            "atcoder", username, "history:kenkoooo.com",
             f"https://kenkoooo.com/atcoder/atcoder-api/v3/user/rating",
+            lambda body: _parse_history(json.loads(body), username),
             params={"user": username},
             headers={"User-Agent": "CodeCracker/2.0"},
             timeout=12,
         )
-        if r.status_code == 200:
-            data = r.json()
-            return _parse_history(data, username)
+        if history is not None:
+            return history
     except Exception as e:
         logger.error(f"AtCoder kenkoooo fallback error for {username}: {e}")
 
@@ -136,21 +144,25 @@ def _parse_history(data: list, username: str) -> list[dict]:
 
 def _fetch_ac_count(username: str) -> int:
     """Fetch total accepted submission count."""
+    acquire("kenkoooo.com")
     try:
-        r = requests.get(
-            f"{_BASE}/user/ac_rank",
+        _, count = get_parsed(
+            "atcoder", username, "ac_rank", f"{_BASE}/user/ac_rank", _parse_ac_count,
             params={"user": username},
             headers={"User-Agent": "CodeCracker/2.0"},
             timeout=8,
         )
-        if r.status_code == 200:
-            data = r.json()
-            return int(data.get("count", 0))
+        if count is not None:
+            return count
     except Exception as e:
         logger.error(f"AtCoder AC count error for {username}: {e}")
     return 0
 
 
+def _parse_ac_count(body: bytes) -> int:
+    return int(json.loads(body).get("count", 0))
+
+
 def get_atcoder_current_rating(username: str) -> int:
     """Return just the current AtCoder rating (highest new_rating in history)."""
     history, _ = fetch_atcoder_history(username)
@@ -159,8 +171,95 @@ def get_atcoder_current_rating(username: str) -> int:
     return 0
 
 
-# ─── Async wrapper ────────────────────────────────────────────────────────────
+# ─── Async (native aiohttp) ───────────────────────────────────────────────────
+#
+# Same sources and parsing as the sync path, but nothing blocks a thread:
+#   • rating history and ac_rank are requested concurrently;
+#   • atcoder.jp is asked first, and if it has not answered within
+#     _HEDGE_DELAY seconds kenkoooo is raced against it — the first source
+#     that answers 200 wins and the other request is cancelled.
+
+_HEDGE_DELAY = 2.0
+_UA          = {"User-Agent": "CodeCracker/2.0"}
+
+
+async def _get_parsed_async(host: str, username: str, endpoint: str, url: str,
+                            parse, params=None, timeout: float = 12):
+    """Revalidated GET through the shared session; None unless 200/304 parsed."""
+    await acquire_async(host)
+    _, parsed = await aget_parsed("atcoder", username, endpoint, url, parse,
+                                  params=params, headers=_UA, timeout=timeout)
+    return parsed
+
+
+async def _history_source(host: str, url: str, params, username: str, denied: list):
+    """One history source: parsed list on success, None on any failure."""
+    try:
+        return await _get_parsed_async(
+            host, username, f"history:{host}", url,
+            lambda body: _parse_history(json.loads(body), username), params)
+    except ServeCached:
+        denied.append(host)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"AtCoder {host} history error for {username}: {e}")
+    return None
+
+
+async def _fetch_rating_history_async(username: str) -> list[dict]:
+    denied  = []
+    primary = asyncio.create_task(_history_source(
+        "atcoder.jp", f"{_BASE2}/{username}/history/json", None, username, denied))
+    kenkoooo = lambda: _history_source(
+        "kenkoooo.com", f"{_BASE}/user/rating", {"user": username}, username, denied)
+
+    done, _ = await asyncio.wait({primary}, timeout=_HEDGE_DELAY)
+    if done:
+        result = primary.result()
+        if result is None:
+            result = await kenkoooo()
+    else:
+        tasks  = {primary, asyncio.create_task(kenkoooo())}
+        result = None
+        try:
+            while tasks and result is None:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                result = next((t.result() for t in done if t.result() is not None), None)
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    if result is None and len(denied) == 2:
+        raise ServeCached("atcoder.jp", "both history sources rate-limited")
+    return result or []
+
+
+async def _fetch_ac_count_async(username: str) -> int:
+    try:
+        count = await _get_parsed_async("kenkoooo.com", username, "ac_rank",
+                                        f"{_BASE}/user/ac_rank", _parse_ac_count,
+                                        {"user": username}, timeout=8)
+        return count or 0
+    except ServeCached:
+        return 0   # the count is optional — never hold up history for it
+    except Exception as e:
+        logger.error(f"AtCoder AC count error for {username}: {e}")
+        return 0
+
 
 async def fetch_atcoder_async(username: str) -> tuple[list, int]:
-    import asyncio
-    return await asyncio.to_thread(fetch_atcoder_history, username)
+    """Async twin of fetch_atcoder_history() — same cache key and result shape."""
+    cache_key = f"atcoder_history_{username}"
+    cached    = await cache.aget(cache_key)
+    if cached is not None:
+        return cached
+
+    history, ac_count = await asyncio.gather(
+        _fetch_rating_history_async(username),
+        _fetch_ac_count_async(username),
+    )
+
+    result = (history, ac_count)
+    await cache.aset(cache_key, result, timeout=3600)
+    return result
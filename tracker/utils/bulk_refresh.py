@@ -0,0 +1,151 @@
+# tracker/utils/bulk_refresh.py
+"""
+Bulk refreshers for summary fields that do not need a per-user history fetch.
+
+The leaderboard and admin panel only show current ratings, so instead of
+one call per user (fetch_and_store_all), each platform is asked for many
+handles at once and the changed values are written back with a single
+unordered bulk_write (persistence.bulk_update):
+
+  • Codeforces — user.info with up to CF_INFO_BATCH handles joined by ';'
+  • LeetCode   — one aliased GraphQL document per LC_BATCH handles
+
+UserStats.codeforces_rating holds the peak of the rated history (see
+history_sync.store_history), so user.info's maxRating is the matching value.
+"""
+import re
+import logging
+
+from tracker.models import UserProfile, UserStats
+from tracker.utils.http_clients import get_sync_session
+from tracker.utils.leetcode_graphql import LC_BATCH, fetch_leetcode_batch
+from tracker.utils.persistence import bulk_update
+from tracker.utils.rate_limiter import acquire
+from tracker.utils.stats_events import mark_leaderboard, publish
+
+logger = logging.getLogger(__name__)
+
+CF_INFO_URL   = "https://codeforces.com/api/user.info"
+CF_INFO_BATCH = 300        # handles per request — keeps the URL well under 8 KB
+
+_MISSING_HANDLE = re.compile(r"User with handle (\S+) not found")
+
+
+def _handle_index(field, resolve, lower=True) -> dict:
+    index = {}
+    for p in UserProfile.objects.only("username", field):
+        handle = resolve(p)
+        index.setdefault(handle.lower() if lower else handle, []).append(p.username)
+    return index
+
+
+def codeforces_handle_index() -> dict:
+    """Map lower-cased resolved Codeforces handle -> [usernames] for every profile."""
+    return _handle_index("codeforces_handle", UserProfile.get_codeforces_handle)
+
+
+def leetcode_handle_index() -> dict:
+    """Map resolved LeetCode handle -> [usernames] for every profile."""
+    return _handle_index("leetcode_handle", UserProfile.get_leetcode_handle, lower=False)
+
+
+def atcoder_handle_index() -> dict:
+    """Map lower-cased resolved AtCoder handle -> [usernames] for every profile."""
+    return _handle_index("atcoder_handle", UserProfile.get_atcoder_handle)
+
+
+def _publish_field(field: str, changed: dict):
+    """One stats event per changed user, one coalesced leaderboard update for all."""
+    for username, value in changed.items():
+        publish(username, {field: value}, mark=False)
+    mark_leaderboard(list(changed))
+
+
+def _fetch_user_info(handles: list) -> tuple[dict, int]:
+    """
+    One batched user.info call. Codeforces fails the whole batch if any
+    handle does not exist, so unknown handles are dropped and the batch
+    retried. Returns ({lower_handle: info}, requests_made).
+    """
+    handles  = list(handles)
+    requests = 0
+    while handles:
+        acquire("codeforces.com", max_wait=60)
+        requests += 1
+        try:
+            r = get_sync_session().get(
+                CF_INFO_URL,
+                params={"handles": ";".join(handles), "checkHistoricHandles": "false"},
+                timeout=30,
+            )
+            data = r.json()
+        except Exception as e:
+            logger.error(f"Codeforces user.info batch error ({len(handles)} handles): {e}")
+            return {}, requests
+
+        if data.get("status") == "OK":
+            return {u["handle"].lower(): u for u in data.get("result", [])}, requests
+
+        m = _MISSING_HANDLE.search(data.get("comment", ""))
+        if not m:
+            logger.error(f"Codeforces user.info failed: {data.get('comment')}")
+            return {}, requests
+        missing = m.group(1).lower()
+        logger.info(f"Codeforces user.info: dropping unknown handle {missing}")
+        handles = [h for h in handles if h.lower() != missing]
+    return {}, requests
+
+
+def refresh_codeforces_ratings(batch_size: int = CF_INFO_BATCH) -> dict:
+    """
+    Refresh UserStats.codeforces_rating for every tracked user.
+    Returns a summary: handles, requests, matched, updated.
+    """
+    index   = codeforces_handle_index()
+    handles = sorted(index)
+    current = {s.username: {"codeforces_rating": s.codeforces_rating or 0}
+               for s in UserStats.objects.only("username", "codeforces_rating")}
+
+    fetched, requests = {}, 0
+    for i in range(0, len(handles), batch_size):
+        infos, n = _fetch_user_info(handles[i:i + batch_size])
+        requests += n
+        for handle, info in infos.items():
+            rating = int(info.get("maxRating", 0) or 0)
+            for username in index.get(handle, []):
+                if username in current:
+                    fetched[username] = {"codeforces_rating": rating}
+
+    written = bulk_update(fetched, current, kind="bulk_codeforces")
+    if written:
+        _publish_field("codeforces_rating", {u: f["codeforces_rating"] for u, f in written.items()})
+
+    summary = {"handles": len(handles), "requests": requests,
+               "matched": len(fetched), "updated": len(written)}
+    logger.info(f"Codeforces bulk refresh: {summary}")
+    return summary
+
+
+def refresh_leetcode_solved(batch_size: int = LC_BATCH) -> dict:
+    """
+    Refresh UserStats.leetcode_solved for every tracked user.
+    Returns a summary: handles, requests, matched, updated.
+    """
+    index   = leetcode_handle_index()
+    handles = sorted(index)
+    current = {s.username: {"leetcode_solved": s.leetcode_solved or 0}
+               for s in UserStats.objects.only("username", "leetcode_solved")}
+
+    results = fetch_leetcode_batch(handles, batch_size=batch_size)
+    fetched = {username: {"leetcode_solved": solved}
+               for handle, (solved, _) in results.items()
+               for username in index.get(handle, []) if username in current}
+
+    written = bulk_update(fetched, current, kind="bulk_leetcode")
+    if written:
+        _publish_field("leetcode_solved", {u: f["leetcode_solved"] for u, f in written.items()})
+
+    summary = {"handles": len(handles), "requests": -(-len(handles) // batch_size),
+               "matched": len(fetched), "updated": len(written)}
+    logger.info(f"LeetCode bulk refresh: {summary}")
+    return summary
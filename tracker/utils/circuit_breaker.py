@@ -0,0 +1,223 @@
+# tracker/utils/circuit_breaker.py
+"""
+Per-platform circuit breakers for outbound fetches.
+
+Each platform host gets a breaker with a rolling window of recent calls
+(CIRCUIT_BREAKER["window"] seconds). Once it has seen at least
+"min_calls" calls and either
+
+  • the share of failed calls (network error, timeout, HTTP 5xx / 429), or
+  • the share of calls slower than "slow_call" seconds
+
+reaches its threshold, the breaker OPENS: for "cooldown" seconds every
+call to that host is refused at once with ServeCached, so the fetch
+coordinator reuses the platform's stored RatingHistory instead of
+waiting out a 10–15 s timeout. After the cooldown a single probe call is
+let through (HALF-OPEN); success closes the breaker, failure re-opens it
+with a doubled cooldown (capped at "max_cooldown").
+
+The gate is checked by rate_limiter.acquire()/acquire_async(), which every
+fetcher already calls before going out; outcomes are recorded where the
+requests are made (response_cache, codechef_api) via track().
+
+State is per process — each worker learns about a sick upstream from its
+own calls.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from tracker.utils.rate_limiter import ServeCached
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+_DEFAULTS = {
+    "window":          60,      # seconds of history considered
+    "min_calls":       5,       # don't judge a host on fewer calls than this
+    "error_threshold": 0.5,     # failed share that opens the breaker
+    "slow_call":       5.0,     # seconds — a call slower than this is "slow"
+    "slow_threshold":  0.5,     # slow share that opens the breaker
+    "cooldown":        30,      # seconds open before a probe is allowed
+    "max_cooldown":    300,
+    "probe_timeout":   30,      # a probe that never reports frees the slot after this
+}
+
+# Platform name (as stored in RatingHistory) -> hosts it is fetched from
+PLATFORM_HOSTS = {
+    "Codeforces": ("codeforces.com",),
+    "LeetCode":   ("leetcode.com",),
+    "CodeChef":   ("codechef.com",),
+    "AtCoder":    ("atcoder.jp", "kenkoooo.com"),
+}
+
+
+def _config():
+    return {**_DEFAULTS, **getattr(settings, "CIRCUIT_BREAKER", {})}
+
+
+def host_of(url: str) -> str:
+    host = urlsplit(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class CircuitBreaker:
+    def __init__(self, host):
+        self.host        = host
+        self.state       = CLOSED
+        self.calls       = deque()       # (timestamp, ok, latency)
+        self.open_until  = 0.0
+        self.cooldown    = None
+        self.probe_since = None
+        self.opened      = 0             # times tripped (for metrics)
+        self.refused     = 0
+        self.lock        = threading.Lock()
+
+    # ── gate ──────────────────────────────────────────────────────────────
+    def allow(self) -> bool:
+        cfg = _config()
+        now = time.monotonic()
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now >= self.open_until:
+                self.state, self.probe_since = HALF_OPEN, now
+                return True
+            if (self.state == HALF_OPEN
+                    and now - (self.probe_since or 0) > cfg["probe_timeout"]):
+                self.probe_since = now
+                return True
+            self.refused += 1
+            return False
+
+    def check(self):
+        """Raise ServeCached while the breaker refuses calls."""
+        if not self.allow():
+            raise ServeCached(self.host, "circuit open")
+
+    # ── outcomes ──────────────────────────────────────────────────────────
+    def record(self, ok: bool, latency: float):
+        cfg = _config()
+        now = time.monotonic()
+        with self.lock:
+            if self.state == HALF_OPEN:
+                if ok and latency < cfg["slow_call"]:
+                    self._close()
+                else:
+                    self._open(now, cfg, self.cooldown * 2 if self.cooldown else cfg["cooldown"])
+                return
+
+            self.calls.append((now, ok, latency))
+            while self.calls and self.calls[0][0] < now - cfg["window"]:
+                self.calls.popleft()
+            if self.state != CLOSED or len(self.calls) < cfg["min_calls"]:
+                return
+            n      = len(self.calls)
+            errors = sum(1 for _, good, _ in self.calls if not good)
+            slow   = sum(1 for _, _, lat in self.calls if lat >= cfg["slow_call"])
+            if errors / n >= cfg["error_threshold"] or slow / n >= cfg["slow_threshold"]:
+                self._open(now, cfg, cfg["cooldown"])
+
+    def _open(self, now, cfg, cooldown):
+        self.state       = OPEN
+        self.cooldown    = min(cooldown, cfg["max_cooldown"])
+        self.open_until  = now + self.cooldown
+        self.probe_since = None
+        self.opened     += 1
+        print(f"[breaker] {self.host} OPEN for {self.cooldown:.0f}s")
+
+    def _close(self):
+        self.state, self.cooldown, self.probe_since = CLOSED, None, None
+        self.calls.clear()
+        print(f"[breaker] {self.host} closed")
+
+    def snapshot(self) -> dict:
+        cfg = _config()
+        now = time.monotonic()
+        with self.lock:
+            calls = [c for c in self.calls if c[0] >= now - cfg["window"]]
+            n     = len(calls)
+            return {
+                "state":       self.state,
+                "calls":       n,
+                "error_rate":  round(sum(1 for _, ok, _ in calls if not ok) / n, 3) if n else 0.0,
+                "slow_rate":   round(sum(1 for _, _, l in calls if l >= cfg["slow_call"]) / n, 3) if n else 0.0,
+                "avg_latency": round(sum(l for _, _, l in calls) / n, 3) if n else 0.0,
+                "retry_in":    round(max(0.0, self.open_until - now), 1) if self.state == OPEN else 0.0,
+                "opened":      self.opened,
+                "refused":     self.refused,
+            }
+
+
+_breakers = {}
+_lock     = threading.Lock()
+
+
+def breaker(host: str) -> CircuitBreaker:
+    b = _breakers.get(host)
+    if b is None:
+        with _lock:
+            b = _breakers.setdefault(host, CircuitBreaker(host))
+    return b
+
+
+class _Call:
+    status = None
+
+
+@contextmanager
+def track(host: str):
+    """
+    Record the outcome of one outbound call to `host`:
+
+        with track(host) as call:
+            resp = session.get(...)
+            call.status = resp.status_code
+
+    An exception (other than ServeCached) or a 5xx / 429 status counts as
+    a failure; latency is measured for the whole block.
+    """
+    call = _Call()
+    t0   = time.monotonic()
+    try:
+        yield call
+    except ServeCached:
+        raise
+    except Exception:          # not CancelledError — a hedged loser is not a failure
+        breaker(host).record(False, time.monotonic() - t0)
+        raise
+    status = call.status or 200
+    breaker(host).record(status < 500 and status != 429, time.monotonic() - t0)
+
+
+# ─── Status ───────────────────────────────────────────────────────────────────
+
+def snapshot() -> dict:
+    """Per-host breaker details, for the admin metrics endpoint."""
+    return {host: b.snapshot() for host, b in list(_breakers.items())}
+
+
+def platform_status() -> dict:
+    """
+    {platform: "closed" | "degraded" | "open"} for views and the WebSocket
+    payload. A platform with several hosts is "degraded" when only some of
+    them are refusing calls.
+    """
+    out = {}
+    for platform, hosts in PLATFORM_HOSTS.items():
+        states = [breaker(h).state if h in _breakers else CLOSED for h in hosts]
+        if all(s == CLOSED for s in states):
+            out[platform] = CLOSED
+        elif all(s == OPEN for s in states):
+            out[platform] = OPEN
+        else:
+            out[platform] = "degraded"
+    return out
+
+
+def unavailable_platforms() -> list:
+    """Platforms currently served (at least partly) from stored data."""
+    return [p for p, state in platform_status().items() if state != CLOSED]
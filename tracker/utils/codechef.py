@@ -1,6 +1,8 @@
 import requests
 from bs4 import BeautifulSoup
 from django.core.cache import cache
+from tracker.utils.http_clients import get_sync_session
+from tracker.utils.rate_limiter import acquire
 
 
 def fetch_codechef_rating(username):
@@ -15,7 +17,8 @@ def fetch_codechef_rating(username):
     url = f"https://www.codechef.com/users/{username}"
     try:
         # Send a GET request to the CodeChef profile page
-        response = requests.get(url, timeout=10)
+        acquire("codechef.com")
+        response = get_sync_session().get(url, timeout=10)
 
         # Check for a successful response
         if response.status_code != 200:
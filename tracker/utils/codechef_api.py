@@ -10,15 +10,26 @@ What it fetches:
   - Full contest rating history (from the embedded JSON in the profile page)
   - Current rating (fallback if JSON not found)
 
-Results are cached in Redis for 1 hour (same as before).
+fetch_codechef_async() is a native aiohttp twin that streams the page and
+stops reading once the rating_data array has been captured.
+
+Results are cached in Redis for 1 hour (same as before). After that the
+page is revalidated through response_cache: the captured rating_data
+array is digested, and an unchanged array reuses the stored parse.
 """
 
 import re
 import json
+import asyncio
 import logging
+import aiohttp
 import requests
 from datetime import datetime
 from django.core.cache import cache
+from tracker.utils.http_clients import get_async_session, get_sync_session
+from tracker.utils.rate_limiter import acquire, acquire_async
+from tracker.utils.response_cache import CachedResponse
+from tracker.utils.circuit_breaker import track
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +58,7 @@ def fetch_codechef_contest_history(username: str) -> list[dict]:
         logger.debug(f"CodeChef cache hit: {username}")
         return cached
 
+    acquire("codechef.com")
     result = _scrape_history(username)
     cache.set(cache_key, result, timeout=3600)
     return result
@@ -56,7 +68,14 @@ def _scrape_history(username: str) -> list[dict]:
     """Scrape the CodeChef public profile page for contest history."""
     url = f"https://www.codechef.com/users/{username}"
     try:
-        resp = requests.get(url, headers=_HEADERS, timeout=15)
+        cr = CachedResponse("codechef", username, "profile").load()
+        with track("codechef.com") as call:
+            resp = get_sync_session().get(url, headers=cr.request_headers(_HEADERS), timeout=15)
+            call.status = resp.status_code
+        if resp.status_code == 304 and cr.entry:
+            history = cr.not_modified()
+            cr.store(resp.headers)
+            return history
         if resp.status_code == 404:
             logger.warning(f"CodeChef user not found: {username}")
             return []
@@ -64,6 +83,14 @@ def _scrape_history(username: str) -> list[dict]:
             logger.error(f"CodeChef HTTP {resp.status_code} for {username}")
             return _fallback_current_rating(username)
 
+        # ── Method 0: rating_data array, revalidated by digest ─────────────
+        m = _RATING_DATA_RE.search(resp.content)
+        if m:
+            history = cr.parse(m.group(1), _parse_rating_array)
+            if history:
+                cr.store(resp.headers)
+                return history
+
         html = resp.text
 
         # ── Method 1: Extract from the embedded JSON (most reliable) ──────
@@ -155,6 +182,14 @@ def _extract_from_graph_data(html: str, username: str) -> list[dict]:
         return []
 
 
+def _parse_rating_array(raw: bytes):
+    """Parse a captured rating_data array; None if unusable (so nothing is cached)."""
+    try:
+        return _parse_codechef_entries(json.loads(raw)) or None
+    except (json.JSONDecodeError, ValueError):
+        return None
+
+
 def _parse_codechef_entries(data: list) -> list[dict]:
     """Convert raw CodeChef JSON entries to our standard format."""
     result = []
@@ -211,7 +246,8 @@ def _fallback_current_rating(username: str, html: str = "") -> list[dict]:
     if not html:
         # Try a fresh request
         try:
-            r = requests.get(
+            acquire("codechef.com")
+            r = get_sync_session().get(
                 f"https://www.codechef.com/users/{username}",
                 headers=_HEADERS, timeout=12
             )
@@ -234,8 +270,102 @@ def _fallback_current_rating(username: str, html: str = "") -> list[dict]:
     return []
 
 
-# ─── Async wrapper ────────────────────────────────────────────────────────────
+# ─── Async (native aiohttp, streamed) ─────────────────────────────────────────
+#
+# The profile page is large and `var rating_data = [...]` sits in an inline
+# <script> long before the end of it. The body is streamed in chunks and
+# reading stops as soon as that array has been captured and parsed. If it
+# never shows up, the body read so far IS the full page and goes to the
+# same fallbacks as the sync path — the page is never downloaded twice.
+
+_STREAM_CHUNK   = 32 * 1024
+_RATING_MARKER  = re.compile(rb'var\s+rating_data\s*=\s*\[')
+_RATING_DATA_RE = re.compile(rb'var\s+rating_data\s*=\s*(\[.*?\])\s*;', re.DOTALL)
+
+
+async def _stream_rating_data(resp, parse=_parse_rating_array) -> tuple[list[dict], bytes]:
+    """
+    Read `resp` until rating_data has been captured and parse() accepted it.
+    Returns (history, body_read) — history is [] if the array was not found.
+    """
+    buf    = bytearray()
+    marker = None
+    async for chunk in resp.content.iter_chunked(_STREAM_CHUNK):
+        scan_from = max(0, len(buf) - 64)   # marker may straddle two chunks
+        buf.extend(chunk)
+        if marker is None:
+            m = _RATING_MARKER.search(buf, scan_from)
+            if not m:
+                continue
+            marker = m.start()
+        m = _RATING_DATA_RE.match(buf, marker)
+        if not m:
+            continue
+        history = parse(m.group(1))
+        if history:
+            return history, bytes(buf)
+        # Unusable match — look for another rating_data further down the page
+        nxt    = _RATING_MARKER.search(buf, m.end())
+        marker = nxt.start() if nxt else None
+    return [], bytes(buf)
+
+
+async def _scrape_history_async(username: str) -> list[dict]:
+    url = f"https://www.codechef.com/users/{username}"
+    try:
+        cr      = await CachedResponse("codechef", username, "profile").aload()
+        session = get_async_session()
+        with track("codechef.com") as call:
+            async with session.get(url, headers=cr.request_headers(_HEADERS),
+                                   timeout=aiohttp.ClientTimeout(total=15)) as resp:
+                call.status = resp.status
+                if resp.status == 304 and cr.entry:
+                    history = cr.not_modified()
+                    await cr.astore(resp.headers)
+                    return history
+                if resp.status == 404:
+                    logger.warning(f"CodeChef user not found: {username}")
+                    return []
+                if resp.status != 200:
+                    logger.error(f"CodeChef HTTP {resp.status} for {username}")
+                    return []
+                history, body = await _stream_rating_data(
+                    resp, parse=lambda raw: cr.parse(raw, _parse_rating_array))
+                resp_headers = resp.headers
+
+        if history:
+            await cr.astore(resp_headers)
+            logger.info(f"CodeChef streamed JSON: {len(history)} contests for {username} "
+                        f"({len(body) // 1024} KB read)")
+            return history
+        if not body:
+            return []
+
+        # rating_data never appeared — we hold the whole page now
+        html = body.decode("utf-8", errors="replace")
+        history = (_extract_from_json_script(html, username)
+                   or _extract_from_graph_data(html, username))
+        if history:
+            return history
+        return _fallback_current_rating(username, html)
+
+    except asyncio.TimeoutError:
+        logger.error(f"CodeChef timeout for {username}")
+        return []
+    except Exception as e:
+        logger.error(f"CodeChef scrape error for {username}: {e}")
+        return []
+
 
 async def fetch_codechef_async(username: str) -> list[dict]:
-    import asyncio
-    return await asyncio.to_thread(fetch_codechef_contest_history, username)
+    """Async twin of fetch_codechef_contest_history() — same cache key and shape."""
+    cache_key = f"codechef_history_{username}"
+    cached = await cache.aget(cache_key)
+    if cached is not None:
+        logger.debug(f"CodeChef cache hit: {username}")
+        return cached
+
+    await acquire_async("codechef.com")
+    result = await _scrape_history_async(username)
+    await cache.aset(cache_key, result, timeout=3600)
+    return result
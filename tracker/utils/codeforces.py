@@ -1,7 +1,18 @@
-import requests
+import json
 import aiohttp
 from datetime import datetime
 from django.core.cache import cache
+from tracker.utils.rate_limiter import acquire, acquire_async, ServeCached
+from tracker.utils.response_cache import get_parsed, aget_parsed
+
+CF_INFO_URL   = "https://codeforces.com/api/user.info"
+CF_RATING_URL = "https://codeforces.com/api/user.rating"
+
+
+def parse_api_result(body):
+    """`result` of a Codeforces API response, or None when status != OK."""
+    data = json.loads(body)
+    return data["result"] if data.get("status") == "OK" else None
 
 
 def fetch_codeforces_stats(username):
@@ -13,14 +24,14 @@ def fetch_codeforces_stats(username):
     if cached_rating is not None:
         return cached_rating
 
-    url = f"https://codeforces.com/api/user.info?handles={username}"
     try:
-        response = requests.get(url, timeout=5)
-        data = response.json()
+        acquire("codeforces.com")
+        _, result = get_parsed("codeforces", username, "user.info", CF_INFO_URL,
+                               parse_api_result, params={"handles": username}, timeout=5)
 
         # Check for a successful response
-        if data.get("status") == "OK":
-            rating = data["result"][0].get("rating", 0)
+        if result:
+            rating = result[0].get("rating", 0)
             cache.set(cache_key, rating, timeout=3600)  # Cache the rating
             return rating
     except Exception as e:
@@ -38,51 +49,52 @@ async def fetch_codeforces_rating_history_async(username):
     if cached_history is not None:
         return cached_history
 
-    url = f"https://codeforces.com/api/user.rating?handle={username}"
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                data = await resp.json()
-
-                # Check for a successful response
-                if data["status"] != "OK":
-                    return {"error": f"⚠️ Codeforces API Error: {data.get('comment', 'Unknown error')}"}
-
-                # Process the rating history
-                history = [
-                    {
-                        "contestId": entry["contestId"],
-                        "contestName": entry["contestName"],
-                        "rank": entry["rank"],
-                        "oldRating": entry["oldRating"],
-                        "newRating": entry["newRating"],
-                        "ratingChange": entry["newRating"] - entry["oldRating"],
-                        "date": datetime.fromtimestamp(entry["ratingUpdateTimeSeconds"]).isoformat()
-                    }
-                    for entry in data["result"]
-                ]
-
-                # Cache the history
-                cache.set(cache_key, history, timeout=3600)
-                return history if history else {"message": "⚠️ No contest history available."}
+        await acquire_async("codeforces.com")
+        status, result = await aget_parsed("codeforces", username, "user.rating", CF_RATING_URL,
+                                           parse_api_result, params={"handle": username})
+
+        # Check for a successful response
+        if result is None:
+            return {"error": f"⚠️ Codeforces API Error: HTTP {status}"}
+
+        # Process the rating history
+        history = [
+            {
+                "contestId": entry["contestId"],
+                "contestName": entry["contestName"],
+                "rank": entry["rank"],
+                "oldRating": entry["oldRating"],
+                "newRating": entry["newRating"],
+                "ratingChange": entry["newRating"] - entry["oldRating"],
+                "date": datetime.fromtimestamp(entry["ratingUpdateTimeSeconds"]).isoformat()
+            }
+            for entry in result
+        ]
+
+        # Cache the history
+        cache.set(cache_key, history, timeout=3600)
+        return history if history else {"message": "⚠️ No contest history available."}
     except aiohttp.ClientError as e:
         return {"error": f"⚠️ Codeforces API failed: {str(e)}"}
+    except ServeCached as e:
+        return {"error": f"⚠️ Codeforces API busy: {str(e)}"}
 
 
 def fetch_codeforces_rating_history(username):
     """Fetch Codeforces rating history synchronously."""
     print(f"Fetching Codeforces history for {username}")
     try:
-        url = f"https://codeforces.com/api/user.rating?handle={username}"
-        response = requests.get(url)
-        data = response.json()
+        acquire("codeforces.com")
+        status, result = get_parsed("codeforces", username, "user.rating", CF_RATING_URL,
+                                    parse_api_result, params={"handle": username})
 
         # Check for a successful response
-        if data["status"] == "OK":
-            print(f"Codeforces fetched {len(data['result'])} contests: {data['result']}")
-            return data["result"]
+        if result is not None:
+            print(f"Codeforces fetched {len(result)} contests: {result}")
+            return result
         else:
-            print(f"Codeforces API error: {data.get('comment', 'Unknown error')}")
+            print(f"Codeforces API error: HTTP {status}")
             return []
     except Exception as e:
         print(f"Error fetching Codeforces history: {str(e)}")
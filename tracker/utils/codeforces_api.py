@@ -2,6 +2,9 @@
 from django.core.cache import cache
 from django.http import JsonResponse
 import requests
+from tracker.utils.codeforces import CF_RATING_URL, parse_api_result
+from tracker.utils.rate_limiter import acquire
+from tracker.utils.response_cache import get_parsed
 
 
 def fetch_codeforces_contest_history(username):
@@ -13,19 +16,16 @@ def fetch_codeforces_contest_history(username):
         print(f"Retrieved cached data for {username}")
         return cached_data
 
-    url = f"https://codeforces.com/api/user.rating?handle={username}"
     try:
-        response = requests.get(url, timeout=10)
-        data = response.json()
+        acquire("codeforces.com")
+        status, contests = get_parsed("codeforces", username, "user.rating", CF_RATING_URL,
+                                      parse_api_result, params={"handle": username})
 
-        print("✅ Codeforces API Response:", data)
+        print(f"✅ Codeforces API Response: HTTP {status}")
 
         # Check for a successful response
-        if data.get("status") != "OK":
-            error_msg = data.get("comment", "Unknown error")
-            return {"error": f"⚠️ Codeforces API Error: {error_msg}"}
-
-        contests = data.get("result", [])
+        if contests is None:
+            return {"error": f"⚠️ Codeforces API Error: HTTP {status}"}
 
         # Filter and format valid contest data
         valid_contests = [
@@ -0,0 +1,191 @@
+# tracker/utils/contest_ingest.py
+"""
+Per-contest bulk ingestion of rating changes.
+
+After a round, refreshing every participant costs one user.rating (or
+AtCoder history) call per tracked user. Both platforms also publish the
+whole contest's rating-change table in one response:
+
+  • Codeforces — contest.ratingChanges?contestId=<id>
+  • AtCoder    — https://atcoder.jp/contests/<id>/results/json
+
+ingest_codeforces() / ingest_atcoder() fetch that table once, join it
+against the resolved-handle index of every UserProfile (bulk_refresh) and
+appends one rating_entries document per matching user that has no entry
+for that contest yet, in a single insert; one unordered bulk_write then
+raises the users' stored peak ratings with $max.
+
+codeforces_synced_at is left alone on purpose: the next incremental
+Codeforces sync re-reads anything newer than it, and history_sync drops
+rounds that are already stored, so nothing is duplicated.
+
+Tracked users without a UserStats document are reported as "missing" —
+they need a full fetch, not an append.
+"""
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+
+from tracker.models import RatingHistory, UserStats
+from tracker.utils import history_store
+from tracker.utils.atcoder import _parse_history
+from tracker.utils.bulk_refresh import atcoder_handle_index, codeforces_handle_index
+from tracker.utils.codeforces import parse_api_result
+from tracker.utils.history_sync import codeforces_entries
+from tracker.utils.persistence import bulk_update
+from tracker.utils.rate_limiter import acquire
+from tracker.utils.response_cache import get_parsed
+from tracker.utils.stats_events import changed_fields, mark_leaderboard, publish, summary_of
+
+logger = logging.getLogger(__name__)
+
+CF_CHANGES_URL = "https://codeforces.com/api/contest.ratingChanges"
+AC_RESULTS_URL = "https://atcoder.jp/contests/{}/results/json"
+
+_PEAK_FIELD = {"Codeforces": "codeforces_rating", "AtCoder": "atcoder_rating"}
+_JST        = timezone(timedelta(hours=9))     # history/json EndTime offset
+
+
+# ─── Contest tables ───────────────────────────────────────────────────────────
+
+def fetch_codeforces_changes(contest_id, max_wait=30):
+    """
+    (status, changes) for one Codeforces contest. changes is None when the
+    API refused (HTTP 400 — unrated or unknown contest) and [] while rating
+    changes are not published yet.
+    """
+    acquire("codeforces.com", max_wait=max_wait)
+    return get_parsed("contests", str(contest_id), "codeforces:ratingChanges",
+                      CF_CHANGES_URL, parse_api_result,
+                      params={"contestId": contest_id}, timeout=30, remember=False)
+
+
+def fetch_atcoder_results(contest_id, max_wait=30):
+    """Rows of an AtCoder contest's results/json, or None when unavailable."""
+    acquire("atcoder.jp", max_wait=max_wait)
+    _, results = get_parsed("contests", str(contest_id), "atcoder:results",
+                            AC_RESULTS_URL.format(contest_id), json.loads,
+                            timeout=30, remember=False)
+    return results
+
+
+# ─── Joins ────────────────────────────────────────────────────────────────────
+
+def codeforces_matches(changes) -> dict:
+    """{username: RatingHistory} for tracked users present in `changes`."""
+    index, out = codeforces_handle_index(), {}
+    for change in changes:
+        users = index.get(change.get("handle", "").lower())
+        if not users:
+            continue
+        for entry in codeforces_entries([change]):
+            for username in users:
+                out[username] = entry
+    return out
+
+
+def atcoder_matches(results, contest_id, end=None) -> dict:
+    """
+    {username: RatingHistory} for tracked users with a rated row in
+    `results`. `end` (epoch seconds) stands in for rows without EndTime.
+    """
+    index, out = atcoder_handle_index(), {}
+    # Same contest name and date as users/<handle>/history/json, so the
+    # entry has the (platform, contest, date) key a refresh would give it
+    screen_name = contest_id if "." in contest_id else f"{contest_id}.contest.atcoder.jp"
+    jst_end     = datetime.fromtimestamp(end, _JST).strftime("%Y-%m-%dT%H:%M:%S+09:00") if end else None
+    for row in results:
+        if not row.get("IsRated"):
+            continue
+        handle = row.get("UserScreenName", "")
+        users  = index.get(handle.lower())
+        if not users:
+            continue
+        row = {"ContestScreenName": screen_name, **row}
+        if end and not row.get("EndTime"):
+            row["EndTime"] = jst_end
+        for e in _parse_history([row], handle):
+            entry = RatingHistory(
+                platform="AtCoder", contest=e["contest"],
+                rank=e["rank"], old_rating=e["old_rating"], new_rating=e["new_rating"],
+                date=datetime.strptime(e["date"], "%Y-%m-%d %H:%M:%S"), change=e["change"]
+            )
+            for username in users:
+                out[username] = entry
+    return out
+
+
+# ─── Bulk write ───────────────────────────────────────────────────────────────
+
+def append_entries(platform: str, entries: dict) -> dict:
+    """
+    Append {username: RatingHistory} in one bulk_write, skipping users who
+    already have an entry for that contest. Returns a summary:
+    matched, pushed, missing (usernames without UserStats).
+    """
+    if not entries:
+        return {"matched": 0, "pushed": 0, "missing": set()}
+
+    peak     = _PEAK_FIELD[platform]
+    before   = {s.username: summary_of(s)
+                for s in UserStats.objects(username__in=list(entries)).only("username", peak)}
+    existing = set(before)
+    # Users who already have this contest — nothing to append or announce
+    already  = history_store.users_with(platform, {e.contest for e in entries.values()}, existing)
+    pushed   = {u: e for u, e in entries.items() if u in existing and u not in already}
+
+    if pushed:
+        history_store.append_many(pushed)
+        bulk_update({}, maximum={u: {peak: e.new_rating} for u, e in pushed.items()},
+                    kind="contest_ingest")
+        # Cached rendered histories no longer match what is stored
+        cache.delete_many([f"{prefix}_{u}" for u in pushed
+                           for prefix in ("rating_history", "user_stats")])
+        _publish(peak, entries, before, set(pushed))
+    return {"matched": len(entries), "pushed": len(pushed), "missing": set(entries) - existing}
+
+
+def _publish(peak: str, entries: dict, before: dict, pushed: set):
+    """Stats events for users whose entry was appended; one leaderboard update."""
+    raised = []
+    for username in pushed:
+        entry   = entries[username]
+        summary = {**before[username], peak: max(before[username][peak], entry.new_rating or 0)}
+        fields  = changed_fields(before[username], summary)
+        publish(username, fields, inserted=[entry], mark=False)
+        if fields:
+            raised.append(username)
+    mark_leaderboard(raised)
+
+
+def ingest_codeforces(contest_id, changes=None) -> dict:
+    """
+    Ingest one Codeforces contest. `changes` (contest.ratingChanges result)
+    is fetched when not given. The summary has published=False while the
+    table is empty or unavailable.
+    """
+    if changes is None:
+        _, changes = fetch_codeforces_changes(contest_id)
+    if not changes:
+        return {"contest": str(contest_id), "published": False}
+    summary = append_entries("Codeforces", codeforces_matches(changes))
+    summary.update(contest=str(contest_id), published=True, participants=len(changes))
+    logger.info(f"contest ingest: Codeforces {contest_id} — {len(changes)} rows, "
+                f"{summary['matched']} tracked, {summary['pushed']} appended")
+    return summary
+
+
+def ingest_atcoder(contest_id, results=None, end=None) -> dict:
+    """AtCoder twin of ingest_codeforces(); published=False until rated rows appear."""
+    if results is None:
+        results = fetch_atcoder_results(contest_id)
+    rated = [r for r in results or [] if r.get("IsRated")]
+    if not rated:
+        return {"contest": str(contest_id), "published": False}
+    summary = append_entries("AtCoder", atcoder_matches(rated, contest_id, end))
+    summary.update(contest=str(contest_id), published=True, participants=len(rated))
+    logger.info(f"contest ingest: AtCoder {contest_id} — {len(rated)} rated rows, "
+                f"{summary['matched']} tracked, {summary['pushed']} appended")
+    return summary
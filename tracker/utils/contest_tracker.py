@@ -5,17 +5,19 @@ Updated: uses codechef_api and atcoder instead of selenium_scraper.
 import asyncio
 from tracker.utils.codeforces import fetch_codeforces_rating_history
 from tracker.utils.codechef_api import fetch_codechef_contest_history
-from tracker.utils.atcoder import fetch_atcoder_history
+from tracker.utils.atcoder import fetch_atcoder_async
 
 
 async def fetch_all_async(username):
     codeforces_task = asyncio.to_thread(fetch_codeforces_rating_history, username)
     codechef_task   = asyncio.to_thread(fetch_codechef_contest_history,  username)
-    atcoder_task    = asyncio.to_thread(lambda: fetch_atcoder_history(username)[0], )
+    atcoder_task    = fetch_atcoder_async(username)
 
-    cf_data, cc_data, ac_data = await asyncio.gather(
-        codeforces_task, codechef_task, atcoder_task
+    # return_exceptions: a platform that is rate-limited (ServeCached) just yields []
+    cf_data, cc_data, ac_result = await asyncio.gather(
+        codeforces_task, codechef_task, atcoder_task, return_exceptions=True
     )
+    ac_data = ac_result[0] if isinstance(ac_result, tuple) else []
 
     return {
         "codeforces": cf_data if isinstance(cf_data, list) else [],
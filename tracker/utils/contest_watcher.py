@@ -0,0 +1,282 @@
+# tracker/utils/contest_watcher.py
+"""
+Contest-aware refresh triggers.
+
+Rating data only changes after a rated contest, so instead of refreshing
+everybody on a timer the watcher reads the platforms' contest calendars
+every `interval` seconds and nudges the refresh scheduler
+(refresh_scheduler.request_refresh) only for tracked users a finished
+contest can have affected:
+
+  • Codeforces — contest.list; for each contest finished within
+    `lookback_days`, contest.ratingChanges is polled until it is
+    published, then ingested for every tracked participant in one bulk
+    write (contest_ingest). Only participants without stored stats yet
+    are refreshed.
+  • AtCoder    — kenkoooo contests.json (rated contests only); the
+    official results/json is polled until rated results appear and is
+    ingested the same way.
+  • CodeChef / LeetCode — neither publishes a cheap participant list, so
+    once `publish_delay[platform]` has passed after a contest ends, the
+    users who have taken part on that platform before (stored history or
+    an explicit handle) are refreshed.
+
+Handled contests are remembered in the Redis set contests:done, so each
+contest triggers at most one round of refreshes.
+
+Run with `python manage.py contest_watcher`, or inside the ASGI process via
+CONTEST_WATCHER["run_in_asgi"] (tracker/lifespan.py).
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from tracker.utils.codeforces import parse_api_result
+from tracker.utils.contest_ingest import (
+    fetch_atcoder_results, fetch_codeforces_changes, ingest_atcoder, ingest_codeforces,
+)
+from tracker.utils.leetcode_graphql import LEETCODE_GRAPHQL, headers as lc_headers
+from tracker.utils.rate_limiter import ServeCached, acquire
+from tracker.utils.redis_conn import get_redis
+from tracker.utils.refresh_scheduler import request_refresh
+from tracker.utils.response_cache import get_parsed
+
+logger = logging.getLogger(__name__)
+
+_DONE     = "contests:done"
+_MAX_WAIT = 30        # background work can queue on the rate limiter longer
+
+_DEFAULTS = {
+    "interval":      600,            # seconds between calendar passes
+    "lookback_days": 7,              # finished contests older than this are ignored
+    "publish_delay": {"CodeChef": 6 * 3600, "LeetCode": 72 * 3600},
+    "run_in_asgi":   False,
+}
+
+CF_CONTESTS_URL = "https://codeforces.com/api/contest.list"
+AC_CONTESTS_URL = "https://kenkoooo.com/atcoder/resources/contests.json"
+CC_CONTESTS_URL = "https://www.codechef.com/api/list/contests/all"
+
+_LC_PAST_QUERY = """query pastContests($pageNo: Int, $numPerPage: Int) {
+    pastContests(pageNo: $pageNo, numPerPage: $numPerPage) {
+        data { title titleSlug startTime duration }
+    }
+}"""
+
+
+def config() -> dict:
+    return {**_DEFAULTS, **getattr(settings, "CONTEST_WATCHER", {})}
+
+
+class Contest:
+    """A finished contest: platform, id, title, end time (epoch seconds)."""
+
+    def __init__(self, platform, contest_id, title, end):
+        self.platform, self.id, self.title, self.end = platform, str(contest_id), title, end
+
+    @property
+    def key(self):
+        return f"{self.platform}:{self.id}"
+
+    def __repr__(self):
+        return f"<Contest {self.key} {self.title!r}>"
+
+
+# ─── Calendars ────────────────────────────────────────────────────────────────
+
+def _json(body):
+    return json.loads(body)
+
+
+def codeforces_finished(since: float) -> list:
+    acquire("codeforces.com", max_wait=_MAX_WAIT)
+    _, contests = get_parsed("contests", "all", "codeforces", CF_CONTESTS_URL,
+                             parse_api_result, params={"gym": "false"}, timeout=20)
+    return [Contest("Codeforces", c["id"], c["name"],
+                    c["startTimeSeconds"] + c["durationSeconds"])
+            for c in contests or []
+            if c.get("phase") == "FINISHED"
+            and c.get("startTimeSeconds", 0) + c.get("durationSeconds", 0) >= since]
+
+
+def atcoder_finished(since: float) -> list:
+    acquire("kenkoooo.com", max_wait=_MAX_WAIT)
+    _, contests = get_parsed("contests", "all", "atcoder", AC_CONTESTS_URL, _json, timeout=20)
+    now = time.time()
+    return [Contest("AtCoder", c["id"], c.get("title", c["id"]),
+                    c["start_epoch_second"] + c["duration_second"])
+            for c in contests or []
+            if c.get("rate_change", "-") != "-"
+            and since <= c["start_epoch_second"] + c["duration_second"] <= now]
+
+
+def codechef_finished(since: float) -> list:
+    acquire("codechef.com", max_wait=_MAX_WAIT)
+    _, data = get_parsed("contests", "all", "codechef", CC_CONTESTS_URL, _json,
+                         params={"sort_by": "END", "sorting_order": "desc", "mode": "all"},
+                         timeout=20)
+    out = []
+    for c in (data or {}).get("past_contests", []):
+        try:
+            end = datetime.fromisoformat(c["contest_end_date_iso"]).timestamp()
+        except (KeyError, ValueError, TypeError):
+            continue
+        if end >= since:
+            out.append(Contest("CodeChef", c["contest_code"], c.get("contest_name", ""), end))
+    return out
+
+
+def leetcode_finished(since: float) -> list:
+    acquire("leetcode.com", max_wait=_MAX_WAIT)
+    query = {"query": _LC_PAST_QUERY, "variables": {"pageNo": 1, "numPerPage": 10}}
+    _, data = get_parsed("contests", "all", "leetcode", LEETCODE_GRAPHQL, _json,
+                         method="POST", json=query, headers=lc_headers(), timeout=20)
+    past = (((data or {}).get("data") or {}).get("pastContests") or {}).get("data") or []
+    return [Contest("LeetCode", c["titleSlug"], c["title"], c["startTime"] + c["duration"])
+            for c in past if c["startTime"] + c["duration"] >= since]
+
+
+_CALENDARS = {
+    "Codeforces": codeforces_finished,
+    "AtCoder":    atcoder_finished,
+    "CodeChef":   codechef_finished,
+    "LeetCode":   leetcode_finished,
+}
+
+
+# ─── Published ratings → affected users ───────────────────────────────────────
+#
+# Each resolver returns None while ratings are not published yet, otherwise
+# the set of tracked usernames that still need a refresh (possibly empty).
+
+def _codeforces_affected(contest: Contest):
+    status, changes = fetch_codeforces_changes(contest.id, max_wait=_MAX_WAIT)
+    if changes is None:
+        # 400 "Rating changes are unavailable" — unrated, nothing to wait for
+        return set() if status == 400 else None
+    summary = ingest_codeforces(contest.id, changes)
+    return summary["missing"] if summary["published"] else None
+
+
+def _atcoder_affected(contest: Contest):
+    results = fetch_atcoder_results(contest.id, max_wait=_MAX_WAIT)
+    summary = ingest_atcoder(contest.id, results, end=contest.end)
+    return summary["missing"] if summary["published"] else None
+
+
+def platform_participants(platform: str) -> set:
+    """Tracked users who have stored history on `platform` or set its handle."""
+    from tracker.models import UserProfile
+    from tracker.utils.history_store import users_with
+
+    field = {"CodeChef": "codechef_handle", "LeetCode": "leetcode_handle"}[platform]
+    users = users_with(platform)
+    users.update(p.username for p in UserProfile.objects(**{f"{field}__ne": ""}).only("username"))
+    return users
+
+
+def _delayed_affected(contest: Contest):
+    delay = config()["publish_delay"].get(contest.platform, 0)
+    if time.time() < contest.end + delay:
+        return None
+    return platform_participants(contest.platform)
+
+
+_RESOLVERS = {
+    "Codeforces": _codeforces_affected,
+    "AtCoder":    _atcoder_affected,
+    "CodeChef":   _delayed_affected,
+    "LeetCode":   _delayed_affected,
+}
+
+
+# ─── Watcher ──────────────────────────────────────────────────────────────────
+
+def watch_once(platforms=None) -> dict:
+    """
+    One pass over the contest calendars. Returns a summary:
+    {platform: {"finished": n, "published": n, "refreshes": n}}.
+    """
+    cfg   = config()
+    r     = get_redis()
+    since = time.time() - cfg["lookback_days"] * 86400
+    done  = {m.decode() for m in r.smembers(_DONE)}
+
+    summary = {}
+    for platform in platforms or _CALENDARS:
+        row = summary[platform] = {"finished": 0, "published": 0, "refreshes": 0}
+        try:
+            contests = [c for c in _CALENDARS[platform](since) if c.key not in done]
+        except ServeCached as e:
+            logger.info(f"contest watcher: {platform} calendar skipped — {e}")
+            continue
+        except Exception as e:
+            logger.error(f"contest watcher: {platform} calendar failed: {e}")
+            continue
+        row["finished"] = len(contests)
+
+        for contest in sorted(contests, key=lambda c: c.end):
+            try:
+                affected = _RESOLVERS[platform](contest)
+            except ServeCached as e:
+                logger.info(f"contest watcher: {contest.key} deferred — {e}")
+                break
+            except Exception as e:
+                logger.error(f"contest watcher: {contest.key} check failed: {e}")
+                continue
+            if affected is None:
+                continue                                  # not published yet
+            for username in affected:
+                request_refresh(username)
+            r.sadd(_DONE, contest.key)
+            row["published"] += 1
+            row["refreshes"] += len(affected)
+            logger.info(f"contest watcher: {contest.title or contest.key} published — "
+                        f"{len(affected)} tracked users queued")
+    return summary
+
+
+async def run(stop: asyncio.Event = None, interval: float = None):
+    """Call watch_once() every `interval` seconds until `stop` is set."""
+    stop     = stop or asyncio.Event()
+    interval = interval or config()["interval"]
+    while not stop.is_set():
+        try:
+            await sync_to_async(watch_once, thread_sensitive=False)()
+        except Exception as e:
+            logger.error(f"contest watcher pass failed: {e}", exc_info=True)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+# ─── ASGI lifespan integration ────────────────────────────────────────────────
+
+_stop = None
+_task = None
+
+
+async def start_in_background():
+    global _stop, _task
+    if not config()["run_in_asgi"] or _task is not None:
+        return
+    _stop = asyncio.Event()
+    _task = asyncio.create_task(run(_stop))
+
+
+async def stop_background():
+    global _stop, _task
+    if _task is None:
+        return
+    _stop.set()
+    try:
+        await asyncio.wait_for(_task, timeout=30)
+    except asyncio.TimeoutError:
+        _task.cancel()
+    _stop = _task = None
@@ -10,14 +10,66 @@ Sync contract with models:
      bypasses Redis cache and forces a full refetch.
   4. After a successful fetch, writes profile.handles_hash() into
      UserStats.handles_hash so stale detection works next time.
+  5. Codeforces is synced incrementally from UserStats.codeforces_synced_at
+     unless handles changed (see tracker/utils/history_sync.py).
+  6. Platform responses are revalidated (tracker/utils/response_cache.py);
+     when every upstream answered "unchanged", only last_updated is written.
+  7. Concurrent refreshes of the same user share one run
+     (tracker/utils/single_flight.py).
+  8. Platforms that could not be fetched (rate limited, breaker open,
+     error) keep their stored entries and are reported in the returned
+     Refresh, so schedulers and bulk runs can retry the user.
 """
 from asgiref.sync import sync_to_async
 from tracker.models import UserStats, UserProfile
 from .async_fetchers import fetch_and_store_rating_history_async
 from .sync_fetchers import fetch_and_store_rating_history
+from . import persistence
+from .history_sync import store_history
+from .response_cache import track_revalidation
+from .single_flight import run_async, USER_LEASE
 
+PLATFORMS = ("Codeforces", "LeetCode", "CodeChef", "AtCoder")
 
-async def fetch_and_store_all(username):
+
+class Refresh:
+    """Outcome of fetch_and_store_all: the UserStats and the platforms not fetched."""
+
+    def __init__(self, user, skipped=()):
+        self.user    = user
+        self.skipped = set(skipped)
+
+    @property
+    def complete(self) -> bool:
+        return not self.skipped
+
+    @property
+    def failed(self) -> bool:
+        """Nothing was fetched — every platform was skipped or errored."""
+        return self.skipped >= set(PLATFORMS)
+
+    def __repr__(self):
+        return f"Refresh({self.user.username!r}, skipped={sorted(self.skipped)})"
+
+
+async def fetch_and_store_all(username) -> Refresh:
+    """
+    Single-flight entry point: concurrent callers for `username` await one
+    refresh. A caller in another process waits for that process's leader
+    and then reloads the stored UserStats (its Refresh reports no skips).
+    """
+    async def _remote():
+        return Refresh(await sync_to_async(UserStats.get_or_create)(username))
+
+    return await run_async(
+        f"user:{username}",
+        lambda: _fetch_and_store_all(username),
+        remote=_remote,
+        lease=USER_LEASE,
+    )
+
+
+async def _fetch_and_store_all(username):
     """
     Main entry point for fetching all platform stats for a user.
 
@@ -26,6 +78,8 @@ async def fetch_and_store_all(username):
       2. Check if handles changed — if so, force refetch bypassing cache.
       3. Try async parallel fetch; fall back to sync sequential on error.
       4. Persist results and update handles_hash.
+
+    Returns a Refresh listing the platforms that were skipped.
     """
     print(f"[coordinator] starting fetch for {username}")
 
@@ -46,41 +100,62 @@ async def fetch_and_store_all(username):
 
     print(f"[coordinator] handles — CF:{cf_handle} LC:{lc_handle} CC:{cc_handle} AC:{ac_handle}")
 
+    # Only rounds newer than what is stored need converting — unless the
+    # handles changed, in which case the stored Codeforces rounds are void.
+    cf_since = 0 if force_refetch else (user.codeforces_synced_at or 0)
+
     # ── Step 3: fetch ─────────────────────────────────────────────
-    try:
-        history, lc_solved = await fetch_and_store_rating_history_async(
-            username,
-            cf_handle=cf_handle,
-            lc_handle=lc_handle,
-            cc_handle=cc_handle,
-            ac_handle=ac_handle,
-        )
-        print(f"[coordinator] async fetch succeeded — {len(history)} entries")
-    except Exception as e:
-        print(f"[coordinator] async fetch failed ({e}), falling back to sync")
-        history, lc_solved = await sync_to_async(fetch_and_store_rating_history)(
-            username,
-            cf_handle=cf_handle,
-            lc_handle=lc_handle,
-            cc_handle=cc_handle,
-            ac_handle=ac_handle,
-        )
-        print(f"[coordinator] sync fallback succeeded — {len(history)} entries")
+    skipped = set()
+    with track_revalidation() as revalidation:
+        try:
+            history, lc_solved = await fetch_and_store_rating_history_async(
+                username,
+                cf_handle=cf_handle,
+                lc_handle=lc_handle,
+                cc_handle=cc_handle,
+                ac_handle=ac_handle,
+                cf_since=cf_since,
+                skipped=skipped,
+            )
+            print(f"[coordinator] async fetch succeeded — {len(history)} entries")
+        except Exception as e:
+            print(f"[coordinator] async fetch failed ({e}), falling back to sync")
+            skipped.clear()
+            history, lc_solved = await sync_to_async(fetch_and_store_rating_history)(
+                username,
+                cf_handle=cf_handle,
+                lc_handle=lc_handle,
+                cc_handle=cc_handle,
+                ac_handle=ac_handle,
+                cf_since=cf_since,
+                store=False,        # persisted once, with handles_hash, below
+                skipped=skipped,
+            )
+            print(f"[coordinator] sync fallback succeeded — {len(history)} entries")
+
+    # Every upstream revalidated as unchanged — what is stored is current
+    if revalidation.nothing_changed and not force_refetch:
+        # Only last_updated, so stale_while_revalidate.is_fresh() sees the check
+        await sync_to_async(persistence.update_fields)(username, {}, user, touch=True)
+        print(f"[coordinator] upstream unchanged for {username} — only last_updated written")
+        return Refresh(user, skipped)
 
     # ── Step 4: persist and update handles_hash ───────────────────
     current_hash = await sync_to_async(profile.handles_hash)()
 
     def _save():
-        u = UserStats.objects(username=username).first() or UserStats(username=username)
-        u.rating_history    = history
-        u.leetcode_solved   = lc_solved
-        u.codeforces_rating = max((h.new_rating for h in history if h.platform == "Codeforces"), default=0)
-        u.codechef_rating   = max((h.new_rating for h in history if h.platform == "CodeChef"),   default=0)
-        u.atcoder_rating    = max((h.new_rating for h in history if h.platform == "AtCoder"),    default=0)
-        u.handles_hash      = current_hash   # mark as fresh for these handles
-        u.save()
-
-    await sync_to_async(_save)()
+        # handles_hash marks the stats as fresh for these handles
+        return store_history(username, history, lc_solved,
+                             cf_since=cf_since, handles_hash=current_hash)
+
+    try:
+        await sync_to_async(_save)()
+    except Exception:
+        # Next refresh must not mistake these responses for persisted ones
+        await revalidation.aforget()
+        raise
     print(f"[coordinator] saved stats for {username}, handles_hash={current_hash[:8]}…")
+    if skipped:
+        print(f"[coordinator] {username}: not fetched — {', '.join(sorted(skipped))}")
 
-    return user
+    return Refresh(user, skipped)
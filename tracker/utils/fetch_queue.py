@@ -0,0 +1,363 @@
+# tracker/utils/fetch_queue.py
+"""
+Durable Redis job queue for fetch_and_store_all.
+
+With FETCH_QUEUE_ENABLED the web process never fetches a platform itself:
+views and the WebSocket consumer render what is stored and enqueue stale
+users (stale_while_revalidate.schedule_refresh), and
+`python manage.py fetch_worker` processes (any number, on any node) run
+the refreshes.
+
+Redis layout — one job per username, so enqueueing twice is a no-op:
+    fetchq:ready     zset  username -> earliest start (epoch s, lower = sooner)
+    fetchq:leases    zset  username -> lease deadline (visibility timeout)
+    fetchq:owner     hash  username -> worker id holding the lease
+    fetchq:attempts  hash  username -> failed attempts so far
+    fetchq:dirty     set   usernames enqueued again while leased
+    fetchq:dead      zset  username -> dead-lettered at
+    fetchq:errors    hash  username -> last error
+
+Lifecycle (every transition is one Lua script, so it is atomic across
+workers):
+  • claim   — move the most overdue ready job to leases for
+              `visibility_timeout` seconds, recording the owner.
+  • extend  — the owner heartbeats while it works; a worker that dies
+              stops heartbeating and its lease expires.
+  • ack     — success: drop the lease; if the user was enqueued again
+              meanwhile (dirty) it goes straight back to ready.
+  • fail    — and expired leases (reaped by every worker): retry after
+              backoff * 2^(attempts-1) capped at max_backoff, or move to
+              the dead letter after max_attempts. A dead user is not
+              re-enqueued by page views for `dead_cooldown` seconds.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from tracker.utils.redis_conn import get_redis, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+_READY    = "fetchq:ready"
+_LEASES   = "fetchq:leases"
+_OWNER    = "fetchq:owner"
+_ATTEMPTS = "fetchq:attempts"
+_DIRTY    = "fetchq:dirty"
+_DEAD     = "fetchq:dead"
+_ERRORS   = "fetchq:errors"
+
+_DEFAULTS = {
+    "concurrency":        4,         # jobs in flight per worker process
+    "visibility_timeout": 180,       # seconds a lease lasts without a heartbeat
+    "max_attempts":       5,
+    "backoff":            30,        # seconds before the first retry
+    "max_backoff":        3600,
+    "dead_cooldown":      3600,      # dead jobs ignore enqueue() this long
+    "poll":               1.0,       # idle seconds between claim attempts
+}
+
+
+def config() -> dict:
+    return {**_DEFAULTS, **getattr(settings, "FETCH_QUEUE", {})}
+
+
+def queue_enabled() -> bool:
+    return getattr(settings, "FETCH_QUEUE_ENABLED", False)
+
+
+# ─── Lua ──────────────────────────────────────────────────────────────────────
+
+# KEYS: ready, leases, dirty, dead   ARGV: username, score, now, dead_cooldown
+_ENQUEUE_LUA = """
+if redis.call('ZSCORE', KEYS[2], ARGV[1]) then
+  redis.call('SADD', KEYS[3], ARGV[1])
+  return 0
+end
+local dead = redis.call('ZSCORE', KEYS[4], ARGV[1])
+if dead then
+  if tonumber(ARGV[3]) - tonumber(dead) < tonumber(ARGV[4]) then return -1 end
+  redis.call('ZREM', KEYS[4], ARGV[1])
+end
+local cur = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if cur and tonumber(cur) <= tonumber(ARGV[2]) then return 0 end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+if cur then return 0 end
+return 1
+"""
+
+# KEYS: ready, leases, owner   ARGV: now, visibility, worker
+_CLAIM_LUA = """
+local job = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)[1]
+if not job then return false end
+redis.call('ZREM', KEYS[1], job)
+redis.call('ZADD', KEYS[2], tonumber(ARGV[1]) + tonumber(ARGV[2]), job)
+redis.call('HSET', KEYS[3], job, ARGV[3])
+return job
+"""
+
+# KEYS: leases, owner   ARGV: username, worker, deadline
+_EXTEND_LUA = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+return 1
+"""
+
+# KEYS: leases, owner, attempts, dirty, ready   ARGV: username, worker, now
+_ACK_LUA = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+if redis.call('SREM', KEYS[4], ARGV[1]) == 1 then
+  redis.call('ZADD', KEYS[5], ARGV[3], ARGV[1])
+end
+return 1
+"""
+
+# Shared by fail and reap: release the lease, then retry or dead-letter.
+# KEYS: leases, owner, attempts, dirty, ready, dead, errors
+_RETRY_FN = """
+local function retry(job, now, max_attempts, backoff, max_backoff, err)
+  redis.call('ZREM', KEYS[1], job)
+  redis.call('HDEL', KEYS[2], job)
+  redis.call('SREM', KEYS[4], job)
+  redis.call('HSET', KEYS[7], job, err)
+  local n = redis.call('HINCRBY', KEYS[3], job, 1)
+  if n >= max_attempts then
+    redis.call('HDEL', KEYS[3], job)
+    redis.call('ZADD', KEYS[6], now, job)
+    return 0
+  end
+  redis.call('ZADD', KEYS[5], now + math.min(backoff * 2 ^ (n - 1), max_backoff), job)
+  return n
+end
+"""
+
+# ARGV: username, worker, now, max_attempts, backoff, max_backoff, error
+_FAIL_LUA = _RETRY_FN + """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return -1 end
+return retry(ARGV[1], tonumber(ARGV[3]), tonumber(ARGV[4]),
+             tonumber(ARGV[5]), tonumber(ARGV[6]), ARGV[7])
+"""
+
+# ARGV: now, max_attempts, backoff, max_backoff
+_REAP_LUA = _RETRY_FN + """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+for _, job in ipairs(expired) do
+  retry(job, tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]),
+        tonumber(ARGV[4]), 'lease expired')
+end
+return #expired
+"""
+
+_RETRY_KEYS = [_LEASES, _OWNER, _ATTEMPTS, _DIRTY, _READY, _DEAD, _ERRORS]
+
+
+# ─── Producer side (web processes) ────────────────────────────────────────────
+
+def enqueue(username: str, priority: float = 0, delay: float = 0) -> bool:
+    """
+    Queue a refresh of `username`. Deduplicated: a queued job only moves
+    earlier, a running job is re-queued once it finishes. Returns True when
+    a new job was created. Never raises.
+    """
+    cfg = config()
+    now = time.time()
+    try:
+        added = get_redis().eval(_ENQUEUE_LUA, 4, _READY, _LEASES, _DIRTY, _DEAD,
+                                 username, now + delay - priority, now, cfg["dead_cooldown"])
+    except Exception as e:
+        logger.warning(f"fetch queue: enqueue of {username} dropped: {e}")
+        return False
+    return added == 1
+
+
+async def aenqueue(username: str, priority: float = 0, delay: float = 0) -> bool:
+    cfg = config()
+    now = time.time()
+    try:
+        added = await get_async_redis().eval(_ENQUEUE_LUA, 4, _READY, _LEASES, _DIRTY, _DEAD,
+                                             username, now + delay - priority, now,
+                                             cfg["dead_cooldown"])
+    except Exception as e:
+        logger.warning(f"fetch queue: enqueue of {username} dropped: {e}")
+        return False
+    return added == 1
+
+
+# Users waiting on a page jump ahead of background work
+VIEW_PRIORITY = 300
+
+
+# ─── Admin ────────────────────────────────────────────────────────────────────
+
+def queue_stats() -> dict:
+    """Queue depth and dead letters, for the admin metrics endpoint."""
+    now = time.time()
+    try:
+        pipe = get_redis().pipeline()
+        pipe.zcard(_READY)
+        pipe.zcount(_READY, "-inf", now)
+        pipe.zcard(_LEASES)
+        pipe.zcount(_LEASES, "-inf", now)
+        pipe.zcard(_DEAD)
+        pipe.hlen(_ATTEMPTS)
+        queued, due, leased, expired, dead, retrying = pipe.execute()
+    except Exception as e:
+        return {"error": str(e)}
+    return {"enabled": queue_enabled(), "queued": queued, "due": due, "leased": leased,
+            "expired_leases": expired, "retrying": retrying, "dead": dead}
+
+
+def dead_letters() -> list:
+    """[(username, dead_at, last_error)] oldest first."""
+    r    = get_redis()
+    dead = r.zrange(_DEAD, 0, -1, withscores=True)
+    errs = r.hmget(_ERRORS, [u for u, _ in dead]) if dead else []
+    return [(u.decode(), at, (e or b"").decode()) for (u, at), e in zip(dead, errs)]
+
+
+def requeue_dead() -> int:
+    """Move every dead-lettered job back to ready; returns how many."""
+    r     = get_redis()
+    names = [u.decode() for u in r.zrange(_DEAD, 0, -1)]
+    if names:
+        pipe = r.pipeline()
+        pipe.zrem(_DEAD, *names)
+        pipe.zadd(_READY, {u: time.time() for u in names})
+        pipe.execute()
+    return len(names)
+
+
+# ─── Worker ───────────────────────────────────────────────────────────────────
+
+class FetchWorker:
+    """
+    Runs queued jobs with up to `concurrency` in flight. Run as many
+    processes (on as many nodes) as needed — each job is leased to exactly
+    one worker at a time.
+    """
+
+    def __init__(self, concurrency: int = None, worker_id: str = None):
+        cfg              = config()
+        self.concurrency = concurrency or cfg["concurrency"]
+        self.worker_id   = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.stats       = defaultdict(int)
+        self.busy        = 0
+        self._stop       = asyncio.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    async def _claim(self, r, cfg):
+        job = await r.eval(_CLAIM_LUA, 3, _READY, _LEASES, _OWNER,
+                           time.time(), cfg["visibility_timeout"], self.worker_id)
+        return job.decode() if job else None
+
+    async def _heartbeat(self, r, cfg, username):
+        every = cfg["visibility_timeout"] / 3
+        while True:
+            await asyncio.sleep(every)
+            owned = await r.eval(_EXTEND_LUA, 2, _LEASES, _OWNER, username, self.worker_id,
+                                 time.time() + cfg["visibility_timeout"])
+            if not owned:
+                logger.warning(f"fetch worker {self.worker_id}: lost lease on {username}")
+                return
+
+    async def _process(self, r, cfg, username):
+        from tracker.utils.fetch_coordinator import fetch_and_store_all
+
+        beat = asyncio.create_task(self._heartbeat(r, cfg, username))
+        try:
+            result = await fetch_and_store_all(username)
+            if result.failed:
+                # Every platform skipped or errored — retry with backoff
+                raise RuntimeError(f"no platform fetched ({', '.join(sorted(result.skipped))})")
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"fetch job {username} failed: {e}")
+            n = await r.eval(_FAIL_LUA, len(_RETRY_KEYS), *_RETRY_KEYS,
+                             username, self.worker_id, time.time(), cfg["max_attempts"],
+                             cfg["backoff"], cfg["max_backoff"], str(e)[:500])
+            if n == 0:
+                self.stats["dead_lettered"] += 1
+                logger.error(f"fetch job {username} dead-lettered after {cfg['max_attempts']} attempts")
+            return
+        finally:
+            beat.cancel()
+
+        await r.eval(_ACK_LUA, 5, _LEASES, _OWNER, _ATTEMPTS, _DIRTY, _READY,
+                     username, self.worker_id, time.time())
+        # Views cache rendered histories without a timeout
+        await sync_to_async(cache.delete_many)([f"rating_history_{username}",
+                                                f"user_stats_{username}"])
+        self.stats["done"] += 1
+
+        from tracker.utils.stale_while_revalidate import push_refreshed
+        await push_refreshed(username)          # pages rendered stale pick it up
+
+    async def _slot(self, cfg, idle: asyncio.Event):
+        r = get_async_redis()
+        while not self._stop.is_set():
+            try:
+                username = await self._claim(r, cfg)
+            except Exception as e:
+                logger.error(f"fetch worker {self.worker_id}: claim failed: {e}")
+                username = None
+            if username is None:
+                idle.set()
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=cfg["poll"])
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            idle.clear()
+            self.busy += 1
+            try:
+                await self._process(r, cfg, username)
+            except Exception as e:
+                # Redis trouble while acking/failing — the lease expires and the reaper retries
+                logger.error(f"fetch worker {self.worker_id}: job {username} left leased: {e}")
+            finally:
+                self.busy -= 1
+
+    async def _reap(self, r, cfg) -> int:
+        n = await r.eval(_REAP_LUA, len(_RETRY_KEYS), *_RETRY_KEYS, time.time(),
+                         cfg["max_attempts"], cfg["backoff"], cfg["max_backoff"])
+        if n:
+            self.stats["reaped"] += n
+            logger.warning(f"fetch worker {self.worker_id}: requeued {n} expired leases")
+        return n
+
+    async def run(self, once: bool = False):
+        """Work until stop(); with once=True exit when nothing is due and all slots are idle."""
+        cfg   = config()
+        r     = get_async_redis()
+        idles = [asyncio.Event() for _ in range(self.concurrency)]
+        slots = [asyncio.create_task(self._slot(cfg, idle)) for idle in idles]
+        logger.info(f"fetch worker {self.worker_id} started — concurrency {self.concurrency}")
+        try:
+            while not self._stop.is_set():
+                try:
+                    await self._reap(r, cfg)
+                except Exception as e:
+                    logger.error(f"fetch worker {self.worker_id}: reap failed: {e}")
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=cfg["poll"])
+                except asyncio.TimeoutError:
+                    pass
+                if once and self.busy == 0 and all(i.is_set() for i in idles):
+                    break
+        finally:
+            self._stop.set()
+            await asyncio.gather(*slots, return_exceptions=True)
+            logger.info(f"fetch worker {self.worker_id} stopped — {dict(self.stats)}")
+        return dict(self.stats)
@@ -0,0 +1,194 @@
+# tracker/utils/history_codec.py
+"""
+Compact binary encoding of rating histories for the rating_history_<username>
+cache entries.
+
+Those entries used to hold pickled RatingHistory documents (hundreds of
+bytes each, slow to unpickle) — and StatsConsumer stored a dict of its own
+under the same key, so every reader had to guess the shape. Now every
+writer goes through store() and every reader through load():
+
+    b"RHC" | version (1 byte) | zlib(
+        "<HI"   platform count, contest-name count
+        "<I"*n  contest-name byte lengths, then the UTF-8 names  (interned)
+        per platform:
+            "<HI" name length, entry count, then the name
+            six little-endian columns of that many values:
+            contest index (uint32), date (int64 epoch seconds, UTC),
+            new_rating, old_rating, rank, change (int32)
+    )
+
+None is stored as the column's minimum value (contest: 0xFFFFFFFF).
+Dates keep whole seconds. Decoded histories come back oldest first, like
+history_store.load().
+
+load() treats anything else under the key (a legacy pickle, another
+version) as a miss, so old entries are replaced on the next refresh.
+"""
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+
+from tracker.models import RatingHistory
+
+MAGIC   = b"RHC"
+VERSION = 1
+
+_EPOCH     = datetime(1970, 1, 1)
+_NO_DATE   = -2 ** 63
+_NO_INT    = -2 ** 31
+_NO_NAME   = 2 ** 32 - 1
+_INTS      = ("new_rating", "old_rating", "rank", "change")
+_SWAP      = sys.byteorder == "big"
+
+
+class CodecError(ValueError):
+    pass
+
+
+def cache_key(username: str) -> str:
+    return f"rating_history_{username}"
+
+
+# ─── Codec ────────────────────────────────────────────────────────────────────
+
+def _get(entry, field):
+    return entry.get(field) if isinstance(entry, dict) else getattr(entry, field, None)
+
+
+def _seconds(date):
+    if date is None:
+        return _NO_DATE
+    if isinstance(date, str):
+        date = datetime.fromisoformat(date)
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return (date - _EPOCH) // timedelta(seconds=1)
+
+
+def _int(value):
+    return _NO_INT if value is None else int(value)
+
+
+def _column(typecode, values) -> bytes:
+    col = array(typecode, values)
+    if _SWAP:
+        col.byteswap()
+    return col.tobytes()
+
+
+def encode(history, level: int = 1) -> bytes:
+    """RatingHistory documents or their dicts (date as datetime or ISO string) → bytes."""
+    names, platforms = {}, {}
+    for entry in history:
+        platforms.setdefault(_get(entry, "platform") or "", []).append(entry)
+        contest = _get(entry, "contest")
+        if contest is not None:
+            names.setdefault(contest, len(names))
+
+    encoded = [n.encode("utf-8") for n in names]
+    parts   = [struct.pack("<HI", len(platforms), len(encoded)),
+               _column("I", map(len, encoded)), *encoded]
+    for platform, entries in platforms.items():
+        name = platform.encode("utf-8")
+        parts += [struct.pack("<HI", len(name), len(entries)), name,
+                  _column("I", (_NO_NAME if _get(e, "contest") is None else names[_get(e, "contest")]
+                                for e in entries)),
+                  _column("q", (_seconds(_get(e, "date")) for e in entries))]
+        parts += [_column("i", (_int(_get(e, f)) for e in entries)) for f in _INTS]
+    return MAGIC + bytes([VERSION]) + zlib.compress(b"".join(parts), level)
+
+
+def _read(typecode, body, offset, n):
+    col = array(typecode)
+    end = offset + n * col.itemsize
+    col.frombytes(body[offset:end])
+    if _SWAP:
+        col.byteswap()
+    return col, end
+
+
+def _columns(data: bytes):
+    """Yield (platform, contests, dates, {int field: column}) per platform."""
+    if not isinstance(data, (bytes, bytearray)) or data[:3] != MAGIC:
+        raise CodecError("not an encoded rating history")
+    if data[3] != VERSION:
+        raise CodecError(f"unsupported rating history encoding v{data[3]}")
+    try:
+        body = zlib.decompress(data[4:])
+        n_platforms, n_names = struct.unpack_from("<HI", body)
+        lengths, offset = _read("I", body, 6, n_names)
+        names = []
+        for length in lengths:
+            names.append(body[offset:offset + length].decode("utf-8"))
+            offset += length
+        for _ in range(n_platforms):
+            name_len, n = struct.unpack_from("<HI", body, offset)
+            offset  += 6
+            platform = body[offset:offset + name_len].decode("utf-8")
+            offset  += name_len
+            idx, offset   = _read("I", body, offset, n)
+            dates, offset = _read("q", body, offset, n)
+            ints = {}
+            for field in _INTS:
+                ints[field], offset = _read("i", body, offset, n)
+            contests = [None if i == _NO_NAME else names[i] for i in idx]
+            yield platform, contests, dates, ints
+    except (zlib.error, struct.error, IndexError, UnicodeDecodeError) as e:
+        raise CodecError(f"corrupt rating history: {e}") from e
+
+
+def _date(seconds):
+    return None if seconds == _NO_DATE else _EPOCH + timedelta(seconds=seconds)
+
+
+def _rows(data):
+    rows = []
+    for platform, contests, dates, ints in _columns(data):
+        cols = [[None if v == _NO_INT else v for v in ints[f]] for f in _INTS]
+        rows += zip([platform] * len(contests), contests, map(_date, dates), *cols)
+    rows.sort(key=lambda r: r[2] or _EPOCH)
+    return rows
+
+
+def decode_dicts(data: bytes, iso_dates: bool = True) -> list:
+    """
+    bytes → dicts shaped like RatingHistory.to_dict() (iso_dates=True) or
+    RatingHistory.to_mongo().to_dict() without _id (iso_dates=False).
+    """
+    return [{"platform": p, "contest": c, "old_rating": old, "new_rating": new,
+             "date": (d.isoformat() if d else None) if iso_dates else d,
+             "rank": rank, "change": change}
+            for p, c, d, new, old, rank, change in _rows(data)]
+
+
+def decode(data: bytes) -> list:
+    """bytes → RatingHistory documents, oldest first."""
+    return [RatingHistory(platform=p, contest=c, date=d, new_rating=new,
+                          old_rating=old, rank=rank, change=change)
+            for p, c, d, new, old, rank, change in _rows(data)]
+
+
+# ─── Cache ────────────────────────────────────────────────────────────────────
+
+def store(username: str, history, timeout=None):
+    cache.set(cache_key(username), encode(history), timeout=timeout)
+
+
+def load(username: str, dicts: bool = False):
+    """
+    Cached history of `username` — RatingHistory documents, or
+    RatingHistory.to_dict() dicts (much cheaper to build) with dicts=True.
+    None when missing or unreadable.
+    """
+    data = cache.get(cache_key(username))
+    if data is None:
+        return None
+    try:
+        return decode_dicts(data) if dicts else decode(data)
+    except CodecError:
+        return None
@@ -0,0 +1,105 @@
+# tracker/utils/history_merge.py
+"""
+Keyed merge of a fetched rating history into the stored one.
+
+Entries are identified by (platform, contest, date). diff() compares a
+fetch against what rating_entries holds and returns only what changed:
+
+  • inserted — keys the fetch has and storage does not
+  • updated  — same key, different rank / ratings / change
+  • removed  — stored keys the fetch no longer has (and repeated keys)
+
+history_store.apply_diff() writes exactly that — one bulk_write and one
+insert_many — so a re-sync of an unchanged history writes nothing and a
+new contest writes one document.
+
+A platform whose fetch came back empty while entries are stored is kept
+as it is (HistoryDiff.kept): an upstream error or a scraper that found
+nothing must not wipe the history. Only an authoritative fetch (the
+handles changed, so the stored entries belong to another account) may
+empty a platform. Fetch errors the fetchers can see are handled earlier:
+the platform is marked skipped and its stored entries reused
+(async_fetchers._or_stored, sync_fetchers._or_stored).
+"""
+from collections import OrderedDict
+from datetime import datetime
+
+_VALUES = ("rank", "old_rating", "new_rating", "change")
+
+
+def key(h) -> tuple:
+    return h.platform, h.contest, h.date
+
+
+def _values(h) -> tuple:
+    return tuple(getattr(h, f) for f in _VALUES)
+
+
+class HistoryDiff:
+    def __init__(self, inserted=None, updated=None, removed=None, kept=None):
+        self.inserted = inserted or []     # fetched entries to add
+        self.updated  = updated or []      # fetched entries replacing a stored one
+        self.removed  = removed or []      # stored entries to delete
+        self.kept     = kept or set()      # platforms left untouched (empty fetch)
+
+    def __bool__(self):
+        return bool(self.inserted or self.updated or self.removed)
+
+    @property
+    def platforms(self) -> set:
+        return {h.platform for h in self.inserted + self.updated + self.removed}
+
+    def summary(self) -> str:
+        if not self:
+            return "no change"
+        out = f"+{len(self.inserted)} ~{len(self.updated)} -{len(self.removed)}"
+        return out + (f" (kept {', '.join(sorted(self.kept))})" if self.kept else "")
+
+
+def _index(entries):
+    """key -> entry (last one wins), and the keys that occur more than once."""
+    index, repeated = OrderedDict(), set()
+    for h in entries:
+        k = key(h)
+        if k in index:
+            repeated.add(k)
+        index[k] = h
+    return index, repeated
+
+
+def diff(stored, fetched, authoritative=False) -> HistoryDiff:
+    """
+    Changes that turn `stored` into `fetched`. Unless `authoritative`, a
+    platform with stored entries but none fetched is kept unchanged.
+
+    A key stored more than once is removed as a whole and, if still
+    fetched, inserted again — apply_diff deletes before it inserts.
+    """
+    fetched_platforms = {h.platform for h in fetched}
+    kept = set() if authoritative else {h.platform for h in stored} - fetched_platforms
+    have, repeated = _index(h for h in stored if h.platform not in kept)
+    want, _ = _index(fetched)
+
+    out = HistoryDiff(kept=kept)
+    for k, h in want.items():
+        old = have.get(k)
+        if old is None or k in repeated:
+            out.inserted.append(h)
+        elif _values(old) != _values(h):
+            out.updated.append(h)
+    out.removed = [h for k, h in have.items() if k not in want or k in repeated]
+    return out
+
+
+def merged(stored, changes: HistoryDiff) -> list:
+    """`stored` with `changes` applied — the history as now stored, oldest first."""
+    gone = {key(h) for h in changes.removed} | {key(h) for h in changes.updated}
+    out, seen = [], set()
+    for h in stored:
+        k = key(h)
+        if k in gone or k in seen:
+            continue
+        seen.add(k)
+        out.append(h)
+    out += changes.updated + changes.inserted
+    return sorted(out, key=lambda h: h.date or datetime.min)
@@ -0,0 +1,145 @@
+# tracker/utils/history_store.py
+"""
+Rating history storage — the rating_entries collection (RatingEntry).
+
+History used to be the embedded UserStats.rating_history list: every
+refresh loaded and re-saved all of it, and every UserStats read dragged
+it along. Now each contest result is its own document, indexed on
+(username, platform, date):
+
+  • readers ask for the slice they need — a platform, a date range, the
+    newest N — and get RatingHistory values as before;
+  • writers apply only the keyed diff of a fetch against what is stored —
+    inserted, updated and removed entries (apply_diff, computed by
+    tracker/utils/history_merge.py from tracker/utils/history_sync.py).
+
+Legacy embedded lists are moved out by `python manage.py
+migrate_rating_history`; a user the command has not reached yet is
+migrated on the first read that finds no entries for them.
+"""
+import logging
+
+from pymongo import DeleteMany, UpdateOne
+
+from tracker.models import RatingEntry, RatingHistory, UserStats
+
+logger = logging.getLogger(__name__)
+
+
+# ─── Reads ────────────────────────────────────────────────────────────────────
+
+def load(username, platforms=None, since=None, until=None) -> list:
+    """RatingHistory of `username`, oldest first, optionally sliced."""
+    qs  = RatingEntry.objects.of(username, platforms).between(since, until)
+    out = qs.histories()
+    if not out and migrate_user(username):
+        out = qs.histories()
+    return out
+
+
+def latest(username, n, platforms=None) -> list:
+    """The newest n RatingHistory entries, newest first."""
+    qs = RatingEntry.objects.of(username, platforms)
+    out = [e.to_history() for e in qs.latest(n)]
+    if not out and migrate_user(username):
+        out = [e.to_history() for e in qs.latest(n)]
+    return out
+
+
+def users_with(platform, contests=None, usernames=None) -> set:
+    """Usernames with an entry on `platform` (for one of `contests`, among `usernames`)."""
+    qs = RatingEntry.objects(platform=platform)
+    if contests is not None:
+        qs = qs.filter(contest__in=list(contests))
+    if usernames is not None:
+        qs = qs.filter(username__in=list(usernames))
+    return set(qs.distinct("username"))
+
+
+# ─── Writes ───────────────────────────────────────────────────────────────────
+
+def _docs(username, entries):
+    return [RatingEntry.from_history(username, h).to_mongo() for h in entries]
+
+
+def append(username, entries):
+    if entries:
+        RatingEntry._get_collection().insert_many(_docs(username, entries), ordered=False)
+
+
+def append_many(entries: dict):
+    """Append {username: RatingHistory} in one insert."""
+    docs = [RatingEntry.from_history(u, h).to_mongo() for u, h in entries.items()]
+    if docs:
+        RatingEntry._get_collection().insert_many(docs, ordered=False)
+
+
+def replace(username, entries, platforms=None):
+    """Replace `username`'s entries (only those on `platforms`, if given)."""
+    RatingEntry.objects.of(username, platforms).delete()
+    append(username, entries)
+
+
+def _match(username, h) -> dict:
+    return {"username": username, "platform": h.platform, "contest": h.contest, "date": h.date}
+
+
+def apply_diff(username, changes) -> int:
+    """
+    Write a history_merge.HistoryDiff: one unordered bulk_write updating
+    and deleting by (platform, contest, date), then one insert_many.
+    Returns the number of operations issued.
+    """
+    ops  = [UpdateOne(_match(username, h), {"$set": {f: getattr(h, f) for f in RatingEntry._FIELDS}})
+            for h in changes.updated]
+    ops += [DeleteMany(_match(username, h)) for h in changes.removed]
+    if ops:
+        RatingEntry._get_collection().bulk_write(ops, ordered=False)
+    append(username, changes.inserted)
+    return len(ops) + len(changes.inserted)
+
+
+def delete_user(username):
+    RatingEntry.objects(username=username).delete()
+
+
+# ─── Migration from the embedded list ─────────────────────────────────────────
+
+def _key(h):
+    return (h.platform, h.contest, h.date, h.rank, h.old_rating, h.new_rating, h.change)
+
+
+def migrate_user(username) -> int:
+    """
+    Move `username`'s embedded rating_history into rating_entries and
+    unset it. Returns how many entries were moved (0 when nothing was
+    embedded). Entries already in the collection are not duplicated.
+    """
+    stats = UserStats._get_collection()
+    # Unsetting first claims the list — a concurrent migration finds nothing
+    doc = stats.find_one_and_update(
+        {"username": username, "rating_history.0": {"$exists": True}},
+        {"$unset": {"rating_history": ""}},
+        projection={"rating_history": 1},
+    )
+    if not doc:
+        return 0
+    embedded = [RatingHistory._from_son(e) for e in doc["rating_history"]]
+    try:
+        have = {_key(h) for h in RatingEntry.objects.of(username).histories()}
+        new  = [h for h in embedded if _key(h) not in have]
+        append(username, new)
+    except Exception:
+        stats.update_one({"username": username, "rating_history": {"$exists": False}},
+                         {"$set": {"rating_history": doc["rating_history"]}})
+        raise
+    logger.info(f"rating history of {username}: {len(new)} entries moved to rating_entries")
+    return len(new)
+
+
+def unmigrated(batch: int = 500):
+    """Usernames that still have an embedded rating_history, in batches."""
+    cursor = UserStats._get_collection().find(
+        {"rating_history.0": {"$exists": True}}, {"username": 1}).batch_size(batch)
+    for doc in cursor:
+        yield doc["username"]
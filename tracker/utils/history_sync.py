@@ -0,0 +1,134 @@
+# tracker/utils/history_sync.py
+"""
+Incremental persistence of rating history.
+
+Codeforces user.rating always returns every rated round a handle has ever
+played. Instead of converting all of them and rewriting the user's whole
+rating history on each refresh:
+
+  • UserStats.codeforces_synced_at remembers the newest
+    ratingUpdateTimeSeconds already stored,
+  • only rounds newer than that are converted (codeforces_entries),
+  • when nothing changed only last_updated is written, so the stats
+    still count as freshly checked (stale_while_revalidate.is_fresh).
+
+Every fetch is merged into rating_entries by (platform, contest, date)
+(tracker/utils/history_merge.py): only inserted, updated and removed
+entries are written, whatever the platform and whether the sync is
+incremental or full (cf_since == 0). A platform that came back empty —
+a failed fetch, a scraper that found nothing — keeps what is stored;
+only a handle change lets a fetch empty a platform.
+
+Summary fields are written through tracker/utils/persistence.py — only
+the ones that changed — and skipped writes are counted there per `kind`.
+
+Every write re-caches the merged history under rating_history_<username>
+(tracker/utils/history_codec.py) and publishes a "stats updated" event
+with the changed summary fields and the inserted, updated and removed
+entries (tracker/utils/stats_events.py).
+"""
+from datetime import datetime
+
+from tracker.models import UserStats, RatingHistory
+from tracker.utils import history_codec, history_merge, history_store, persistence
+from tracker.utils.analytics import peaks
+from tracker.utils.stats_events import SUMMARY_FIELDS, changed_fields, publish, summary_of
+
+CF = "Codeforces"
+
+
+def codeforces_entries(cf_data, since=0):
+    """
+    Convert Codeforces user.rating results newer than `since`
+    (ratingUpdateTimeSeconds) into RatingHistory entries.
+    """
+    entries = []
+    for e in cf_data:
+        try:
+            if e["ratingUpdateTimeSeconds"] <= since:
+                continue
+            dt = datetime.fromtimestamp(e["ratingUpdateTimeSeconds"])
+            entries.append(RatingHistory(
+                platform=CF, contest=e["contestName"],
+                rank=e["rank"], old_rating=e["oldRating"], new_rating=e["newRating"],
+                date=dt, change=e["newRating"] - e["oldRating"]
+            ))
+        except (KeyError, ValueError, TypeError):
+            pass
+    return entries
+
+
+def _codec_ttl():
+    from tracker.utils.stale_while_revalidate import config
+    return config()["max_age"]
+
+
+def store_history(username, history, lc_solved, cf_since=0, handles_hash=None, kind="refresh"):
+    """
+    Persist a freshly fetched history for `username`.
+
+    `history` holds the full fetch for every platform except Codeforces,
+    which only contains rounds newer than cf_since when cf_since > 0.
+    Only the keyed diff against rating_entries is written; a platform
+    with nothing fetched keeps its stored entries unless the handles
+    changed (handles_hash differs from the stored one).
+
+    Returns (merged_history, wrote) — merged_history is the complete list
+    as now stored, wrote is False when nothing but last_updated was
+    written. `kind`
+    labels the write in the persistence counters.
+    """
+    stored = history_store.load(username)
+    stats  = (UserStats.objects(username=username)
+              .only("username", "codeforces_synced_at", "handles_hash", *SUMMARY_FIELDS).first())
+    before = summary_of(stats)
+
+    cf_new = [h for h in history if h.platform == CF]
+    fresh  = [h for h in history if h.platform != CF]
+
+    if cf_since and stats:
+        stored_cf = [h for h in stored if h.platform == CF]
+        # Entries re-served from storage (rate-limited fetch) are not new
+        seen   = {history_merge.key(h) for h in stored_cf}
+        cf_new = [h for h in cf_new if history_merge.key(h) not in seen]
+        fetched = stored_cf + cf_new + fresh
+        newest  = max([cf_since] + [int(h.date.timestamp()) for h in cf_new])
+    else:
+        fetched = cf_new + fresh
+        newest  = max([0] + [int(h.date.timestamp()) for h in cf_new])
+
+    authoritative = stats is None or (handles_hash is not None and stats.handles_hash != handles_hash)
+    changes = history_merge.diff(stored, fetched, authoritative)
+    merged  = history_merge.merged(stored, changes)
+    if CF in changes.kept:
+        newest = max(newest, stats.codeforces_synced_at or 0)
+
+    peak   = peaks(merged)
+    fields = {
+        "leetcode_solved":      lc_solved or 0,
+        "codeforces_rating":    peak.get(CF, 0),
+        "codechef_rating":      peak.get("CodeChef", 0),
+        "atcoder_rating":       peak.get("AtCoder", 0),
+        "codeforces_synced_at": newest,
+    }
+    if handles_hash is not None:
+        fields["handles_hash"] = handles_hash
+
+    if stats is None:
+        UserStats(username=username, **fields).save()
+        persistence.record(kind, written=1, fields=len(fields))
+    elif not changes and not persistence.changed(stats, fields):
+        # Nothing new, but the stats were just checked — keep is_fresh() true
+        persistence.update_fields(username, {}, stats, kind=kind, touch=True)
+        print(f"[history] {username}: unchanged — only last_updated written")
+        return merged, False
+    else:
+        persistence.update_fields(username, fields, stats, kind=kind, touch=True)
+
+    history_store.apply_diff(username, changes)
+    # Views serve rating_history_<username> without checking freshness
+    history_codec.store(username, merged, timeout=_codec_ttl())
+    print(f"[history] {username}: {changes.summary()}")
+    publish(username, changed_fields(before, fields),
+            changes.inserted, changes.updated, changes.removed)
+    return merged, True
@@ -0,0 +1,227 @@
+# tracker/utils/http_clients.py
+"""
+Process-wide pooled HTTP clients shared by every platform fetcher.
+
+  • Async: one aiohttp.ClientSession per running event loop. Sessions are
+    loop-bound, so daphne's main loop, asyncio.run() in sync views and the
+    short-lived loops behind async_to_sync each get their own.
+  • Sync:  one requests.Session with a mounted keep-alive pool.
+
+Both keep per-host connection pools alive between refreshes, so repeat
+fetches to codeforces.com, leetcode.com, codechef.com and atcoder.jp skip
+DNS, TCP and TLS setup. The async connector also caches DNS answers for
+HTTP_DNS_TTL seconds.
+
+Async pooling only pays off on long-lived loops (daphne's, a worker's).
+A session bound to a short-lived loop (asyncio.run, async_to_sync outside
+ASGI) dies with it: the next get_async_session() closes its sockets and
+the next loop starts a new pool.
+
+Fetchers BORROW these clients — never close them or use them as a context
+manager. Shutdown happens once through close_all(), called from the ASGI
+lifespan handler (tracker/lifespan.py); the sync session is also closed
+atexit because daphne does not emit lifespan events.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+import weakref
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_async_sessions = weakref.WeakKeyDictionary()   # loop -> ClientSession
+_sync_session   = None
+_lock           = threading.Lock()
+
+# Per-host usage counters, filled by aiohttp trace hooks and requests hooks
+_host_stats = defaultdict(lambda: defaultdict(int))
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ─── Async (aiohttp) ──────────────────────────────────────────────────────────
+
+def _trace_config() -> aiohttp.TraceConfig:
+    """Count requests, new vs reused connections and DNS cache hits per host."""
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params):
+        ctx.host = params.url.host
+        _host_stats[ctx.host]["async_requests"] += 1
+
+    async def on_connection_create_end(session, ctx, params):
+        _host_stats[getattr(ctx, "host", "?")]["async_new_connections"] += 1
+
+    async def on_connection_reuseconn(session, ctx, params):
+        _host_stats[getattr(ctx, "host", "?")]["async_reused_connections"] += 1
+
+    async def on_dns_cache_hit(session, ctx, params):
+        _host_stats[params.host]["dns_cache_hits"] += 1
+
+    async def on_dns_cache_miss(session, ctx, params):
+        _host_stats[params.host]["dns_cache_misses"] += 1
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace.on_dns_cache_hit.append(on_dns_cache_hit)
+    trace.on_dns_cache_miss.append(on_dns_cache_miss)
+    return trace
+
+
+def _new_async_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=_setting("HTTP_POOL_LIMIT", 100),
+        limit_per_host=_setting("HTTP_POOL_LIMIT_PER_HOST", 10),
+        ttl_dns_cache=_setting("HTTP_DNS_TTL", 300),
+        keepalive_timeout=_setting("HTTP_KEEPALIVE_TIMEOUT", 30),
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=15),
+        trace_configs=[_trace_config()],
+    )
+
+
+def _close_dead_session(session):
+    """
+    Release the sockets of a session whose event loop is closed. The loop
+    can no longer run transport.close(), so each pooled socket is closed
+    directly before the connector drops its pools.
+    """
+    connector = session.connector
+    if connector is not None:
+        protocols = [proto for conns in connector._conns.values() for proto, _ in conns]
+        for proto in protocols + list(connector._acquired):
+            transport = proto.transport
+            sock = transport.get_extra_info("socket") if transport is not None else None
+            if sock is None:
+                continue
+            try:
+                getattr(sock, "_sock", sock).close()   # asyncio wraps it in a TransportSocket
+            except OSError:
+                pass
+        connector._close()
+    session.detach()
+
+
+def _discard_dead_sessions():
+    """Drop sessions whose event loop has already been closed, closing their sockets."""
+    for loop in [l for l in list(_async_sessions.keys()) if l.is_closed()]:
+        session = _async_sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            _close_dead_session(session)
+
+
+def get_async_session() -> aiohttp.ClientSession:
+    """Return the pooled aiohttp session for the running event loop."""
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        _discard_dead_sessions()
+        session = _new_async_session()
+        _async_sessions[loop] = session
+        logger.debug(f"http_clients: new aiohttp session for loop {id(loop):x}")
+    return session
+
+
+# ─── Sync (requests) ──────────────────────────────────────────────────────────
+
+def _count_sync_response(response, *args, **kwargs):
+    _host_stats[urlsplit(response.url).hostname]["sync_requests"] += 1
+
+
+def get_sync_session() -> requests.Session:
+    """Return the process-wide requests session (thread-safe connection pool)."""
+    global _sync_session
+    if _sync_session is None:
+        with _lock:
+            if _sync_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=_setting("HTTP_POOL_HOSTS", 16),
+                    pool_maxsize=_setting("HTTP_POOL_LIMIT_PER_HOST", 10),
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.hooks["response"].append(_count_sync_response)
+                _sync_session = session
+    return _sync_session
+
+
+def close_sync_session():
+    global _sync_session
+    with _lock:
+        if _sync_session is not None:
+            _sync_session.close()
+            _sync_session = None
+
+
+# ─── Shutdown & stats ─────────────────────────────────────────────────────────
+
+async def close_all():
+    """Close the session for the running loop and the sync session."""
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
+    _discard_dead_sessions()
+    close_sync_session()
+    logger.info("http_clients: pooled sessions closed")
+
+
+atexit.register(close_sync_session)
+
+
+def pool_stats() -> dict:
+    """
+    Snapshot of pool usage for the admin metrics endpoint:
+      hosts  — per-host request / connection / DNS counters
+      async  — one entry per live aiohttp session (acquired vs idle sockets)
+      sync   — one entry per urllib3 host pool (free_slots includes unopened slots)
+    """
+    async_pools = []
+    for loop, session in list(_async_sessions.items()):
+        connector = session.connector
+        if connector is None:
+            continue
+        async_pools.append({
+            "loop":           f"{id(loop):x}",
+            "closed":         session.closed,
+            "limit":          connector.limit,
+            "limit_per_host": connector.limit_per_host,
+            "acquired":       len(getattr(connector, "_acquired", ())),
+            "idle":           sum(len(c) for c in getattr(connector, "_conns", {}).values()),
+        })
+
+    sync_pools = []
+    if _sync_session is not None:
+        adapter = _sync_session.get_adapter("https://")
+        pools   = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            sync_pools.append({
+                "host":            pool.host,
+                "connections_made": pool.num_connections,
+                "requests":        pool.num_requests,
+                "free_slots":      pool.pool.qsize() if pool.pool else 0,
+                "maxsize":         pool.pool.maxsize if pool.pool else 0,
+            })
+
+    return {
+        "hosts": {host: dict(counters) for host, counters in _host_stats.items()},
+        "async": async_pools,
+        "sync":  sync_pools,
+    }
@@ -0,0 +1,148 @@
+# tracker/utils/leaderboard.py
+"""
+Leaderboard scoring and the materialized leaderboard collection.
+
+Rows are precomputed into LeaderboardEntry (collection "leaderboard")
+instead of scanning every UserStats on each request:
+
+  • sync_rows(usernames) recomputes the rows of the given users from
+    UserStats / UserProfile — upserting visible ones, deleting the rest.
+    stats_events.mark_leaderboard() calls it whenever a writer changed a
+    leaderboard field, and the profile view when show_on_leaderboard
+    flips.
+  • page() is the read path: one indexed, paginated query sorted by score
+    or by a platform column.
+  • rank_of() counts higher scores through the same index, for the live
+    rank updates pushed to LeaderboardConsumer (tracker/utils/stats_events.py).
+  • rebuild() recomputes everything (`python manage.py rebuild_leaderboard`).
+"""
+import math
+from datetime import datetime
+
+from pymongo import DeleteOne, UpdateOne
+
+from tracker.models import LeaderboardEntry, UserProfile, UserStats
+
+# Weighted sum of the summary fields shown on the leaderboard
+WEIGHTS = {
+    "codeforces_rating": 0.35,
+    "leetcode_solved":   0.15,
+    "codechef_rating":   0.25,
+    "atcoder_rating":    0.25,
+}
+
+SORTABLE = ("total_score", *WEIGHTS)
+PER_PAGE = 10
+MAX_PER_PAGE = 100
+
+
+def leaderboard_row(stats):
+    """Leaderboard row for one UserStats, or None for a placeholder with no ratings."""
+    values = {field: getattr(stats, field, 0) or 0 for field in WEIGHTS}
+    if not any(values.values()):
+        return None
+    total = round(sum(float(values[f]) * w for f, w in WEIGHTS.items()), 1)
+    return {"username": stats.username, **values, "total_score": total}
+
+
+def _opted_out(usernames=None) -> set:
+    """Only explicit opt-outs are hidden."""
+    qs = UserProfile.objects(show_on_leaderboard=False)
+    if usernames is not None:
+        qs = qs.filter(username__in=list(usernames))
+    return {p.username for p in qs.only("username")}
+
+
+def leaderboard_rows():
+    """Visible rows computed from UserStats, best first (full scan — see rebuild())."""
+    opted_out = _opted_out()
+    rows = [row for row in map(leaderboard_row, UserStats.objects.only("username", *WEIGHTS))
+            if row and row["username"] not in opted_out]
+    rows.sort(key=lambda x: x["total_score"], reverse=True)
+    return rows
+
+
+# ─── Maintenance ──────────────────────────────────────────────────────────────
+
+def _upsert(row, now):
+    return UpdateOne({"username": row["username"]},
+                     {"$set": {**row, "updated_at": now}}, upsert=True)
+
+
+def sync_rows(usernames) -> dict:
+    """
+    Recompute the materialized rows of `usernames`.
+    Returns {username: row} for the users now visible.
+    """
+    usernames = list(set(usernames))
+    if not usernames:
+        return {}
+    opted_out = _opted_out(usernames)
+    rows = {}
+    for stats in UserStats.objects(username__in=usernames).only("username", *WEIGHTS):
+        row = leaderboard_row(stats)
+        if row and stats.username not in opted_out:
+            rows[stats.username] = row
+    now = datetime.utcnow()
+    ops = [_upsert(row, now) for row in rows.values()]
+    ops += [DeleteOne({"username": u}) for u in usernames if u not in rows]
+    LeaderboardEntry._get_collection().bulk_write(ops, ordered=False)
+    return rows
+
+
+def rebuild() -> int:
+    """Recompute every row from UserStats; returns the number of visible rows."""
+    rows = leaderboard_rows()
+    coll = LeaderboardEntry._get_collection()
+    now  = datetime.utcnow()
+    for i in range(0, len(rows), 1000):
+        coll.bulk_write([_upsert(row, now) for row in rows[i:i + 1000]], ordered=False)
+    coll.delete_many({"username": {"$nin": [row["username"] for row in rows]}})
+    return len(rows)
+
+
+def ensure_built():
+    """Populate the collection on first use after deploying it."""
+    if LeaderboardEntry.objects.only("id").first() is None and UserStats.objects.only("id").first():
+        rebuild()
+
+
+# ─── Reads ────────────────────────────────────────────────────────────────────
+
+def rank_of(total_score: float) -> int:
+    """1 + number of visible users with a strictly higher score."""
+    return LeaderboardEntry.objects(total_score__gt=total_score).count() + 1
+
+
+def page(number=1, per_page=PER_PAGE, sort="total_score", ascending=False, query="") -> dict:
+    """
+    One page of the leaderboard: {"rows", "page", "pages", "total", "sort"}.
+    Every row carries its overall score rank.
+    """
+    sort     = sort if sort in SORTABLE else "total_score"
+    per_page = max(1, min(int(per_page or PER_PAGE), MAX_PER_PAGE))
+    qs       = LeaderboardEntry.objects
+    if query:
+        qs = qs.filter(username__icontains=query)
+    total  = qs.count()
+    pages  = max(1, math.ceil(total / per_page))
+    number = max(1, min(int(number or 1), pages))
+    order  = ("" if ascending else "-") + sort
+    docs   = list(qs.order_by(order, "username").skip((number - 1) * per_page).limit(per_page))
+
+    # Competition ranking (ties share a rank). Sorted by score, only the
+    # first row of the page needs a count — the rest follow from it.
+    by_score = sort == "total_score" and not ascending and not query
+    rows, prev = [], None
+    for i, doc in enumerate(docs):
+        row = doc.to_row()
+        if prev and prev["total_score"] == row["total_score"]:
+            row["rank"] = prev["rank"]
+        elif by_score and prev:
+            row["rank"] = (number - 1) * per_page + i + 1
+        else:
+            row["rank"] = rank_of(row["total_score"])
+        rows.append(row)
+        prev = row if sort == "total_score" else None
+    return {"rows": rows, "page": number, "pages": pages, "total": total, "sort": sort,
+            "ascending": ascending}
@@ -1,5 +1,5 @@
-import requests
 from django.core.cache import cache
+from tracker.utils.http_clients import get_sync_session
 
 def fetch_leetcode_stats(username):
     """Fetch LeetCode solved problems count using API with caching."""
@@ -10,7 +10,7 @@ def fetch_leetcode_stats(username):
     
     url = f"https://leetcode-stats-api.herokuapp.com/{username}"
     try:
-        response = requests.get(url, timeout=5)
+        response = get_sync_session().get(url, timeout=5)
         response.raise_for_status()
         data = response.json()
         solved = data.get("totalSolved", 0)
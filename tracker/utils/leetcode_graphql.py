@@ -0,0 +1,157 @@
+# tracker/utils/leetcode_graphql.py
+"""
+LeetCode GraphQL documents and parsing shared by the async and sync fetchers.
+
+One document selects both matchedUser.submitStats (solved count) and
+userContestRankingHistory, so a profile refresh is a single POST.
+
+For bulk refreshes, batch_query() aliases the same two selections for many
+handles (u0/h0, u1/h1, …) into one document. LeetCode answers a missing
+user with a per-field error and a null under that alias, so one bad handle
+does not fail the rest of the batch.
+"""
+import json
+from datetime import datetime
+
+from tracker.utils.http_clients import get_async_session, get_sync_session
+from tracker.utils.rate_limiter import acquire, acquire_async
+
+LEETCODE_GRAPHQL = "https://leetcode.com/graphql/"
+LC_BATCH         = 20      # handles per aliased POST
+
+_SOLVED  = "submitStats: submitStatsGlobal { acSubmissionNum { difficulty count } }"
+_HISTORY = "attended rating ranking contest { title startTime }"
+
+PROFILE_QUERY = f"""query userProfileAndContests($username: String!) {{
+    matchedUser(username: $username) {{ {_SOLVED} }}
+    userContestRankingHistory(username: $username) {{ {_HISTORY} }}
+}}"""
+
+
+def headers(handle=""):
+    return {
+        "Content-Type": "application/json",
+        "Referer": f"https://leetcode.com/{handle}/" if handle else "https://leetcode.com/",
+        "User-Agent": "Mozilla/5.0",
+    }
+
+
+def profile_query(handle):
+    return {
+        "operationName": "userProfileAndContests",
+        "query": PROFILE_QUERY,
+        "variables": {"username": handle},
+    }
+
+
+def batch_query(handles):
+    """One document with a u<i>/h<i> alias pair per handle."""
+    params = ", ".join(f"$n{i}: String!" for i in range(len(handles)))
+    fields = "\n".join(
+        f"    u{i}: matchedUser(username: $n{i}) {{ {_SOLVED} }}\n"
+        f"    h{i}: userContestRankingHistory(username: $n{i}) {{ {_HISTORY} }}"
+        for i in range(len(handles))
+    )
+    return {
+        "operationName": "userProfilesBatch",
+        "query": f"query userProfilesBatch({params}) {{\n{fields}\n}}",
+        "variables": {f"n{i}": h for i, h in enumerate(handles)},
+    }
+
+
+# ─── Parsing ──────────────────────────────────────────────────────────────────
+
+def parse_solved(matched_user):
+    if not matched_user:
+        return 0
+    all_entry = next(
+        (i for i in matched_user["submitStats"]["acSubmissionNum"] if i["difficulty"] == "All"),
+        None
+    )
+    return all_entry["count"] if all_entry else 0
+
+
+def parse_history(ranking_history, include_non_attended=False):
+    history = []
+    for e in ranking_history or []:
+        if not e["attended"] and not include_non_attended:
+            continue
+        dt = datetime.fromtimestamp(e["contest"]["startTime"])
+        history.append({
+            "contest":    e["contest"]["title"],
+            "rank":       int(e.get("ranking", 0)),
+            "old_rating": 0,
+            "new_rating": int(e["rating"]),
+            "date":       dt.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    return history
+
+
+def parse_profile(payload, include_non_attended=False):
+    """(solved, history) from a PROFILE_QUERY response; partial data is kept."""
+    data = (payload or {}).get("data") or {}
+    return (parse_solved(data.get("matchedUser")),
+            parse_history(data.get("userContestRankingHistory"), include_non_attended))
+
+
+def parse_profile_body(body, include_non_attended=False):
+    """parse_profile() on a raw response body; None when LeetCode sent no data at all."""
+    payload = json.loads(body)
+    if not payload.get("data"):
+        return None
+    return parse_profile(payload, include_non_attended)
+
+
+def parse_batch(payload, handles, include_non_attended=False):
+    """{handle: (solved, history)} for the handles LeetCode returned a user for."""
+    data = (payload or {}).get("data") or {}
+    out  = {}
+    for i, handle in enumerate(handles):
+        user = data.get(f"u{i}")
+        if user is None:
+            continue
+        out[handle] = (parse_solved(user),
+                       parse_history(data.get(f"h{i}"), include_non_attended))
+    return out
+
+
+# ─── Batch transport ──────────────────────────────────────────────────────────
+
+async def fetch_leetcode_batch_async(handles, batch_size=LC_BATCH, include_non_attended=False):
+    """
+    Fetch solved count + contest history for many handles, batch_size per POST.
+    Returns {handle: (solved, history)}; unknown handles and failed batches
+    are simply missing from the result. May raise ServeCached.
+    """
+    session, out = get_async_session(), {}
+    for i in range(0, len(handles), batch_size):
+        chunk = handles[i:i + batch_size]
+        await acquire_async("leetcode.com", max_wait=60)
+        try:
+            async with session.post(LEETCODE_GRAPHQL, json=batch_query(chunk),
+                                    headers=headers()) as resp:
+                if resp.status != 200:
+                    print(f"LeetCode batch HTTP {resp.status} ({len(chunk)} handles)")
+                    continue
+                out.update(parse_batch(await resp.json(), chunk, include_non_attended))
+        except Exception as e:
+            print(f"LeetCode batch error ({len(chunk)} handles): {e}")
+    return out
+
+
+def fetch_leetcode_batch(handles, batch_size=LC_BATCH, include_non_attended=False):
+    """Sync twin of fetch_leetcode_batch_async()."""
+    out = {}
+    for i in range(0, len(handles), batch_size):
+        chunk = handles[i:i + batch_size]
+        acquire("leetcode.com", max_wait=60)
+        try:
+            r = get_sync_session().post(LEETCODE_GRAPHQL, json=batch_query(chunk),
+                                        headers=headers(), timeout=30)
+            if r.status_code != 200:
+                print(f"LeetCode batch HTTP {r.status_code} ({len(chunk)} handles)")
+                continue
+            out.update(parse_batch(r.json(), chunk, include_non_attended))
+        except Exception as e:
+            print(f"LeetCode batch error ({len(chunk)} handles): {e}")
+    return out
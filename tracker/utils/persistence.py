@@ -0,0 +1,132 @@
+# tracker/utils/persistence.py
+"""
+Targeted writes of UserStats fields.
+
+Writers never load a UserStats document just to save() it back. They hand
+this module the field values they computed, plus whatever they already
+read, and only the fields that actually differ are sent to Mongo:
+
+  • update_fields(username, fields, current)  — one $set update
+  • bulk_update({username: fields}, current)  — one unordered bulk_write
+    for many users (bulk refreshers, contest ingestion)
+
+Rating history is not part of UserStats any more; it is appended to or
+replaced in rating_entries by tracker/utils/history_store.py.
+
+Every call is counted per request type (`kind`) in one Redis hash —
+writes issued, writes avoided (nothing changed) and fields written — and reported by the admin
+metrics endpoint (write_stats()).
+"""
+import logging
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from tracker.models import UserStats
+from tracker.utils.redis_conn import get_redis
+
+logger = logging.getLogger(__name__)
+
+_COUNTERS = "persist:writes"     # hash "<kind>:written|avoided|fields" -> count
+
+
+def _value(current, field):
+    if current is None:
+        return None
+    if isinstance(current, dict):
+        return current.get(field)
+    return getattr(current, field, None)
+
+
+def changed(current, fields: dict) -> dict:
+    """The entries of `fields` whose value differs from `current` (document or dict)."""
+    return {k: v for k, v in fields.items() if _value(current, k) != v}
+
+
+def _update(fields: dict, maximum: dict = None) -> dict:
+    update = {"$set": {**fields, "last_updated": datetime.utcnow()}}
+    if maximum:
+        update["$max"] = maximum
+    return update
+
+
+# ─── Writes ───────────────────────────────────────────────────────────────────
+
+def update_fields(username, fields: dict, current=None, kind="refresh", touch=False) -> dict:
+    """
+    $set the entries of `fields` that differ from `current` (the stored
+    values, as a UserStats or dict; None writes them all). Returns the
+    fields written — {} when the write was avoided.
+
+    touch=True still bumps last_updated when no field differs (the
+    caller wrote rating entries, so the stats are fresh).
+    """
+    diff = changed(current, fields) if current is not None else dict(fields)
+    if not diff and not touch:
+        record(kind, avoided=1)
+        return {}
+    UserStats._get_collection().update_one({"username": username}, _update(diff))
+    record(kind, written=1, fields=len(diff))
+    return diff
+
+
+def bulk_update(changes: dict, current: dict = None, kind="bulk", maximum: dict = None) -> dict:
+    """
+    Write {username: fields} for many users in one unordered bulk_write.
+    `current` maps username -> stored values; only differing fields are
+    sent and users with nothing to change are skipped. `maximum`
+    ({username: {field: value}}) is applied with $max, for peaks that must
+    never go down. Returns {username: fields written}.
+    """
+    current, maximum = current or {}, maximum or {}
+    ops, written, avoided, n_fields = [], {}, 0, 0
+    for username in set(changes) | set(maximum):
+        diff = changed(current.get(username), changes.get(username, {}))
+        peak = maximum.get(username)
+        if not diff and not peak:
+            avoided += 1
+            continue
+        ops.append(UpdateOne({"username": username}, _update(diff, peak)))
+        written[username] = {**diff, **(peak or {})}
+        n_fields += len(written[username])
+    if ops:
+        UserStats._get_collection().bulk_write(ops, ordered=False)
+    record(kind, written=len(ops), avoided=avoided, fields=n_fields)
+    return written
+
+
+# ─── Counters ─────────────────────────────────────────────────────────────────
+
+def _increments(kind, written, avoided, fields):
+    return {f"{kind}:{name}": n
+            for name, n in (("written", written), ("avoided", avoided), ("fields", fields)) if n}
+
+
+def record(kind, written=0, avoided=0, fields=0):
+    """Count writes issued / avoided for `kind` (best effort)."""
+    increments = _increments(kind, written, avoided, fields)
+    if not increments:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for field, n in increments.items():
+            pipe.hincrby(_COUNTERS, field, n)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"persistence counters unavailable: {e}")
+
+
+def write_stats() -> dict:
+    """{kind: {"written", "avoided", "fields", "avoided_ratio"}} for the admin metrics endpoint."""
+    try:
+        raw = get_redis().hgetall(_COUNTERS)
+    except Exception as e:
+        return {"error": str(e)}
+    out = {}
+    for field, n in raw.items():
+        kind, _, name = field.decode().rpartition(":")
+        out.setdefault(kind, {"written": 0, "avoided": 0, "fields": 0})[name] = int(n)
+    for counts in out.values():
+        total = counts["written"] + counts["avoided"]
+        counts["avoided_ratio"] = round(counts["avoided"] / total, 4) if total else 0.0
+    return dict(sorted(out.items()))
@@ -0,0 +1,91 @@
+# tracker/utils/platform_gate.py
+"""
+Per-platform concurrency caps and latency samples for bulk runs.
+
+The rate limiter bounds how often a host is called, not how many calls
+are in flight. A bulk refresh running 32 users at once would otherwise
+open 32 CodeChef page downloads side by side. Inside use_gate(gate),
+every async platform fetch (async_fetchers._or_stored) first takes a
+slot of that platform's semaphore and records how long the fetch took:
+
+    gate = PlatformGate({"Codeforces": 8, "CodeChef": 2})
+    with use_gate(gate):
+        await fetch_and_store_all(username)      # in as many tasks as needed
+    gate.summary()
+
+Outside use_gate() the slot is a no-op, so request paths are unaffected.
+"""
+import asyncio
+import math
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from tracker.utils.rate_limiter import ServeCached
+
+
+def percentiles(samples, points=(50, 90, 99)) -> dict:
+    """Nearest-rank percentiles of `samples` as {"p50": …}; {} when empty."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {f"p{p}": round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)], 3)
+            for p in points}
+
+
+class PlatformGate:
+    def __init__(self, limits: dict = None):
+        self.slots   = {p: asyncio.Semaphore(n) for p, n in (limits or {}).items() if n}
+        self.latency = defaultdict(list)     # platform -> seconds per completed fetch
+        self.failed  = Counter()
+        self.skipped = Counter()             # ServeCached: limiter / breaker said no
+
+    @asynccontextmanager
+    async def slot(self, platform: str):
+        sem = self.slots.get(platform)
+        if sem:
+            await sem.acquire()
+        t0 = time.monotonic()
+        try:
+            yield
+        except ServeCached:
+            self.skipped[platform] += 1
+            raise
+        except Exception:
+            self.failed[platform] += 1
+            raise
+        else:
+            self.latency[platform].append(time.monotonic() - t0)
+        finally:
+            if sem:
+                sem.release()
+
+    def summary(self) -> dict:
+        platforms = set(self.latency) | set(self.failed) | set(self.skipped)
+        return {p: {"fetches": len(self.latency[p]), "failed": self.failed[p],
+                    "skipped": self.skipped[p], **percentiles(self.latency[p])}
+                for p in sorted(platforms)}
+
+
+_gate = ContextVar("platform_gate", default=None)
+
+
+@contextmanager
+def use_gate(gate: PlatformGate):
+    """Route platform fetches started in this context (and its tasks) through `gate`."""
+    token = _gate.set(gate)
+    try:
+        yield gate
+    finally:
+        _gate.reset(token)
+
+
+@asynccontextmanager
+async def platform_slot(platform: str):
+    gate = _gate.get()
+    if gate is None:
+        yield
+        return
+    async with gate.slot(platform):
+        yield
@@ -0,0 +1,71 @@
+# tracker/utils/query_audit.py
+"""
+Debug instrumentation for documents loaded without a projection.
+
+UserStats querysets (UserStatsQuerySet in tracker/models.py) call
+full_load() for every document they build with no only()/exclude()
+applied. When QUERY_AUDIT["enabled"] is on (DEBUG by default), the load
+is counted against the calling site — the first tracker frame outside
+the model layer — and the first load from each site is logged:
+
+    full UserStats load at tracker/views/foo.py:42 in foo_view — use a projection
+
+Loads that really need every field say so with .full() and are not
+reported. audit_stats() is part of the admin metrics endpoint.
+"""
+import logging
+import os
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_DEFAULTS = {
+    "enabled": False,
+}
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_SKIP = (os.path.join("tracker", "models.py"), os.path.join("tracker", "utils", "query_audit.py"))
+
+_loads = Counter()               # (collection, site) -> documents loaded
+_lock  = threading.Lock()
+
+
+def config() -> dict:
+    return {**_DEFAULTS, **getattr(settings, "QUERY_AUDIT", {})}
+
+
+def _caller() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if path.startswith(_ROOT) and not path.endswith(_SKIP):
+            return f"{os.path.relpath(path, _ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<outside tracker>"
+
+
+def full_load(document):
+    """Record one `document` instance loaded with every field."""
+    if not config()["enabled"]:
+        return
+    key = (document._get_collection_name(), _caller())
+    with _lock:
+        first = key not in _loads
+        _loads[key] += 1
+    if first:
+        logger.warning(f"full {document.__name__} load at {key[1]} — use a projection")
+
+
+def audit_stats() -> dict:
+    """Full-document loads per collection and site, most frequent first."""
+    with _lock:
+        loads = _loads.most_common()
+    out = {"enabled": config()["enabled"], "total": sum(n for _, n in loads), "sites": {}}
+    for (collection, site), n in loads:
+        out["sites"].setdefault(collection, {})[site] = n
+    return out
+
@@ -0,0 +1,273 @@
+# tracker/utils/rate_limiter.py
+"""
+Distributed token-bucket limiter for outbound platform calls.
+
+One bucket per platform host lives in Redis (REDIS_URL), so every daphne
+worker and script shares the same budget. Limits come from
+settings.PLATFORM_RATE_LIMITS as {host: (tokens_per_second, burst)};
+hosts without an entry are not limited.
+
+A call *reserves* a token atomically (Lua script): the bucket may go
+negative, and the amount below zero is the number of callers queued
+behind it. If the computed wait exceeds the caller's max_wait, nothing
+is reserved and ServeCached is raised — the fetcher should give up and
+let the caller serve the stored data instead of blocking.
+
+If Redis is unreachable the limiter degrades to an in-process bucket,
+so fetches are still paced per worker rather than failing outright.
+
+Bulk runs that would rather wait their turn than skip a platform raise
+the default max_wait for everything they start with use_max_wait().
+
+acquire() is also the gate for the per-host circuit breakers
+(tracker/utils/circuit_breaker.py): while a host's breaker is open,
+ServeCached is raised before any token is taken.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from tracker.utils.redis_conn import get_redis, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "ratelimit:bucket:"
+
+# KEYS[1] = bucket; ARGV = rate, burst, max_wait
+# Returns {wait_seconds, tokens_left} as strings, wait = -1 when denied.
+_RESERVE_LUA = """
+local rate     = tonumber(ARGV[1])
+local burst    = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local t        = redis.call('TIME')
+local now      = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state    = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens   = tonumber(state[1]) or burst
+local ts       = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens < 1 then
+  wait = (1 - tokens) / rate
+end
+if wait > max_wait then
+  redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+  return {'-1', tostring(tokens)}
+end
+tokens = tokens - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate + max_wait) + 60)
+return {tostring(wait), tostring(tokens)}
+"""
+
+
+class ServeCached(Exception):
+    """Waiting for a token would overshoot the deadline — serve stored data."""
+
+    def __init__(self, host, reason="rate limit"):
+        self.host = host
+        super().__init__(f"{host}: {reason}, serve cached data")
+
+
+# ─── Metrics (per process) ────────────────────────────────────────────────────
+
+_metrics = defaultdict(lambda: {
+    "acquired":       0,
+    "throttled":      0,     # had to wait before calling
+    "denied":         0,     # ServeCached raised
+    "total_wait":     0.0,
+    "max_wait":       0.0,
+    "waiting_now":    0,     # callers of this process sleeping on the bucket
+    "queue_depth":    0,     # last seen shared depth (tokens below zero)
+    "redis_fallback": 0,
+})
+_metrics_lock = threading.Lock()
+
+
+def _record(host, wait, tokens, denied=False):
+    with _metrics_lock:
+        m = _metrics[host]
+        m["queue_depth"] = max(0, int(-tokens)) if tokens < 0 else 0
+        if denied:
+            m["denied"] += 1
+            return
+        m["acquired"] += 1
+        if wait > 0:
+            m["throttled"]  += 1
+            m["total_wait"] += wait
+            m["max_wait"]    = max(m["max_wait"], wait)
+
+
+def _waiting(host, delta):
+    with _metrics_lock:
+        _metrics[host]["waiting_now"] += delta
+
+
+def limiter_stats() -> dict:
+    """Per-host counters plus configured limits, for the admin metrics endpoint."""
+    limits = _limits()
+    with _metrics_lock:
+        out = {}
+        for host, m in _metrics.items():
+            d = dict(m)
+            d["avg_wait"] = round(m["total_wait"] / m["throttled"], 3) if m["throttled"] else 0.0
+            d["total_wait"] = round(m["total_wait"], 3)
+            d["max_wait"]   = round(m["max_wait"], 3)
+            d["limit"]      = limits.get(host)
+            out[host] = d
+        return out
+
+
+# ─── In-process fallback bucket ───────────────────────────────────────────────
+
+class _LocalBucket:
+    def __init__(self, rate, burst):
+        self.rate, self.burst = rate, burst
+        self.tokens, self.ts  = float(burst), time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, max_wait):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.ts) * self.rate)
+            self.ts = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            if wait > max_wait:
+                return -1.0, self.tokens
+            self.tokens -= 1
+            return wait, self.tokens
+
+
+_local_buckets = {}
+
+# After a Redis error, skip it for a short while instead of paying the
+# connect timeout on every call.
+_REDIS_RETRY_AFTER = 30
+_redis_down_until  = 0.0
+
+
+def _redis_usable():
+    return time.monotonic() >= _redis_down_until
+
+
+def _redis_failed(host, e):
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + _REDIS_RETRY_AFTER
+    logger.warning(f"Rate limiter Redis error for {host} ({e}) — using local bucket")
+
+
+def _local_reserve(host, rate, burst, max_wait):
+    bucket = _local_buckets.get(host)
+    if bucket is None:
+        bucket = _local_buckets.setdefault(host, _LocalBucket(rate, burst))
+    with _metrics_lock:
+        _metrics[host]["redis_fallback"] += 1
+    return bucket.reserve(max_wait)
+
+
+# ─── Public API ───────────────────────────────────────────────────────────────
+
+def _limits() -> dict:
+    return getattr(settings, "PLATFORM_RATE_LIMITS", {})
+
+
+_context_max_wait = ContextVar("rate_limit_max_wait", default=None)
+
+
+@contextmanager
+def use_max_wait(seconds: float):
+    """Default max_wait for acquires made in this context (and its tasks / threads)."""
+    token = _context_max_wait.set(seconds)
+    try:
+        yield
+    finally:
+        _context_max_wait.reset(token)
+
+
+def _max_wait(max_wait):
+    if max_wait is not None:
+        return max_wait
+    scoped = _context_max_wait.get()
+    return getattr(settings, "RATE_LIMIT_MAX_WAIT", 5.0) if scoped is None else scoped
+
+
+def _check_breaker(host):
+    # Imported here: circuit_breaker imports ServeCached from this module
+    from tracker.utils.circuit_breaker import breaker
+    breaker(host).check()
+
+
+def acquire(host: str, max_wait: float = None) -> float:
+    """
+    Block until a token for `host` is available; returns seconds waited.
+    Raises ServeCached if the wait would exceed max_wait or the host's
+    circuit breaker is open.
+    """
+    _check_breaker(host)
+    limit = _limits().get(host)
+    if not limit:
+        return 0.0
+    rate, burst = limit
+    max_wait    = _max_wait(max_wait)
+
+    wait = tokens = None
+    if _redis_usable():
+        try:
+            wait, tokens = get_redis().eval(_RESERVE_LUA, 1, _KEY_PREFIX + host, rate, burst, max_wait)
+            wait, tokens = float(wait), float(tokens)
+        except Exception as e:
+            _redis_failed(host, e)
+            wait = None
+    if wait is None:
+        wait, tokens = _local_reserve(host, rate, burst, max_wait)
+
+    if wait < 0:
+        _record(host, 0, tokens, denied=True)
+        raise ServeCached(host)
+    _record(host, wait, tokens)
+    if wait:
+        _waiting(host, 1)
+        try:
+            time.sleep(wait)
+        finally:
+            _waiting(host, -1)
+    return wait
+
+
+async def acquire_async(host: str, max_wait: float = None) -> float:
+    """Async twin of acquire() — sleeps on the event loop instead of a thread."""
+    _check_breaker(host)
+    limit = _limits().get(host)
+    if not limit:
+        return 0.0
+    rate, burst = limit
+    max_wait    = _max_wait(max_wait)
+
+    wait = tokens = None
+    if _redis_usable():
+        try:
+            wait, tokens = await get_async_redis().eval(
+                _RESERVE_LUA, 1, _KEY_PREFIX + host, rate, burst, max_wait)
+            wait, tokens = float(wait), float(tokens)
+        except Exception as e:
+            _redis_failed(host, e)
+            wait = None
+    if wait is None:
+        wait, tokens = _local_reserve(host, rate, burst, max_wait)
+
+    if wait < 0:
+        _record(host, 0, tokens, denied=True)
+        raise ServeCached(host)
+    _record(host, wait, tokens)
+    if wait:
+        _waiting(host, 1)
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            _waiting(host, -1)
+    return wait
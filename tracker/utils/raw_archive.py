@@ -0,0 +1,114 @@
+# tracker/utils/raw_archive.py
+"""
+Compressed archive of raw upstream responses.
+
+Every body the response cache accepts as NEW (its digest differs from the
+previous fetch and the parser returned something) is also written, zlib-
+compressed, to the raw_responses collection (tracker.models.RawResponse):
+
+    platform / handle / endpoint / fetched_at / digest / size / body
+
+Unchanged bodies and 304s are not archived again, so a user refreshed a
+hundred times with no new contests costs one document per endpoint.
+
+Retention:
+  • keep_per_key  — older versions of a (platform, handle, endpoint) are
+    dropped on each write;
+  • max_age_days  — prune() deletes anything older
+    (`python manage.py prune_raw_archive`, e.g. from cron).
+
+The archive is what `python manage.py reparse` reads (tracker/utils/reparse.py)
+to rebuild UserStats with the current parsers without any network access.
+
+For CodeChef the archived payload is the captured rating_data array, not
+the whole profile page — that is the part _parse_rating_array() reads.
+"""
+import logging
+import zlib
+from datetime import datetime, timedelta
+
+from django.conf import settings
+
+from tracker.models import RawResponse
+
+logger = logging.getLogger(__name__)
+
+_DEFAULTS = {
+    "enabled":      True,
+    "platforms":    ("codeforces", "leetcode", "atcoder", "codechef"),   # not "contests"
+    "keep_per_key": 3,
+    "max_age_days": 180,
+    "level":        6,          # zlib compression level
+}
+
+
+def config() -> dict:
+    return {**_DEFAULTS, **getattr(settings, "RAW_ARCHIVE", {})}
+
+
+# ─── Write ────────────────────────────────────────────────────────────────────
+
+def archive(platform: str, handle: str, endpoint: str, body: bytes, digest: str = None):
+    """
+    Store one raw body. Best effort: a failed write is logged and never
+    breaks the fetch that produced the body.
+    """
+    cfg = config()
+    if not cfg["enabled"] or platform not in cfg["platforms"]:
+        return
+    handle = handle.lower()
+    try:
+        RawResponse(platform=platform, handle=handle, endpoint=endpoint,
+                    fetched_at=datetime.utcnow(), digest=digest, size=len(body),
+                    body=zlib.compress(body, cfg["level"])).save()
+        _trim(platform, handle, endpoint, cfg["keep_per_key"])
+    except Exception as e:
+        logger.warning(f"raw archive write failed for {platform}:{handle}:{endpoint}: {e}")
+
+
+def _trim(platform, handle, endpoint, keep):
+    old = [d.id for d in RawResponse.objects(platform=platform, handle=handle, endpoint=endpoint)
+           .order_by("-fetched_at").skip(keep).only("id")]
+    if old:
+        RawResponse.objects(id__in=old).delete()
+
+
+def prune(max_age_days: int = None) -> int:
+    """Delete archived bodies older than max_age_days; returns how many."""
+    days   = config()["max_age_days"] if max_age_days is None else max_age_days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    return RawResponse.objects(fetched_at__lt=cutoff).delete()
+
+
+# ─── Read ─────────────────────────────────────────────────────────────────────
+
+def latest(platform: str, handle: str, endpoints) -> tuple:
+    """
+    Newest archived body for `handle` under any of `endpoints` (a name or
+    a list of names). Returns (endpoint, body, fetched_at) or None.
+    """
+    if isinstance(endpoints, str):
+        endpoints = [endpoints]
+    doc = (RawResponse.objects(platform=platform, handle=handle.lower(), endpoint__in=endpoints)
+           .order_by("-fetched_at").first())
+    if doc is None:
+        return None
+    return doc.endpoint, zlib.decompress(doc.body), doc.fetched_at
+
+
+def archive_stats() -> dict:
+    """Documents, uncompressed bytes and oldest fetch per platform."""
+    rows = RawResponse.objects.aggregate([
+        {"$group": {"_id":        "$platform",
+                    "documents":  {"$sum": 1},
+                    "raw_bytes":  {"$sum": "$size"},
+                    "oldest":     {"$min": "$fetched_at"}}},
+    ])
+    out = {}
+    for row in rows:
+        out[row["_id"]] = {
+            "documents": row["documents"],
+            "raw_bytes": row["raw_bytes"],
+            "oldest":    row["oldest"].isoformat() if row.get("oldest") else None,
+        }
+    return out
@@ -0,0 +1,44 @@
+# tracker/utils/redis_conn.py
+"""
+Shared redis-py clients on settings.REDIS_URL — the same Redis that backs
+the Django cache and the channel layer.
+
+Used by fetcher-side coordination (rate limiting, etc.) that needs raw
+Redis commands rather than the pickled key/value API of django.core.cache.
+Async clients are loop-bound, so one is kept per running event loop.
+"""
+import asyncio
+import threading
+import weakref
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+_client       = None
+_async_client = weakref.WeakKeyDictionary()   # loop -> redis.asyncio.Redis
+_lock         = threading.Lock()
+
+_OPTIONS = {
+    "socket_timeout":         2,
+    "socket_connect_timeout": 2,
+    "health_check_interval":  30,
+}
+
+
+def get_redis() -> redis.Redis:
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = redis.Redis.from_url(settings.REDIS_URL, **_OPTIONS)
+    return _client
+
+
+def get_async_redis() -> aioredis.Redis:
+    loop   = asyncio.get_running_loop()
+    client = _async_client.get(loop)
+    if client is None:
+        client = aioredis.Redis.from_url(settings.REDIS_URL, **_OPTIONS)
+        _async_client[loop] = client
+    return client
@@ -0,0 +1,212 @@
+# tracker/utils/refresh_all.py
+"""
+Refresh the whole user base in one bounded, resumable run
+(`python manage.py refresh_all`).
+
+  • Usernames are streamed from user_profiles in pages (keyset on the
+    unique username index), never loaded all at once.
+  • At most `concurrency` fetch_and_store_all calls run at a time, and at
+    most platform_concurrency[platform] fetches per platform
+    (tracker/utils/platform_gate.py) — the shared rate limiter and circuit
+    breakers still apply on top. Fetches wait up to `max_wait` seconds
+    for a limiter token (rate_limiter.use_max_wait) instead of the
+    request-path RATE_LIMIT_MAX_WAIT, so a bulk run paces itself rather
+    than skipping platforms.
+  • Every refreshed username is appended to a checkpoint file. A rerun
+    skips those, so an interrupted run resumes where it stopped. Failed
+    users, and incomplete ones (a platform skipped or errored — see
+    fetch_coordinator.Refresh), are not checkpointed and are retried.
+    The file is removed once a run finishes with neither.
+"""
+import asyncio
+import logging
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from tracker.models import UserProfile
+from tracker.utils.platform_gate import PlatformGate, percentiles, use_gate
+from tracker.utils.rate_limiter import use_max_wait
+
+logger = logging.getLogger(__name__)
+
+_DEFAULTS = {
+    "concurrency":          16,
+    "platform_concurrency": {"Codeforces": 8, "LeetCode": 8, "CodeChef": 4, "AtCoder": 6},
+    "checkpoint":           "refresh_all.checkpoint",
+    "page_size":            500,
+    "report_every":         10,      # seconds between progress lines
+    "max_wait":             300,     # seconds a fetch may wait for a rate-limit token
+}
+
+
+def config() -> dict:
+    return {**_DEFAULTS, **getattr(settings, "REFRESH_ALL", {})}
+
+
+class Checkpoint:
+    """Append-only file of refreshed usernames, one per line."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fh  = None
+
+    def load(self) -> set:
+        if not self.path or not os.path.exists(self.path):
+            return set()
+        with open(self.path, encoding="utf-8") as fh:
+            return {line.strip() for line in fh if line.strip()}
+
+    def add(self, username):
+        if not self.path:
+            return
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(username + "\n")
+        self._fh.flush()
+
+    def close(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+    def clear(self):
+        self.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _page(after: str, size: int) -> list:
+    return [p.username for p in UserProfile.objects(username__gt=after)
+            .order_by("username").only("username").limit(size)]
+
+
+class BulkRefresh:
+    def __init__(self, concurrency=None, platform_concurrency=None, checkpoint=None,
+                 usernames=None, report=None):
+        cfg               = config()
+        self.concurrency  = concurrency or cfg["concurrency"]
+        self.gate         = PlatformGate({**cfg["platform_concurrency"], **(platform_concurrency or {})})
+        self.checkpoint   = Checkpoint(cfg["checkpoint"] if checkpoint is None else checkpoint)
+        self.usernames    = usernames
+        self.report       = report or (lambda line: logger.info(line))
+        self.page_size    = cfg["page_size"]
+        self.report_every = cfg["report_every"]
+        self.max_wait     = cfg["max_wait"]
+        self.stats        = {"total": 0, "resumed": 0, "refreshed": 0, "incomplete": 0, "failed": 0}
+        self.user_latency = []
+        self.errors       = {}               # username -> message (first 20)
+        self.incomplete   = {}               # username -> platforms not fetched (first 20)
+        self._stop        = asyncio.Event()
+
+    def stop(self):
+        """Stop starting new users; the ones in flight finish."""
+        self._stop.set()
+
+    async def _stream(self):
+        if self.usernames is not None:
+            for username in self.usernames:
+                yield username
+            return
+        after = ""
+        while True:
+            page = await sync_to_async(_page)(after, self.page_size)
+            if not page:
+                return
+            for username in page:
+                yield username
+            after = page[-1]
+
+    async def _one(self, username):
+        from tracker.utils.fetch_coordinator import fetch_and_store_all
+
+        t0 = time.monotonic()
+        try:
+            result = await fetch_and_store_all(username)
+        except Exception as e:
+            self.stats["failed"] += 1
+            if len(self.errors) < 20:
+                self.errors[username] = str(e)
+            logger.error(f"refresh_all: {username} failed: {e}")
+            return
+        self.user_latency.append(time.monotonic() - t0)
+        if not result.complete:
+            # Stored entries were kept for those platforms — retried on the next run
+            self.stats["incomplete"] += 1
+            if len(self.incomplete) < 20:
+                self.incomplete[username] = sorted(result.skipped)
+            logger.warning(f"refresh_all: {username} incomplete — {', '.join(sorted(result.skipped))}")
+            return
+        self.stats["refreshed"] += 1
+        self.checkpoint.add(username)
+
+    async def _reporter(self, started):
+        while True:
+            await asyncio.sleep(self.report_every)
+            self.report(self.progress_line(started))
+
+    def _done(self) -> int:
+        s = self.stats
+        return s["refreshed"] + s["incomplete"] + s["failed"]
+
+    def _error_rate(self) -> float:
+        done = self._done()
+        return (self.stats["incomplete"] + self.stats["failed"]) / done if done else 0.0
+
+    def progress_line(self, started) -> str:
+        done    = self._done()
+        elapsed = max(time.monotonic() - started, 1e-6)
+        todo    = self.stats["total"] - self.stats["resumed"]
+        return (f"{done}/{todo} users  {done / elapsed:.1f}/s  "
+                f"errors {self._error_rate():.1%} ({self.stats['incomplete']} incomplete)")
+
+    async def run(self) -> dict:
+        done    = self.checkpoint.load()
+        total   = (len(self.usernames) if self.usernames is not None
+                   else await sync_to_async(UserProfile.objects.count)())
+        self.stats.update(total=total, resumed=len(done))
+        if done:
+            self.report(f"resuming — {len(done)} users already refreshed")
+
+        slots    = asyncio.Semaphore(self.concurrency)
+        running  = set()
+        started  = time.monotonic()
+        reporter = asyncio.create_task(self._reporter(started))
+        try:
+            with use_gate(self.gate), use_max_wait(self.max_wait):
+                async for username in self._stream():
+                    if self._stop.is_set():
+                        break
+                    if username in done:
+                        continue
+                    await slots.acquire()
+                    task = asyncio.create_task(self._one(username))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+                    task.add_done_callback(lambda _: slots.release())
+                if running:
+                    await asyncio.gather(*running)
+        finally:
+            reporter.cancel()
+            self.checkpoint.close()
+
+        finished = not self._stop.is_set()
+        if finished and not self.stats["failed"] and not self.stats["incomplete"]:
+            self.checkpoint.clear()
+        return self.summary(time.monotonic() - started, finished)
+
+    def summary(self, elapsed: float, finished: bool) -> dict:
+        done = self._done()
+        return {
+            **self.stats,
+            "finished":   finished,
+            "elapsed":    round(elapsed, 1),
+            "throughput": round(done / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(self._error_rate(), 4),
+            "users":      percentiles(self.user_latency),
+            "platforms":  self.gate.summary(),
+            "errors":     self.errors,
+            "incomplete_users": self.incomplete,
+        }
@@ -0,0 +1,279 @@
+# tracker/utils/refresh_scheduler.py
+"""
+Background refresh scheduler.
+
+Instead of refreshing stats inline when somebody opens a page, a
+long-running scheduler keeps every tracked user warm:
+
+  • Every `tick` seconds the planner computes each user's due time:
+        handles changed (UserStats.is_stale)       → due now
+        nudged via request_refresh()               → due now (minus priority)
+        otherwise  last refresh + interval, where interval is
+                   active_interval for users seen in the last
+                   active_window seconds (note_activity) and
+                   idle_interval for everyone else.
+    Due users go into a priority queue, most overdue first.
+  • `workers` async workers pop users and run fetch_and_store_all. A
+    refresh that raised, or fetched no platform at all (every one
+    rate-limited or failing), is retried after `retry_after`.
+    A Redis claim (refresh:claim:<username>) keeps two scheduler nodes
+    from refreshing the same user at the same time. With
+    FETCH_QUEUE_ENABLED the scheduler only plans: due users are handed
+    to the fetch job queue (tracker/utils/fetch_queue.py) instead.
+
+Bookkeeping lives in Redis so request paths can feed it cheaply:
+    refresh:nudges    zset  username -> requested due time
+    refresh:activity  zset  username -> last seen (epoch seconds)
+    refresh:next      hash  username -> next due time after a refresh
+    refresh:retry     hash  username -> earliest retry after a failed refresh
+
+Run it with `python manage.py refresh_scheduler`, or inside the ASGI
+process by setting REFRESH_SCHEDULER["run_in_asgi"] (tracker/lifespan.py).
+"""
+import asyncio
+import heapq
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from tracker.utils.redis_conn import get_redis, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+_NUDGES   = "refresh:nudges"
+_ACTIVITY = "refresh:activity"
+_NEXT     = "refresh:next"
+_RETRY    = "refresh:retry"
+_CLAIM    = "refresh:claim:"
+
+_DEFAULTS = {
+    "workers":         4,         # concurrent fetch_and_store_all calls per node
+    "tick":            60,        # seconds between planning passes
+    "active_interval": 15 * 60,   # refresh period for recently active users
+    "idle_interval":   6 * 3600,  # refresh period for everyone else
+    "active_window":   24 * 3600, # "recently active" = seen within this
+    "retry_after":     5 * 60,    # failed refreshes are retried after this
+    "claim_ttl":       300,
+    "run_in_asgi":     False,
+}
+
+
+def config() -> dict:
+    return {**_DEFAULTS, **getattr(settings, "REFRESH_SCHEDULER", {})}
+
+
+# ─── Request-path hooks ───────────────────────────────────────────────────────
+
+def request_refresh(username: str, priority: float = 0):
+    """Ask the scheduler to refresh `username` on its next pass (best effort)."""
+    try:
+        get_redis().zadd(_NUDGES, {username: time.time() - priority})
+    except Exception as e:
+        logger.warning(f"refresh nudge for {username} dropped: {e}")
+
+
+def note_activity(username: str):
+    """Record that `username` was viewed — active users refresh more often."""
+    try:
+        get_redis().zadd(_ACTIVITY, {username: time.time()})
+    except Exception as e:
+        logger.debug(f"activity for {username} not recorded: {e}")
+
+
+async def anote_activity(username: str):
+    try:
+        await get_async_redis().zadd(_ACTIVITY, {username: time.time()})
+    except Exception as e:
+        logger.debug(f"activity for {username} not recorded: {e}")
+
+
+# ─── Planning ─────────────────────────────────────────────────────────────────
+
+def plan(now: float = None) -> list:
+    """
+    Return [(due_at, username)] for every user due by `now`, most overdue
+    first. Drains the nudge set.
+    """
+    from tracker.models import UserStats, UserProfile
+
+    cfg = config()
+    now = now or time.time()
+    r   = get_redis()
+
+    pipe = r.pipeline()
+    pipe.zrange(_NUDGES, 0, -1, withscores=True)
+    pipe.delete(_NUDGES)
+    pipe.zrangebyscore(_ACTIVITY, now - cfg["active_window"], "+inf")
+    pipe.hgetall(_NEXT)
+    pipe.hgetall(_RETRY)
+    nudges, _, active, next_due, retry = pipe.execute()
+
+    nudged   = {u.decode(): s for u, s in nudges}
+    active   = {u.decode() for u in active}
+    next_due = {u.decode(): float(t) for u, t in next_due.items()}
+    retry    = {u.decode(): float(t) for u, t in retry.items()}
+    hashes   = {p.username: p.handles_hash() for p in UserProfile.objects.only(
+        "username", "codeforces_handle", "leetcode_handle", "codechef_handle", "atcoder_handle")}
+
+    due = []
+    for s in UserStats.objects.only("username", "last_updated", "handles_hash"):
+        name = s.username
+        if name in nudged:
+            due_at = nudged.pop(name)
+        elif retry.get(name, 0) > now:
+            continue                                        # backing off after a failure
+        elif name in hashes and s.handles_hash != hashes[name]:
+            due_at = 0.0                                    # handles changed
+        elif name in next_due:
+            due_at = next_due[name]
+        else:
+            last     = s.last_updated.timestamp() if s.last_updated else 0.0
+            interval = cfg["active_interval"] if name in active else cfg["idle_interval"]
+            due_at   = last + interval
+        if due_at <= now:
+            due.append((due_at, name))
+
+    # Nudged users without stats yet get their first fetch too
+    due.extend((t, name) for name, t in nudged.items() if name in hashes)
+    heapq.heapify(due)
+    return [heapq.heappop(due) for _ in range(len(due))]
+
+
+def _record_result(username: str, ok: bool):
+    cfg = config()
+    r   = get_redis()
+    if not ok:
+        r.hset(_RETRY, username, time.time() + cfg["retry_after"])
+        return
+    active   = r.zscore(_ACTIVITY, username) or 0
+    recent   = active >= time.time() - cfg["active_window"]
+    interval = cfg["active_interval"] if recent else cfg["idle_interval"]
+    r.hset(_NEXT, username, time.time() + interval)
+    r.hdel(_RETRY, username)
+
+
+# ─── Scheduler ────────────────────────────────────────────────────────────────
+
+class RefreshScheduler:
+    def __init__(self, workers: int = None, tick: float = None):
+        cfg          = config()
+        self.workers = workers or cfg["workers"]
+        self.tick    = tick or cfg["tick"]
+        self.queue   = asyncio.PriorityQueue()
+        self.pending = set()           # queued or being refreshed on this node
+        self.stats   = {"refreshed": 0, "failed": 0, "skipped_claimed": 0, "enqueued": 0, "passes": 0}
+        self._stop   = asyncio.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    async def plan_once(self) -> int:
+        """One planning pass; returns how many users were queued."""
+        try:
+            due = await sync_to_async(plan)()
+        except Exception as e:
+            logger.error(f"refresh planning failed: {e}", exc_info=True)
+            return 0
+        queued = 0
+        for due_at, username in due:
+            if username in self.pending:
+                continue
+            self.pending.add(username)
+            self.queue.put_nowait((due_at, username))
+            queued += 1
+        self.stats["passes"] += 1
+        if queued:
+            logger.info(f"refresh scheduler: queued {queued} users ({self.queue.qsize()} waiting)")
+        return queued
+
+    async def _refresh(self, username: str):
+        from tracker.utils.fetch_coordinator import fetch_and_store_all
+        from tracker.utils.fetch_queue import aenqueue, queue_enabled
+
+        if queue_enabled():
+            await aenqueue(username)
+            self.stats["enqueued"] += 1
+            await sync_to_async(_record_result)(username, True)
+            return
+
+        r = get_async_redis()
+        if not await r.set(_CLAIM + username, "1", nx=True, ex=config()["claim_ttl"]):
+            self.stats["skipped_claimed"] += 1
+            return
+        ok = False
+        try:
+            result = await fetch_and_store_all(username)
+            if result.failed:
+                # Every platform skipped or errored — back off, don't wait a full interval
+                self.stats["failed"] += 1
+                logger.warning(f"scheduled refresh of {username} fetched nothing "
+                               f"({', '.join(sorted(result.skipped))})")
+            else:
+                ok = True
+                self.stats["refreshed"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"scheduled refresh of {username} failed: {e}")
+        finally:
+            await r.delete(_CLAIM + username)
+            await sync_to_async(_record_result)(username, ok)
+
+    async def _worker(self):
+        while True:
+            _, username = await self.queue.get()
+            try:
+                await self._refresh(username)
+            except Exception as e:
+                logger.error(f"refresh worker error for {username}: {e}", exc_info=True)
+            finally:
+                self.pending.discard(username)
+                self.queue.task_done()
+
+    async def run(self, once: bool = False):
+        """Plan every `tick` seconds until stop(); with once=True drain one pass."""
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"refresh scheduler started — {self.workers} workers, tick {self.tick}s")
+        try:
+            while not self._stop.is_set():
+                await self.plan_once()
+                if once:
+                    await self.queue.join()
+                    break
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=self.tick)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            logger.info(f"refresh scheduler stopped — {self.stats}")
+        return self.stats
+
+
+# ─── ASGI lifespan integration ────────────────────────────────────────────────
+
+_scheduler = None
+_task      = None
+
+
+async def start_in_background():
+    global _scheduler, _task
+    if not config()["run_in_asgi"] or _task is not None:
+        return
+    _scheduler = RefreshScheduler()
+    _task      = asyncio.create_task(_scheduler.run())
+
+
+async def stop_background():
+    global _scheduler, _task
+    if _task is None:
+        return
+    _scheduler.stop()
+    try:
+        await asyncio.wait_for(_task, timeout=30)
+    except asyncio.TimeoutError:
+        _task.cancel()
+    _scheduler = _task = None
@@ -0,0 +1,184 @@
+# tracker/utils/reparse.py
+"""
+Offline rebuild of UserStats from the raw-response archive.
+
+After a parser fix (codeforces_entries, atcoder._parse_history,
+codechef_api._parse_codechef_entries, leetcode_graphql.parse_history) or a
+schema change, rebuild_user() re-runs the CURRENT parsers over the newest
+archived body of each platform and persists the result through
+history_sync.store_history — no upstream is contacted.
+
+Platforms with nothing archived for the user's current handle keep the
+entries already stored. The response-cache entries of re-parsed bodies
+are dropped, so the next live fetch of an unchanged body runs the new
+parser too instead of serving the old parse.
+
+reparse_users() spreads users over worker processes (parsing and
+decompression are CPU bound); `python manage.py reparse`.
+"""
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from django.core.cache import cache
+
+from tracker.models import RatingHistory, UserProfile, UserStats
+from tracker.utils.atcoder import _parse_history
+from tracker.utils.codechef_api import _parse_rating_array
+from tracker.utils.codeforces import parse_api_result
+from tracker.utils.history_sync import codeforces_entries, store_history
+from tracker.utils.leetcode_graphql import parse_profile_body
+from tracker.utils.raw_archive import latest
+from tracker.utils.response_cache import cache_key
+
+logger = logging.getLogger(__name__)
+
+AC_ENDPOINTS = ["history:atcoder.jp", "history:kenkoooo.com"]
+
+
+def _entries(platform, rows, old_rating=True):
+    """Standard-format dicts ("date" as YYYY-MM-DD HH:MM:SS) → RatingHistory."""
+    out = []
+    for e in rows:
+        try:
+            old = e["old_rating"] if old_rating else 0
+            out.append(RatingHistory(
+                platform=platform, contest=e["contest"],
+                rank=e["rank"], old_rating=old, new_rating=e["new_rating"],
+                date=datetime.strptime(e["date"], "%Y-%m-%d %H:%M:%S"),
+                change=e.get("change", e["new_rating"] - old) if old_rating else 0
+            ))
+        except (KeyError, ValueError):
+            pass
+    return out
+
+
+# ─── Per platform: archived body → RatingHistory ──────────────────────────────
+#
+# Each returns (entries, solved, source) or None when nothing usable is archived.
+
+def _codeforces(handle):
+    found = latest("codeforces", handle, "user.rating")
+    data  = found and parse_api_result(found[1])
+    if data is None:
+        return None
+    return codeforces_entries(data), None, found[0]
+
+
+def _leetcode(handle):
+    found  = latest("leetcode", handle, "profile")
+    parsed = found and parse_profile_body(found[1])
+    if not parsed:
+        return None
+    solved, rows = parsed
+    return _entries("LeetCode", rows, old_rating=False), solved, found[0]
+
+
+def _codechef(handle):
+    found = latest("codechef", handle, "profile")
+    rows  = found and _parse_rating_array(found[1])
+    if not rows:
+        return None
+    return _entries("CodeChef", rows), None, found[0]
+
+
+def _atcoder(handle):
+    found = latest("atcoder", handle, AC_ENDPOINTS)
+    if not found:
+        return None
+    rows = _parse_history(json.loads(found[1]), handle)
+    return _entries("AtCoder", rows), None, found[0]
+
+
+_PLATFORMS = {
+    # RatingHistory.platform: (archive platform, profile handle getter, reparser)
+    "Codeforces": ("codeforces", "get_codeforces_handle", _codeforces),
+    "LeetCode":   ("leetcode",   "get_leetcode_handle",   _leetcode),
+    "CodeChef":   ("codechef",   "get_codechef_handle",   _codechef),
+    "AtCoder":    ("atcoder",    "get_atcoder_handle",    _atcoder),
+}
+
+
+# ─── Rebuild ──────────────────────────────────────────────────────────────────
+
+def rebuild_user(username: str, dry_run: bool = False) -> dict:
+    """
+    Re-parse `username`'s archived bodies and store the result. Returns
+    {"username", "platforms": [re-parsed], "entries", "wrote"}; platforms
+    is empty (and nothing is written) when the archive holds nothing.
+    """
+    profile = UserProfile.objects(username=username).first()
+    summary = {"username": username, "platforms": [], "entries": 0, "wrote": False}
+    if profile is None:
+        return summary
+
+    history, lc_solved, stale_keys = [], None, []
+    for name, (platform, getter, reparse) in _PLATFORMS.items():
+        handle = getattr(profile, getter)()
+        try:
+            result = reparse(handle)
+        except Exception as e:
+            logger.warning(f"reparse: {name} archive of {username} unusable: {e}")
+            result = None
+        if result is None:
+            continue
+        entries, solved, endpoint = result
+        history.extend(entries)
+        if solved is not None:
+            lc_solved = solved
+        summary["platforms"].append(name)
+        stale_keys.append(cache_key(platform, handle, endpoint))
+
+    if not summary["platforms"]:
+        return summary
+
+    # Nothing archived for a platform: keep what is stored for it
+    stats = UserStats.objects(username=username).summary().first()
+    if stats:
+        history.extend(stats.history_for(set(_PLATFORMS) - set(summary["platforms"])))
+        if lc_solved is None:
+            lc_solved = stats.leetcode_solved or 0
+    summary["entries"] = len(history)
+    if dry_run:
+        return summary
+
+    _, summary["wrote"] = store_history(username, history, lc_solved or 0, cf_since=0,
+                                        kind="reparse")
+    cache.delete_many(stale_keys + [f"rating_history_{username}", f"user_stats_{username}"])
+    return summary
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def reparse_users(usernames, workers: int = None, dry_run: bool = False):
+    """
+    Rebuild every user in `usernames`, `workers` processes at a time
+    (1 = in this process). Yields one rebuild_user() summary per user;
+    a user whose rebuild raised gets {"username", "error"}.
+    """
+    usernames = list(usernames)
+    workers   = workers or os.cpu_count() or 1
+    if workers == 1:
+        for username in usernames:
+            yield _safe_rebuild(username, dry_run)
+        return
+    # spawn: forked children would share the parent's Mongo/Redis sockets
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker) as pool:
+        yield from pool.map(_safe_rebuild, usernames, [dry_run] * len(usernames),
+                            chunksize=8)
+
+
+def _safe_rebuild(username, dry_run=False):
+    try:
+        return rebuild_user(username, dry_run)
+    except Exception as e:
+        logger.error(f"reparse of {username} failed: {e}")
+        return {"username": username, "error": str(e)}
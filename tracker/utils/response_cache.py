@@ -0,0 +1,242 @@
+# tracker/utils/response_cache.py
+"""
+Revalidating response cache that sits under the platform fetchers.
+
+The per-fetcher caches (codeforces_history_*, atcoder_history_*, …) are
+short TTLs. Once they expire the upstream is asked again — this layer
+makes that second ask cheap. For every (platform, handle, endpoint) it
+keeps, in the Django cache for RESPONSE_CACHE_TTL seconds:
+
+    {"etag": …, "last_modified": …, "digest": …, "parsed": …}
+
+  • The next request carries If-None-Match / If-Modified-Since; a 304
+    returns the stored parse without downloading the body.
+  • Upstreams that send no validators (Codeforces, LeetCode GraphQL,
+    CodeChef pages) are compared by body digest; an identical body
+    returns the stored parse without running the parser.
+
+Every lookup inside track_revalidation() is recorded, so the fetch
+coordinator can skip persistence when no platform changed.
+
+Bodies that changed are also archived, compressed, when the entry is
+stored (tracker/utils/raw_archive.py) for offline re-parsing.
+"""
+import hashlib
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import aiohttp
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from tracker.utils.circuit_breaker import host_of, track
+from tracker.utils.http_clients import get_async_session, get_sync_session
+from tracker.utils.raw_archive import archive
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "respcache"
+
+
+def _ttl():
+    return getattr(settings, "RESPONSE_CACHE_TTL", 7 * 24 * 3600)
+
+
+def digest(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+# ─── Revalidation tracking ────────────────────────────────────────────────────
+
+class Revalidation:
+    """Which cache keys changed / stayed the same during one refresh."""
+
+    def __init__(self):
+        self.changed   = set()
+        self.unchanged = set()
+
+    def record(self, key, changed):
+        (self.changed if changed else self.unchanged).add(key)
+
+    @property
+    def nothing_changed(self) -> bool:
+        return bool(self.unchanged) and not self.changed
+
+    def forget(self):
+        """Drop every entry touched, e.g. when persisting the result failed."""
+        cache.delete_many(list(self.changed | self.unchanged))
+
+    async def aforget(self):
+        await cache.adelete_many(list(self.changed | self.unchanged))
+
+
+_current = ContextVar("response_cache_revalidation", default=None)
+
+
+@contextmanager
+def track_revalidation():
+    """
+    Record revalidation outcomes for the enclosed fetches. The object is
+    shared with tasks spawned inside (gather copies the context, not the
+    Revalidation), and with sync_to_async threads.
+    """
+    rv    = Revalidation()
+    token = _current.set(rv)
+    try:
+        yield rv
+    finally:
+        _current.reset(token)
+
+
+def _record(key, changed):
+    rv = _current.get()
+    if rv is not None:
+        rv.record(key, changed)
+
+
+def cache_key(platform, handle, endpoint) -> str:
+    return f"{_KEY_PREFIX}:{platform}:{handle.lower()}:{endpoint}"
+
+
+# ─── Cached response ──────────────────────────────────────────────────────────
+
+class CachedResponse:
+    """
+    One revalidated request. Usage:
+
+        cr = CachedResponse("codeforces", handle, "user.rating")
+        cr.load()
+        resp = session.get(url, headers=cr.request_headers())
+        if resp.status_code == 304: parsed = cr.not_modified()
+        else:                       parsed = cr.parse(resp.content, fn); cr.store(resp.headers)
+    """
+
+    def __init__(self, platform, handle, endpoint):
+        self.key      = cache_key(platform, handle, endpoint)
+        self.source   = (platform, handle, endpoint)
+        self.entry    = None
+        self._pending = None     # new entry to write, or "touch" to extend TTL
+        self._raw     = None     # (body, digest) to archive with the new entry
+
+    def load(self):
+        self.entry = cache.get(self.key)
+        return self
+
+    async def aload(self):
+        self.entry = await cache.aget(self.key)
+        return self
+
+    def request_headers(self, headers=None) -> dict:
+        out = dict(headers or {})
+        if self.entry:
+            if self.entry.get("etag"):
+                out["If-None-Match"] = self.entry["etag"]
+            if self.entry.get("last_modified"):
+                out["If-Modified-Since"] = self.entry["last_modified"]
+        return out
+
+    def not_modified(self):
+        """Handle a 304: the stored parse is still current."""
+        _record(self.key, changed=False)
+        self._pending = "touch"
+        return self.entry["parsed"]
+
+    def parse(self, body: bytes, parse):
+        """
+        Return parse(body), or the stored parse when body's digest matches.
+        A None result is an upstream error — nothing will be stored.
+        """
+        d = digest(body)
+        if self.entry and self.entry.get("digest") == d:
+            _record(self.key, changed=False)
+            self._pending = "touch"
+            return self.entry["parsed"]
+        parsed = parse(body)
+        if parsed is not None:
+            _record(self.key, changed=True)
+            self._pending = {"digest": d, "parsed": parsed}
+            self._raw     = (body, d)
+        return parsed
+
+    def _entry_to_store(self, resp_headers):
+        if self._pending is None:
+            return None
+        if self._pending == "touch":
+            if not resp_headers.get("ETag") and not resp_headers.get("Last-Modified"):
+                return "touch"
+            entry = dict(self.entry)
+        else:
+            entry = self._pending
+        entry["etag"]          = resp_headers.get("ETag")
+        entry["last_modified"] = resp_headers.get("Last-Modified")
+        return entry
+
+    def store(self, resp_headers):
+        entry = self._entry_to_store(resp_headers)
+        if entry == "touch":
+            cache.touch(self.key, _ttl())
+        elif entry is not None:
+            cache.set(self.key, entry, timeout=_ttl())
+        if self._raw:
+            archive(*self.source, *self._raw)
+
+    async def astore(self, resp_headers):
+        entry = self._entry_to_store(resp_headers)
+        if entry == "touch":
+            await cache.atouch(self.key, _ttl())
+        elif entry is not None:
+            await cache.aset(self.key, entry, timeout=_ttl())
+        if self._raw:
+            await sync_to_async(archive, thread_sensitive=False)(*self.source, *self._raw)
+
+
+# ─── One-call helpers ─────────────────────────────────────────────────────────
+
+def get_parsed(platform, handle, endpoint, url, parse, method="GET",
+               params=None, json=None, headers=None, timeout=10, remember=True):
+    """
+    Revalidated request through the shared requests session.
+    Returns (status, parsed) — parsed is None unless status is 200 or 304
+    and parse() accepted the body. Network errors propagate.
+    remember=False skips the cache entirely (one-off, large payloads).
+    """
+    cr = CachedResponse(platform, handle, endpoint)
+    if remember:
+        cr.load()
+    with track(host_of(url)) as call:
+        resp = get_sync_session().request(method, url, params=params, json=json,
+                                          headers=cr.request_headers(headers), timeout=timeout)
+        call.status = resp.status_code
+    if resp.status_code == 304 and cr.entry:
+        parsed = cr.not_modified()
+    elif resp.status_code == 200:
+        parsed = cr.parse(resp.content, parse) if remember else parse(resp.content)
+    else:
+        return resp.status_code, None
+    if remember:
+        cr.store(resp.headers)
+    return resp.status_code, parsed
+
+
+async def aget_parsed(platform, handle, endpoint, url, parse, method="GET",
+                      params=None, json=None, headers=None, timeout=10):
+    """Async twin of get_parsed() on the shared aiohttp session."""
+    cr = await CachedResponse(platform, handle, endpoint).aload()
+    session = get_async_session()
+    with track(host_of(url)) as call:
+        async with session.request(method, url, params=params, json=json,
+                                   headers=cr.request_headers(headers),
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+            call.status = resp.status
+            body = await resp.read() if resp.status == 200 else None
+            resp_headers = resp.headers
+    if resp.status == 304 and cr.entry:
+        parsed = cr.not_modified()
+    elif resp.status == 200:
+        parsed = cr.parse(body, parse)
+    else:
+        return resp.status, None
+    await cr.astore(resp_headers)
+    return resp.status, parsed
@@ -0,0 +1,284 @@
+# tracker/utils/single_flight.py
+"""
+Single-flight deduplication of concurrent fetches.
+
+A busy compare page can ask for the same user from the WebSocket consumer,
+two HTTP views and the coordinator at once. run() / run_async() make
+every concurrent caller for the same key share ONE execution:
+
+  • In-process — the first caller (the leader) registers a shared future
+    (async, per event loop) or a threading.Event (sync); later callers
+    simply wait for it.
+  • Cross-process — the leader also takes a Redis lease
+    (SET singleflight:lease:<key> NX PX). Callers elsewhere that find the
+    lease taken subscribe to singleflight:done:<key> and, once notified,
+    read the pickled result from singleflight:result:<key> — or, when a
+    `remote` loader is given, reload what the leader persisted instead.
+
+If the leader fails, its lease is released without a result and remote
+waiters run the fetch themselves. A lease that is never released (crashed
+worker) expires after `lease` seconds, which is also the longest a remote
+waiter will wait. Redis errors degrade to in-process deduplication only.
+
+Keys used by the fetchers:
+    user:<username>                 fetch_and_store_all
+    history:<username>              sync fetch_and_store_rating_history
+    platform:<Platform>:<handle>    one platform fetch (shared by sync + async)
+"""
+import asyncio
+import logging
+import pickle
+import threading
+import time
+import uuid
+import weakref
+from collections import defaultdict
+
+from tracker.utils.redis_conn import get_redis, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+PLATFORM_LEASE = 30      # seconds — one platform fetch, incl. rate-limit wait
+USER_LEASE     = 120     # seconds — a full four-platform refresh
+_RESULT_TTL    = 15      # seconds — only late-arriving waiters read it
+
+_LEASE   = "singleflight:lease:"
+_RESULT  = "singleflight:result:"
+_CHANNEL = "singleflight:done:"
+_DONE    = b"1"          # result marker when waiters use a `remote` loader
+
+# Delete the lease only if we still own it
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def platform_key(platform, handle):
+    return f"platform:{platform}:{(handle or '').lower()}"
+
+
+# ─── Metrics (per process) ────────────────────────────────────────────────────
+
+_metrics = defaultdict(int)
+_metrics_lock = threading.Lock()
+
+
+def _count(name):
+    with _metrics_lock:
+        _metrics[name] += 1
+
+
+def flight_stats() -> dict:
+    """Counters for the admin metrics endpoint."""
+    with _metrics_lock:
+        out = dict(_metrics)
+    out["in_flight_sync"]  = len(_calls)
+    out["in_flight_async"] = sum(len(f) for f in list(_futures.values()))
+    return out
+
+
+# ─── Sync ─────────────────────────────────────────────────────────────────────
+
+class _Call:
+    def __init__(self):
+        self.done   = threading.Event()
+        self.result = None
+        self.error  = None
+
+
+_calls      = {}                 # key -> _Call
+_calls_lock = threading.Lock()
+
+
+def run(key, fn, remote=None, lease=PLATFORM_LEASE):
+    """
+    Return fn(), sharing one execution among concurrent callers of `key`.
+    `remote` (optional, no args) rebuilds the result in a process that
+    waited on another process's leader; without it the result is pickled.
+    """
+    with _calls_lock:
+        call   = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        _count("joined_local")
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _run_distributed(key, fn, remote, lease)
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            _calls.pop(key, None)
+        call.done.set()
+
+
+def _run_distributed(key, fn, remote, lease):
+    token = uuid.uuid4().hex
+    try:
+        r   = get_redis()
+        got = r.set(_LEASE + key, token, nx=True, px=int(lease * 1000))
+        if got:
+            r.delete(_RESULT + key)
+    except Exception as e:
+        logger.warning(f"single_flight: Redis unavailable for {key} ({e}) — local only")
+        _count("leader")
+        return fn()
+
+    if got:
+        _count("leader")
+        ok = False
+        try:
+            result = fn()
+            ok = True
+        finally:
+            _finish(r, key, token, result if ok else None, ok, remote)
+        return result
+
+    data = _wait_remote(r, key, lease)
+    if data is None:
+        _count("remote_fallback")
+        return fn()
+    _count("joined_remote")
+    return remote() if remote else pickle.loads(data)
+
+
+def _finish(r, key, token, result, ok, remote):
+    try:
+        if ok:
+            payload = _DONE if remote else pickle.dumps(result)
+            r.set(_RESULT + key, payload, ex=_RESULT_TTL)
+        r.eval(_RELEASE_LUA, 1, _LEASE + key, token)
+        r.publish(_CHANNEL + key, b"1" if ok else b"0")
+    except Exception as e:
+        logger.warning(f"single_flight: could not publish {key}: {e}")
+
+
+def _wait_remote(r, key, lease):
+    """Wait for another process's leader; returns the stored result or None."""
+    pubsub = r.pubsub(ignore_subscribe_messages=True)
+    try:
+        pubsub.subscribe(_CHANNEL + key)
+        deadline = time.monotonic() + lease
+        while time.monotonic() < deadline:
+            data = r.get(_RESULT + key)
+            if data is not None:
+                return data
+            if not r.exists(_LEASE + key):
+                return None              # leader gave up without a result
+            pubsub.get_message(timeout=min(1.0, max(0.0, deadline - time.monotonic())))
+    except Exception as e:
+        logger.warning(f"single_flight: wait on {key} failed: {e}")
+    finally:
+        try:
+            pubsub.close()
+        except Exception:
+            pass
+    return None
+
+
+# ─── Async ────────────────────────────────────────────────────────────────────
+
+_futures = weakref.WeakKeyDictionary()   # loop -> {key: Future}
+
+
+async def run_async(key, fn, remote=None, lease=PLATFORM_LEASE):
+    """
+    Async twin of run(). `fn` and `remote` are zero-argument callables
+    returning awaitables.
+    """
+    loop    = asyncio.get_running_loop()
+    flights = _futures.setdefault(loop, {})
+    fut     = flights.get(key)
+    if fut is not None:
+        _count("joined_local")
+        return await asyncio.shield(fut)
+
+    fut = flights[key] = loop.create_future()
+    try:
+        result = await _run_distributed_async(key, fn, remote, lease)
+        fut.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        fut.cancel()
+        raise
+    except BaseException as e:
+        fut.set_exception(e)
+        fut.exception()          # retrieved — no "never retrieved" warning
+        raise
+    finally:
+        flights.pop(key, None)
+
+
+async def _run_distributed_async(key, fn, remote, lease):
+    token = uuid.uuid4().hex
+    try:
+        r   = get_async_redis()
+        got = await r.set(_LEASE + key, token, nx=True, px=int(lease * 1000))
+        if got:
+            await r.delete(_RESULT + key)
+    except Exception as e:
+        logger.warning(f"single_flight: Redis unavailable for {key} ({e}) — local only")
+        _count("leader")
+        return await fn()
+
+    if got:
+        _count("leader")
+        ok = False
+        try:
+            result = await fn()
+            ok = True
+        finally:
+            await _finish_async(r, key, token, result if ok else None, ok, remote)
+        return result
+
+    data = await _wait_remote_async(r, key, lease)
+    if data is None:
+        _count("remote_fallback")
+        return await fn()
+    _count("joined_remote")
+    return await remote() if remote else pickle.loads(data)
+
+
+async def _finish_async(r, key, token, result, ok, remote):
+    try:
+        if ok:
+            payload = _DONE if remote else pickle.dumps(result)
+            await r.set(_RESULT + key, payload, ex=_RESULT_TTL)
+        await r.eval(_RELEASE_LUA, 1, _LEASE + key, token)
+        await r.publish(_CHANNEL + key, b"1" if ok else b"0")
+    except Exception as e:
+        logger.warning(f"single_flight: could not publish {key}: {e}")
+
+
+async def _wait_remote_async(r, key, lease):
+    pubsub = r.pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(_CHANNEL + key)
+        deadline = time.monotonic() + lease
+        while time.monotonic() < deadline:
+            data = await r.get(_RESULT + key)
+            if data is not None:
+                return data
+            if not await r.exists(_LEASE + key):
+                return None
+            await pubsub.get_message(timeout=min(1.0, max(0.0, deadline - time.monotonic())))
+    except Exception as e:
+        logger.warning(f"single_flight: wait on {key} failed: {e}")
+    finally:
+        try:
+            await pubsub.aclose()
+        except Exception:
+            pass
+    return None
@@ -0,0 +1,157 @@
+# tracker/utils/stale_while_revalidate.py
+"""
+Stale-while-revalidate for the stats views.
+
+The views cache a user's rendered history under rating_history_<username>,
+and Redis (allkeys-lru) evicts that key often. On a miss the views used to
+block on four upstream APIs. Instead:
+
+  • the view renders the stored rating history straight from Mongo;
+  • if that data is older than `max_age`, or the handles changed since it
+    was fetched, the response is marked stale and a refresh is scheduled —
+    on the fetch job queue when FETCH_QUEUE_ENABLED, otherwise as a
+    background task on the server's event loop;
+  • when the refresh finishes, the new stats are pushed to the
+    stats_<username> channel group, where StatsConsumer forwards them to
+    the open page.
+
+Fresh data is cached again (tracker/utils/history_codec.py) for at most
+`max_age`, so the next view is a cache hit and a hit is never older than
+the stored stats could be while still counting as fresh. Every
+store_history() write re-caches the merged history, so background
+refreshes show up on the next view. Views never fetch upstream or write inline — the
+refresh (fetch_and_store_all) resolves the profile's handles and
+persists with handles_hash.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from tracker.models import UserProfile, UserStats
+from tracker.utils import history_codec, history_store
+from tracker.utils.analytics import peaks
+from tracker.utils.fetch_queue import VIEW_PRIORITY, aenqueue, queue_enabled
+
+logger = logging.getLogger(__name__)
+
+_DEFAULTS = {
+    "enabled": True,
+    "max_age": 15 * 60,      # seconds stored stats count as fresh
+}
+
+
+def config() -> dict:
+    return {**_DEFAULTS, **getattr(settings, "STALE_WHILE_REVALIDATE", {})}
+
+
+def is_fresh(stats) -> bool:
+    """Stored stats are recent and were fetched for the current handles."""
+    if stats is None or not stats.last_updated:
+        return False
+    if stats.last_updated < datetime.utcnow() - timedelta(seconds=config()["max_age"]):
+        return False
+    profile = UserProfile.objects(username=stats.username).first()
+    return profile is None or not stats.is_stale(profile)
+
+
+# ─── Background refresh ───────────────────────────────────────────────────────
+
+_running = {}                    # username -> Task (this process)
+
+
+async def schedule_refresh(username: str):
+    """Refresh `username` off the request path; a running refresh is reused."""
+    if queue_enabled():
+        await aenqueue(username, priority=VIEW_PRIORITY)
+        return
+    if username in _running:
+        return
+    task = asyncio.create_task(_refresh_and_push(username))
+    _running[username] = task
+    task.add_done_callback(lambda _: _running.pop(username, None))
+
+
+async def _refresh_and_push(username: str):
+    from tracker.utils.fetch_coordinator import fetch_and_store_all
+
+    try:
+        await fetch_and_store_all(username)
+    except Exception as e:
+        logger.error(f"background refresh of {username} failed: {e}")
+        return
+    stats = await sync_to_async(UserStats.objects(username=username).summary().first)()
+    if stats:
+        history = await sync_to_async(history_store.load)(username)
+        await sync_to_async(history_codec.store)(username, history, timeout=config()["max_age"])
+    await push_refreshed(username, stats)
+
+
+def refreshed_payload(stats, history=None) -> dict:
+    """What StatsConsumer sends: the same user1 shape as its initial data."""
+    if history is None:
+        history = history_store.load(stats.username)
+    history = sorted((h.to_dict() for h in history), key=lambda h: h["date"] or "")
+    lc      = [h for h in history if h["platform"] == "LeetCode"]
+    return {
+        "type": "stats_refreshed",
+        "user1": {
+            "username":          stats.username,
+            "codeforces_rating": stats.codeforces_rating or 0,
+            "leetcode_solved":   stats.leetcode_solved or 0,
+            "leetcode_rating":   peaks(lc).get("LeetCode", 0),
+            "leetcode_contests": len(lc),
+            "codechef_rating":   stats.codechef_rating or 0,
+            "atcoder_rating":    stats.atcoder_rating or 0,
+            "rating_history":    history,
+            "status":            "fresh",
+            "last_updated":      stats.last_updated.isoformat() if stats.last_updated else None,
+        },
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+async def push_refreshed(username: str, stats=None):
+    """Send the stored stats of `username` to its open stats pages."""
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    if stats is None:
+        stats = await sync_to_async(UserStats.objects(username=username).summary().first)()
+    if stats is None:
+        return
+    try:
+        payload = await sync_to_async(refreshed_payload)(stats)
+        await layer.group_send(f"stats_{username}", {"type": "stats.refreshed", "payload": payload})
+    except Exception as e:
+        logger.warning(f"stats push for {username} failed: {e}")
+
+
+# ─── View entry point ─────────────────────────────────────────────────────────
+
+async def aload_history(username: str, stats):
+    """
+    History for a view whose rating_history_ cache entry is missing: the
+    stored history, never an inline fetch. Returns (history, lc_solved,
+    stale); a stale result has a refresh scheduled. With `enabled` off,
+    every miss schedules one.
+    """
+    history   = await sync_to_async(history_store.load)(username) if stats else []
+    lc_solved = stats.leetcode_solved if stats else 0
+    if config()["enabled"] and await sync_to_async(is_fresh)(stats):
+        await sync_to_async(history_codec.store)(username, history, timeout=config()["max_age"])
+        return history, lc_solved, False
+    await schedule_refresh(username)
+    return history, lc_solved, True
+
+
+def load_history(username: str, stats):
+    """
+    aload_history() for sync views. Under ASGI their thread hands the
+    coroutine back to the server's event loop, so a background refresh
+    outlives the request.
+    """
+    return async_to_sync(aload_history)(username, stats)
@@ -0,0 +1,171 @@
+# tracker/utils/stats_events.py
+"""
+"Stats updated" events over the channel layer.
+
+Whatever persists new stats — history_sync.store_history (every
+fetch_and_store_all / sync fetch), the bulk refreshers and contest
+ingestion — publishes only what changed:
+
+    group stats_<username>:
+        {"type": "stats.updated", "username": …,
+         "fields":   {summary field: new value, …},   # changed ones only
+         "inserted": [RatingHistory.to_dict(), …],    # new entries
+         "updated":  [RatingHistory.to_dict(), …],    # new values of stored entries
+         "removed":  [RatingHistory.to_dict(), …]}    # entries no longer stored
+
+Entries are identified by (platform, contest, date), as in
+tracker/utils/history_merge.py. StatsConsumer forwards the event to the
+open pages, which patch their summary and upsert / delete those entries
+instead of re-requesting everything.
+
+Changes to leaderboard fields update the users' materialized leaderboard
+rows (tracker/utils/leaderboard.py) and mark them in the Redis set
+leaderboard:dirty. The first publisher to find no flush pending takes
+leaderboard:flush (SET NX PX window) and, `window` seconds later, sends
+ONE "leaderboard.ranks" message with the fresh rows and ranks of every
+user marked meanwhile to the "leaderboard" group — so a bulk refresh of a
+thousand users costs the leaderboard sockets a single update.
+
+Publishing is best effort: a failure is logged, never raised into the
+writer.
+"""
+import asyncio
+import logging
+import threading
+from datetime import datetime
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from tracker.models import LeaderboardEntry
+from tracker.utils.leaderboard import WEIGHTS, rank_of, sync_rows
+from tracker.utils.redis_conn import get_redis
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = ("codeforces_rating", "leetcode_solved", "codechef_rating", "atcoder_rating")
+LEADERBOARD_GROUP = "leaderboard"
+
+_DIRTY = "leaderboard:dirty"
+_FLUSH = "leaderboard:flush"
+
+
+def _window() -> float:
+    return getattr(settings, "LEADERBOARD_PUSH_WINDOW", 2.0)
+
+
+def summary_of(stats) -> dict:
+    """Current summary fields of a UserStats (zeros for None)."""
+    return {f: (getattr(stats, f, 0) or 0) if stats else 0 for f in SUMMARY_FIELDS}
+
+
+def changed_fields(before: dict, after: dict) -> dict:
+    return {f: after[f] for f in SUMMARY_FIELDS if f in after and after[f] != before.get(f, 0)}
+
+
+_sending = set()                 # fire-and-forget sends from async callers
+
+
+def _group_send(group, message):
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        async_to_sync(layer.group_send)(group, message)
+        return
+    # Called from async code: don't block the loop on the send
+    task = asyncio.ensure_future(layer.group_send(group, message))
+    _sending.add(task)
+    task.add_done_callback(_sending.discard)
+
+
+def _dicts(entries) -> list:
+    return [e.to_dict() if hasattr(e, "to_dict") else e for e in entries or []]
+
+
+def publish(username: str, fields: dict = None, inserted=None, updated=None, removed=None,
+            mark=True):
+    """
+    Tell stats_<username> subscribers what changed. `fields` holds the
+    changed summary fields; `inserted`, `updated` and `removed` are
+    RatingHistory objects or dicts. No-op when nothing changed. Bulk
+    writers pass mark=False and call mark_leaderboard() once for the
+    whole batch.
+    """
+    fields  = fields or {}
+    entries = {"inserted": _dicts(inserted), "updated": _dicts(updated), "removed": _dicts(removed)}
+    if not fields and not any(entries.values()):
+        return
+    try:
+        _group_send(f"stats_{username}", {
+            "type":     "stats.updated",
+            "username": username,
+            "fields":   fields,
+            **entries,
+            "at":       datetime.now().isoformat(),
+        })
+    except Exception as e:
+        logger.warning(f"stats event for {username} not published: {e}")
+    if mark and any(f in WEIGHTS for f in fields):
+        mark_leaderboard([username])
+
+
+# ─── Leaderboard coalescing ───────────────────────────────────────────────────
+
+def mark_leaderboard(usernames):
+    """
+    Update the leaderboard rows of `usernames` and queue their rank
+    updates; one flush per window goes out.
+    """
+    if not usernames:
+        return
+    try:
+        sync_rows(usernames)
+    except Exception as e:
+        logger.warning(f"leaderboard rows not updated: {e}")
+    window = _window()
+    try:
+        r = get_redis()
+        r.sadd(_DIRTY, *usernames)
+        if not r.set(_FLUSH, "1", nx=True, px=int(window * 1000)):
+            return                                  # a flush is already scheduled
+    except Exception as e:
+        logger.warning(f"leaderboard update not queued: {e}")
+        return
+    timer = threading.Timer(window, flush_leaderboard)
+    timer.daemon = False                            # a finishing command still flushes
+    timer.start()
+
+
+def flush_leaderboard() -> int:
+    """Send one coalesced rank update for every marked user; returns how many."""
+    try:
+        r    = get_redis()
+        pipe = r.pipeline()                         # MULTI: read and clear together
+        pipe.delete(_FLUSH)                         # marks from now on schedule the next flush
+        pipe.smembers(_DIRTY)
+        pipe.delete(_DIRTY)
+        _, members, _ = pipe.execute()
+    except Exception as e:
+        logger.warning(f"leaderboard flush failed: {e}")
+        return 0
+    dirty = {m.decode() for m in members}
+    if not dirty:
+        return 0
+
+    updates = [{**e.to_row(), "rank": rank_of(e.total_score)}
+               for e in LeaderboardEntry.objects(username__in=list(dirty))]
+    shown   = {u["username"] for u in updates}
+    try:
+        _group_send(LEADERBOARD_GROUP, {
+            "type":    "leaderboard.ranks",
+            "updates": updates,
+            "removed": sorted(dirty - shown),       # no longer visible (all zeros / opted out)
+            "size":    LeaderboardEntry.objects.count(),
+        })
+    except Exception as e:
+        logger.warning(f"leaderboard push failed: {e}")
+    return len(dirty)
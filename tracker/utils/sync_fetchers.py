@@ -3,114 +3,102 @@
 Upgraded:
   • selenium_scraper replaced with codechef_api.py
   • AtCoder added to both fetch functions
+  • Outbound calls go through the shared rate limiter; a platform that
+    gets ServeCached keeps its stored RatingHistory entries
 """
 from datetime import datetime
-import requests
-
 from tracker.models import UserStats, RatingHistory
+from tracker.utils import history_store
 from tracker.utils.codechef_api import fetch_codechef_contest_history
 from tracker.utils.atcoder import fetch_atcoder_history
+from tracker.utils.rate_limiter import ServeCached, acquire
+from tracker.utils.history_sync import codeforces_entries, store_history
+from tracker.utils.leetcode_graphql import (
+    LEETCODE_GRAPHQL, headers as lc_headers, profile_query, parse_profile_body,
+)
+from tracker.utils.codeforces import CF_RATING_URL, parse_api_result
+from tracker.utils.response_cache import get_parsed
+from tracker.utils.single_flight import run, platform_key, USER_LEASE
 
 
 def fetch_codeforces_sync(username):
-    try:
-        r = requests.get(
-            f"https://codeforces.com/api/user.rating?handle={username}",
-            timeout=10
-        )
-        r.raise_for_status()
-        data = r.json()
-        if data["status"] != "OK":
-            return []
-        return data["result"]
-    except Exception as e:
-        print(f"Codeforces sync error ({username}): {e}")
-        return []
-
-
-def fetch_leetcode_solved_sync(username):
-    url   = "https://leetcode.com/graphql/"
-    query = {
-        "query": """query getUserProfile($username: String!) {
-            matchedUser(username: $username) {
-                submitStats: submitStatsGlobal { acSubmissionNum { difficulty count } }
-            }
-        }""",
-        "variables": {"username": username}
-    }
-    headers = {"Content-Type": "application/json",
-               "Referer": f"https://leetcode.com/{username}/",
-               "User-Agent": "Mozilla/5.0"}
-    try:
-        r    = requests.post(url, json=query, headers=headers, timeout=10)
-        data = r.json()
-        mu   = data.get("data", {}).get("matchedUser")
-        if not mu:
-            return 0
-        all_entry = next(
-            (i for i in mu["submitStats"]["acSubmissionNum"] if i["difficulty"] == "All"),
-            None
-        )
-        return all_entry["count"] if all_entry else 0
-    except Exception as e:
-        print(f"LeetCode solved sync error ({username}): {e}")
-        return 0
+    """Rated rounds of `username`. Errors propagate — _or_stored keeps the stored entries."""
+    acquire("codeforces.com")
+    _, result = get_parsed("codeforces", username, "user.rating", CF_RATING_URL,
+                           parse_api_result, params={"handle": username})
+    return result or []
 
 
 def fetch_leetcode_sync(username):
-    url   = "https://leetcode.com/graphql/"
-    query = {
-        "operationName": "userContestRankingInfo",
-        "query": """query userContestRankingInfo($username: String!) {
-            userContestRankingHistory(username: $username) {
-                attended rating ranking
-                contest { title startTime }
-            }
-        }""",
-        "variables": {"username": username}
-    }
-    headers = {"Content-Type": "application/json",
-               "Referer": f"https://leetcode.com/{username}/",
-               "User-Agent": "Mozilla/5.0"}
+    """Solved count and contest history in one GraphQL round trip."""
+    acquire("leetcode.com")
+    _, result = get_parsed("leetcode", username, "profile", LEETCODE_GRAPHQL,
+                           parse_profile_body, method="POST",
+                           json=profile_query(username), headers=lc_headers(username))
+    return result or (0, [])
+
+
+def _or_stored(platform, fn, handle, empty, skipped):
+    """
+    Call fn(handle) once per (platform, handle) across concurrent callers;
+    on ServeCached or a fetch error, mark the platform skipped and return
+    `empty` — its stored entries are kept, never replaced by an empty list.
+    """
     try:
-        r    = requests.post(url, json=query, headers=headers, timeout=10)
-        data = r.json()
-        if "errors" in data or not data.get("data"):
-            return fetch_leetcode_solved_sync(username), []
-
-        history = []
-        for e in data["data"].get("userContestRankingHistory", []):
-            if not e["attended"]:
-                continue
-            dt = datetime.fromtimestamp(e["contest"]["startTime"])
-            history.append({
-                "contest":    e["contest"]["title"],
-                "rank":       int(e.get("ranking", 0)),
-                "old_rating": 0,
-                "new_rating": int(e["rating"]),
-                "date":       dt.strftime("%Y-%m-%d %H:%M:%S"),
-            })
-        return fetch_leetcode_solved_sync(username), history
+        return run(platform_key(platform, handle), lambda: fn(handle))
+    except ServeCached as e:
+        print(f"[sync] {platform} skipped — {e}")
     except Exception as e:
-        print(f"LeetCode sync error ({username}): {e}")
-        return fetch_leetcode_solved_sync(username), []
+        print(f"[sync] {platform} error ({handle}), keeping stored entries: {e}")
+    skipped.add(platform)
+    return empty
 
 
-def fetch_and_store_rating_history(
+def fetch_and_store_rating_history(username, **kwargs):
+    """
+    Single-flight wrapper: concurrent callers for the same username share
+    one fetch. Callers in other processes reload what the leader stored.
+    Arguments as for _fetch_and_store_rating_history().
+    """
+    key = (f"history:{username}:{kwargs.get('cf_since', 0)}:{kwargs.get('include_atcoder', True)}"
+           f":{kwargs.get('store', True)}")
+    return run(key, lambda: _fetch_and_store_rating_history(username, **kwargs),
+               remote=lambda: _stored_history(username), lease=USER_LEASE)
+
+
+def _stored_history(username):
+    stats = UserStats.objects(username=username).only("leetcode_solved").first()
+    if not stats:
+        return [], 0
+    return history_store.load(username), stats.leetcode_solved or 0
+
+
+def _fetch_and_store_rating_history(
     username,
     include_atcoder=True,
     cf_handle=None,
     lc_handle=None,
     cc_handle=None,
     ac_handle=None,
+    cf_since=0,
+    handles_hash=None,
+    store=True,
+    skipped=None,
 ):
     """
     Synchronous full fetch: CF + CC (API) + LC + AtCoder.
-    Stores to MongoDB. Returns (history, lc_solved).
+    Stores to MongoDB (store=False leaves that to the caller, as
+    fetch_coordinator does). Returns (history, lc_solved).
 
     Handles are passed in explicitly by fetch_coordinator — this function
     no longer queries UserProfile itself. Fallback to username only if
     called directly without handles (e.g. tests or scripts).
+
+    cf_since > 0 (passed by fetch_coordinator) syncs Codeforces
+    incrementally; when stored, the returned history is still the complete
+    merged list. handles_hash is written with the stats — without it a
+    handle change is not recognised and the old entries are kept.
+    Platforms that could not be fetched are added to `skipped`, if given.
     """
     cf_handle = cf_handle or username
     lc_handle = lc_handle or username
@@ -120,21 +108,14 @@ def fetch_and_store_rating_history(
     print(f"[sync] fetching rating history for {username}")
     print(f"[sync] handles — CF:{cf_handle} LC:{lc_handle} CC:{cc_handle} AC:{ac_handle}")
     history = []
+    skipped = set() if skipped is None else skipped
 
     # Codeforces
-    for e in fetch_codeforces_sync(cf_handle):
-        try:
-            dt = datetime.fromtimestamp(e["ratingUpdateTimeSeconds"])
-            history.append(RatingHistory(
-                platform="Codeforces", contest=e["contestName"],
-                rank=e["rank"], old_rating=e["oldRating"], new_rating=e["newRating"],
-                date=dt, change=e["newRating"] - e["oldRating"]
-            ))
-        except (KeyError, ValueError):
-            pass
+    cf_data = _or_stored("Codeforces", fetch_codeforces_sync, cf_handle, [], skipped)
+    history.extend(codeforces_entries(cf_data, since=cf_since))
 
     # CodeChef (API-based)
-    for e in fetch_codechef_contest_history(cc_handle):
+    for e in _or_stored("CodeChef", fetch_codechef_contest_history, cc_handle, [], skipped):
         try:
             dt = datetime.strptime(e["date"], "%Y-%m-%d %H:%M:%S")
             history.append(RatingHistory(
@@ -146,7 +127,7 @@ def fetch_and_store_rating_history(
             pass
 
     # LeetCode
-    lc_solved, lc_hist = fetch_leetcode_sync(lc_handle)
+    lc_solved, lc_hist = _or_stored("LeetCode", fetch_leetcode_sync, lc_handle, (0, []), skipped)
     for e in lc_hist:
         try:
             dt = datetime.strptime(e["date"], "%Y-%m-%d %H:%M:%S")
@@ -160,7 +141,7 @@ def fetch_and_store_rating_history(
 
     # AtCoder
     if include_atcoder:
-        ac_hist, _ = fetch_atcoder_history(ac_handle)
+        ac_hist, _ = _or_stored("AtCoder", fetch_atcoder_history, ac_handle, ([], 0), skipped)
         for e in ac_hist:
             try:
                 dt = datetime.strptime(e["date"], "%Y-%m-%d %H:%M:%S")
@@ -172,19 +153,21 @@ def fetch_and_store_rating_history(
             except (KeyError, ValueError):
                 pass
 
-    # Persist
+    # Platforms skipped (rate limiter, fetch error) keep what is already stored
+    if skipped:
+        stored = UserStats.objects(username=username).summary().first()
+        if stored:
+            history.extend(stored.history_for(skipped))
+            if "LeetCode" in skipped:
+                lc_solved = stored.leetcode_solved or 0
+
+    if not store:
+        return history, lc_solved
+
+    # Persist (incremental for Codeforces when cf_since > 0)
     try:
-        user = UserStats.objects(username=username).first() or UserStats(username=username)
-        user.rating_history   = history
-        user.leetcode_solved  = lc_solved
-        user.codeforces_rating = max(
-            (h.new_rating for h in history if h.platform == "Codeforces"), default=0)
-        user.codechef_rating  = max(
-            (h.new_rating for h in history if h.platform == "CodeChef"), default=0)
-        user.atcoder_rating   = max(
-            (h.new_rating for h in history if h.platform == "AtCoder"), default=0)
-        user.last_updated = datetime.utcnow()
-        user.save()
+        history, _ = store_history(username, history, lc_solved,
+                                   cf_since=cf_since, handles_hash=handles_hash)
         print(f"[sync] stored {len(history)} entries for {username}")
     except Exception as e:
         print(f"[sync] store error: {e}")
@@ -200,7 +183,7 @@ def fetch_and_store_user_stats(username):
         return cached
 
     history, lc_solved = fetch_and_store_rating_history(username)
-    user = UserStats.objects(username=username).first()
+    user = UserStats.objects(username=username).summary().first()
     if user:
         cache.set(cache_key, user, timeout=3600)
     return user
\ No newline at end of file
@@ -6,6 +6,8 @@ Routes (add to urls.py):
   path('admin-panel/',        admin_panel_view,     name='admin_panel'),
   path('admin-panel/set-role/', set_user_role_view, name='set_user_role'),
   path('admin-panel/delete-user/', delete_user_view, name='delete_user'),
+  path('admin-panel/metrics/',     fetcher_metrics_view, name='fetcher_metrics'),
+  path('admin-panel/cohort/',      cohort_view,          name='cohort'),
 """
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
@@ -13,6 +15,8 @@ from django.http import JsonResponse
 from django.contrib import messages
 from django.contrib.auth.models import User as DjangoUser
 from tracker.models import UserProfile, UserStats
+from tracker.utils import history_store
+from tracker.utils.stats_events import mark_leaderboard
 
 
 def _require_admin(view_fn):
@@ -35,7 +39,7 @@ def _require_admin(view_fn):
 def admin_panel_view(request):
     """List all users with their roles and stats."""
     all_profiles = UserProfile.objects.all()
-    all_stats    = {s.username: s for s in UserStats.objects.all()}
+    all_stats    = {s.username: s for s in UserStats.objects.summary()}
 
     rows = []
     for profile in all_profiles:
@@ -110,8 +114,45 @@ def delete_user_view(request):
 
     UserStats.objects(username=username).delete()
     UserProfile.objects(username=username).delete()
+    history_store.delete_user(username)
+    mark_leaderboard([username])
 
     # Also delete Django User if present
     DjangoUser.objects.filter(username=username).delete()
 
     return JsonResponse({"ok": True, "deleted": username})
+
+
+@login_required
+@_require_admin
+def fetcher_metrics_view(request):
+    """JSON snapshot of outbound fetcher health (HTTP pools, rate limits, dedup, breakers, job queue, raw archive, writes, full loads)."""
+    from tracker.utils.http_clients import pool_stats
+    from tracker.utils.rate_limiter import limiter_stats
+    from tracker.utils.single_flight import flight_stats
+    from tracker.utils.circuit_breaker import snapshot as breaker_snapshot
+    from tracker.utils.fetch_queue import queue_stats
+    from tracker.utils.raw_archive import archive_stats
+    from tracker.utils.persistence import write_stats
+    from tracker.utils.query_audit import audit_stats
+    return JsonResponse({
+        "http_pools":       pool_stats(),
+        "rate_limits":      limiter_stats(),
+        "single_flight":    flight_stats(),
+        "circuit_breakers": breaker_snapshot(),
+        "fetch_queue":      queue_stats(),
+        "raw_archive":      archive_stats(),
+        "writes":           write_stats(),
+        "full_loads":       audit_stats(),
+    })
+
+
+@login_required
+@_require_admin
+def cohort_view(request):
+    """Per-platform rating distribution of ?users=a,b,c (default: every tracked user)."""
+    from tracker.utils.analytics import cohort
+    users = [u for u in request.GET.get("users", "").split(",") if u.strip()]
+    if not users:
+        users = [p.username for p in UserProfile.objects.only("username")]
+    return JsonResponse(cohort([u.strip() for u in users]))
@@ -1,9 +1,8 @@
 # tracker/views/api_views.py  — Selenium removed
-import asyncio
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from tracker.models import UserStats
-from tracker.utils.contest_tracker import fetch_all_async
+from tracker.utils.stale_while_revalidate import load_history
 from tracker.utils.codeforces import fetch_codeforces_rating_history
 from tracker.utils.codechef_api import fetch_codechef_contest_history  # ← no more Selenium
 
@@ -18,28 +17,20 @@ def get_suggestions(request):
 
 @login_required
 def fetch_all_contest_history_view(request, username):
+    """
+    Stored contest history of `username`, grouped by platform. Read-only:
+    stale stats get a background refresh (tracker/utils/stale_while_revalidate.py),
+    which resolves the profile's handles and merges through store_history.
+    """
     try:
-        data = asyncio.run(fetch_all_async(username))
-        rating_history = []
-        for platform, contests in data.items():
-            if not isinstance(contests, list):
-                continue
-            for contest in contests:
-                rating_history.append({
-                    "platform":   platform.capitalize(),
-                    "contest":    contest.get("contestName") or contest.get("contest") or "Unknown",
-                    "rank":       contest.get("rank", 0),
-                    "new_rating": contest.get("newRating")  or contest.get("new_rating", 0),
-                    "old_rating": contest.get("oldRating", 0),
-                    "change":     contest.get("ratingChange") or contest.get("change", 0),
-                    "date":       contest.get("date", ""),
-                })
-
-        if rating_history:
-            UserStats.objects(username=username).update_one(
-                set__rating_history=rating_history, upsert=True)
-
-        return JsonResponse({"status": "success", "data": data}, safe=False)
+        stats = UserStats.objects(username=username).summary().first()
+        if not stats:
+            return JsonResponse({"status": "error", "message": "User not found"}, status=404)
+        history, _, stale = load_history(username, stats)
+        data = {}
+        for h in history:
+            data.setdefault(h.platform, []).append(h.to_dict())
+        return JsonResponse({"status": "success", "data": data, "stale": stale}, safe=False)
     except Exception as e:
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
@@ -64,7 +55,7 @@ def fetch_codechef_history_view(request, username):
 
 def test_db_connection(request):
     try:
-        users = UserStats.objects.all()
+        users = UserStats.objects.ratings()
         return JsonResponse({
             "status": "success",
             "users": [{"username": u.username, "rating": u.codeforces_rating} for u in users]
@@ -81,7 +81,7 @@ def signup_view(request):
             UserProfile.get_or_create(user.username)
             # Create a UserStats entry in MongoDB so they appear on leaderboard
             from tracker.models import UserStats
-            if not UserStats.objects(username=user.username).first():
+            if not UserStats.objects(username=user.username).only('username').first():
                 UserStats(username=user.username).save()
             login(request, user)
 
@@ -114,7 +114,7 @@ def login_view(request):
             profile = UserProfile.get_or_create(user.username)
             # Ensure UserStats exists in MongoDB (covers pre-existing users)
             from tracker.models import UserStats
-            if not UserStats.objects(username=user.username).first():
+            if not UserStats.objects(username=user.username).only('username').first():
                 UserStats(username=user.username).save()
 
             if user.email and not cache.get(f"email_verified_{user.username}"):
@@ -7,8 +7,9 @@ from django.http import JsonResponse
 from django.contrib.auth.models import User
 from mongoengine import Document, StringField
 import json
-from tracker.utils.sync_fetchers import fetch_and_store_rating_history
+from tracker.utils.stale_while_revalidate import load_history
 from tracker.models import UserStats
+from tracker.utils import history_store
 
 class SavedComparison(Document):
     username = StringField(required=True)
@@ -18,7 +19,7 @@ class SavedComparison(Document):
 def validate_user(username):
     """Validate if a user exists and has valid ratings."""
     # Check MongoDB UserStats first (works even if Django DB was reset)
-    user = UserStats.objects(username=username).first()
+    user = UserStats.objects(username=username).ratings().first()
 
     # Also accept if Django user exists but has no stats yet
     django_exists = User.objects.filter(username=username).exists()
@@ -38,7 +39,7 @@ def validate_user(username):
         (user.codeforces_rating and user.codeforces_rating > 0) or
         (user.leetcode_solved and user.leetcode_solved > 0) or
         (user.codechef_rating and user.codechef_rating > 0) or
-        any(rating.new_rating > 0 for rating in user.rating_history if hasattr(rating, 'new_rating'))
+        any((h.new_rating or 0) > 0 for h in history_store.load(user.username))
     )
 
     if not has_valid_ratings:
@@ -113,12 +114,10 @@ def compare_stats_api(request):
         if not u1 or not u2:
             return JsonResponse({'error': 'Both usernames required'}, status=400)
 
-        from tracker.utils.sync_fetchers import fetch_and_store_rating_history
-
         def build_user_data(username):
-            history, lc_solved = fetch_and_store_rating_history(username)
+            stats = UserStats.objects(username=username).summary().first()
+            history, lc_solved, _ = load_history(username, stats)
             rating_history = [h.to_dict() for h in history] if history else []
-            stats = UserStats.objects(username=username).first()
             lc_history = [h for h in rating_history if h.get('platform') == 'LeetCode']
             lc_rating = max((h.get('new_rating', 0) for h in lc_history), default=None)
             return {
@@ -141,7 +140,7 @@ def compare_stats_api(request):
 @login_required
 def compare_stats(request):
    username = request.user.username
-   stats = UserStats.objects(username=username).first()
+   stats = UserStats.objects(username=username).summary().first()
    if not stats:
        return render(request, 'tracker/compare.html', {
            'message': 'User stats not found. Please ensure your profile is set up correctly.',
@@ -154,7 +153,7 @@ def compare_stats(request):
    user_data = {}
    if not cached_data:
        try:
-           history, leetcode_solved = fetch_and_store_rating_history(username)
+           history, leetcode_solved, _ = load_history(username, stats)
            rating_history = [h.to_dict() for h in history] if history else []
            leetcode_history = [h for h in rating_history if h.get('platform') == 'LeetCode']
            leetcode_rating = max(
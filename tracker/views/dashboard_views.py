@@ -8,7 +8,7 @@ def dashboard_view(request):
     user_stats = None
     if request.user.is_authenticated:
         try:
-            user_stats = UserStats.objects(username=request.user.username).first()
+            user_stats = UserStats.objects(username=request.user.username).summary().first()
         except UserStats.DoesNotExist:
             user_stats = None
     context = {
@@ -17,10 +17,11 @@ from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse, Http404
 from django.shortcuts import get_object_or_404
 from tracker.models import UserStats, UserProfile
+from tracker.utils import history_store
 
 
 def _get_stats_or_404(username):
-    stats = UserStats.objects(username=username).first()
+    stats = UserStats.objects(username=username).summary().first()
     if not stats:
         raise Http404("User stats not found.")
     return stats
@@ -29,7 +30,7 @@ def _get_stats_or_404(username):
 def _history_rows(stats):
     """Return sorted rating history as list of dicts."""
     rows = []
-    for h in stats.rating_history:
+    for h in history_store.load(stats.username):
         rows.append({
             "platform":   h.platform or "",
             "contest":    h.contest  or "",
@@ -1,54 +1,32 @@
 # tracker/views/leaderboard_views.py
 import json
+from django.http import JsonResponse
 from django.shortcuts import render
-from tracker.models import UserStats, UserProfile
+from tracker.utils.leaderboard import PER_PAGE, ensure_built, page
 
 
-def leaderboard_view(request):
-    user_stats = UserStats.objects.all()
-    leaderboard_data = []
-
-    # Build a set of opted-out usernames (only exclude explicit opt-outs)
-    try:
-        opted_out = set(
-            p.username for p in UserProfile.objects(show_on_leaderboard=False)
-        )
-    except Exception:
-        opted_out = set()
-
-    for stats in user_stats:
-        # Skip only if explicitly opted out — users without a profile are visible
-        if stats.username in opted_out:
-            continue
-
-        # Skip users with zero ratings across all platforms (placeholder entries)
-        cf  = stats.codeforces_rating or 0
-        lc  = stats.leetcode_solved   or 0
-        cc  = stats.codechef_rating   or 0
-        ac  = getattr(stats, 'atcoder_rating', 0) or 0
+def _page_from(params):
+    return page(
+        number=params.get("page", 1) if str(params.get("page", 1)).isdigit() else 1,
+        per_page=params.get("per_page", PER_PAGE) if str(params.get("per_page", "")).isdigit() else PER_PAGE,
+        sort=params.get("sort", "total_score"),
+        ascending=params.get("order") == "asc",
+        query=params.get("q", "").strip()[:50],
+    )
 
-        if cf == 0 and lc == 0 and cc == 0 and ac == 0:
-            continue
 
-        total_score = round(
-            (float(cf) * 0.35) +
-            (float(lc) * 0.15) +
-            (float(cc) * 0.25) +
-            (float(ac) * 0.25),
-            1
-        )
-        leaderboard_data.append({
-            'username':          stats.username,
-            'codeforces_rating': cf,
-            'leetcode_solved':   lc,
-            'codechef_rating':   cc,
-            'atcoder_rating':    ac,
-            'total_score':       total_score,
-        })
-
-    leaderboard_data.sort(key=lambda x: x['total_score'], reverse=True)
+def leaderboard_view(request):
+    # Rows come precomputed from the leaderboard collection; users with zero
+    # ratings and explicit opt-outs have none — see tracker/utils/leaderboard.py
+    ensure_built()
+    first_page = _page_from(request.GET)
 
     return render(request, 'tracker/leaderboard.html', {
-        'leaderboard_data':      leaderboard_data,
-        'leaderboard_data_json': json.dumps(leaderboard_data),
+        'leaderboard_data':      first_page["rows"],
+        'leaderboard_data_json': json.dumps(first_page),
     })
+
+
+def leaderboard_page_view(request):
+    """JSON page of the leaderboard: ?page=&per_page=&sort=&order=asc|desc&q="""
+    return JsonResponse(_page_from(request.GET))
@@ -11,6 +11,8 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.core.cache import cache
 from tracker.models import UserProfile, UserStats, AVATAR_COLORS
+from tracker.utils.refresh_scheduler import request_refresh
+from tracker.utils.stats_events import mark_leaderboard
 
 
 @login_required
@@ -26,7 +28,7 @@ def profile_view(request):
         return redirect("tracker:profile")
 
     profile = UserProfile.get_or_create(target_username)
-    stats   = UserStats.objects(username=target_username).first()
+    stats   = UserStats.objects(username=target_username).summary().first()
 
     if request.method == "POST" and (own_profile or my_profile.is_admin):
         cf_handle  = request.POST.get("codeforces_handle", "").strip()[:50]
@@ -52,8 +54,11 @@ def profile_view(request):
         profile.atcoder_handle      = ac_handle
         profile.bio                 = bio
         profile.avatar_color        = color
+        toggled = profile.show_on_leaderboard != on_board
         profile.show_on_leaderboard = on_board
         profile.save()
+        if toggled:
+            mark_leaderboard([target_username])   # add / drop the leaderboard row
 
         # Bust caches so next page load fetches fresh data
         for key in (f"rating_history_{target_username}",
@@ -62,6 +67,10 @@ def profile_view(request):
                     f"codechef_history_{cc_handle or target_username}"):
             cache.delete(key)
 
+        # New handles → let the background scheduler fetch them right away
+        if stats is None or stats.is_stale(profile):
+            request_refresh(target_username)
+
         messages.success(request, "✅ Profile saved!")
         return redirect(f"/profile/?user={target_username}" if not own_profile
                         else "tracker:profile")
@@ -2,11 +2,13 @@
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_GET
 from django.shortcuts import render, redirect
-from django.core.cache import cache
 from asgiref.sync import sync_to_async
-from tracker.models import UserStats, RatingHistory
-from tracker.utils.async_fetchers import fetch_and_store_rating_history_async
-from tracker.utils.sync_fetchers import fetch_and_store_rating_history
+from tracker.models import UserStats
+from tracker.utils.circuit_breaker import platform_status, unavailable_platforms
+from tracker.utils.refresh_scheduler import anote_activity, note_activity
+from tracker.utils.stale_while_revalidate import aload_history, load_history
+from tracker.utils import history_codec
+from tracker.utils.analytics import peaks, user_analytics
 from datetime import datetime
 from django.http import JsonResponse
 from django.utils.decorators import method_decorator
@@ -31,6 +33,25 @@ def async_login_required(view):
     return wrapped
 
 
+def _history_rows(history):
+    """Cached dicts or stored RatingHistory → the entry dicts the pages render, oldest first."""
+    rows = []
+    for entry in history or []:
+        if not isinstance(entry, dict):
+            entry = entry.to_dict()
+        rows.append({
+            "platform": entry.get("platform") or "",
+            "contest": entry.get("contest") or "",
+            "old_rating": entry.get("old_rating") or 0,
+            "new_rating": entry.get("new_rating") or 0,
+            "rank": entry.get("rank") or 0,
+            "change": entry.get("change") or 0,
+            "date": entry.get("date") or "1970-01-01T00:00:00",
+        })
+    rows.sort(key=lambda h: h["date"])
+    return rows
+
+
 @async_login_required
 async def fetch_user_stats(request, username):
     print(f"Fetching stats for user: {username}")
@@ -38,71 +59,42 @@ async def fetch_user_stats(request, username):
     logged_in_username = await sync_to_async(lambda: request.user.username)()
     if logged_in_username != username:
         return await sync_to_async(render)(request, "tracker/error.html", {"message": "Unauthorized access"})
+    await anote_activity(username)
 
-    user_stats = await sync_to_async(UserStats.objects(username=username).no_cache().first)()
+    user_stats = await sync_to_async(UserStats.objects(username=username).summary().no_cache().first)()
     if not user_stats:
+        # Not saved — the first refresh (aload_history) creates the document
         user_stats = UserStats(username=username)
-        await sync_to_async(user_stats.save)()
 
-    cache_key = f"rating_history_{username}"
-    history = await sync_to_async(cache.get)(cache_key)
+    history = await sync_to_async(history_codec.load)(username, dicts=True)
     lc_solved = user_stats.leetcode_solved
+    stale = False
 
-    # Validate history format
-    if not history or not isinstance(history, list) or (history and isinstance(history[0], str) and history[0] in {"username", "codeforces_rating"}):
-        print(f"Invalid or missing history in cache for {username}: {history}. Fetching fresh data.")
-        history, lc_solved = await fetch_and_store_rating_history_async(username)
-        await sync_to_async(cache.set)(cache_key, history, timeout=None)
-
-    processed_history = []
-    if history:
-        for entry in history:
-            if isinstance(entry, str):
-                try:
-                    import json
-                    entry = json.loads(entry)
-                except json.JSONDecodeError:
-                    print(f"Skipping invalid history entry for {username}: {entry}")
-                    continue
-            elif hasattr(entry, 'to_mongo'):
-                entry = entry.to_mongo().to_dict()
-
-            entry_dict = {
-                "platform": getattr(entry, 'platform', entry.get('platform', '')),
-                "contest": getattr(entry, 'contest', entry.get('contest', '')),
-                "old_rating": getattr(entry, 'old_rating', entry.get('old_rating', 0)),
-                "new_rating": getattr(entry, 'new_rating', entry.get('new_rating', 0)),
-                "rank": getattr(entry, 'rank', entry.get('rank', 0)),
-                "change": getattr(entry, 'change', entry.get('change', 0)),
-                "date": (entry.date.isoformat() if hasattr(entry, 'date') and entry.date
-                         else entry.get('date', "1970-01-01T00:00:00"))
-            }
-            processed_history.append(entry_dict)
-    else:
+    if not history:
+        print(f"No cached history for {username} — serving stored stats")
+        # Stored stats now; a stale result is refreshed in the background and pushed over the socket
+        history, lc_solved, stale = await aload_history(username, user_stats if user_stats.pk else None)
+
+    processed_history = _history_rows(history)
+    if not processed_history:
         print(f"No contest history found for {username}")
 
     if processed_history:
-        user_stats.codeforces_rating = max(
-            (h["new_rating"] for h in processed_history if h["platform"] == "Codeforces"), default=None)
-        user_stats.codechef_rating = max((h["new_rating"] for h in processed_history if h["platform"] == "CodeChef"),
-                                         default=None)
+        peak = peaks(processed_history)
+        user_stats.codeforces_rating = peak.get("Codeforces")
+        user_stats.codechef_rating = peak.get("CodeChef")
         user_stats.leetcode_solved = lc_solved if lc_solved is not None else 0
-        def _to_rh(e):
-            from datetime import datetime as _dt
-            d = e.copy()
-            if isinstance(d.get('date'), str):
-                try: d['date'] = _dt.fromisoformat(d['date'].replace('Z',''))
-                except Exception: d['date'] = _dt(1970,1,1)
-            return RatingHistory(**d)
-        user_stats.rating_history = [_to_rh(e) for e in processed_history]
-    await sync_to_async(user_stats.save)()
 
     context = {
         "username": username,
         "codeforces_rating": user_stats.codeforces_rating if user_stats.codeforces_rating is not None else "N/A",
         "codechef_rating": user_stats.codechef_rating if user_stats.codechef_rating is not None else "N/A",
         "leetcode_solved": user_stats.leetcode_solved if user_stats.leetcode_solved is not None else 0,
-        "rating_history": processed_history
+        "rating_history": processed_history,
+        "platform_status": platform_status(),
+        "unavailable_platforms": unavailable_platforms(),
+        "stale": stale,
+        "data_status": "stale — refreshing" if stale else "fresh",
     }
 
     return await sync_to_async(render)(request, "tracker/stats.html", context)
@@ -113,127 +105,63 @@ async def fetch_user_rating_history(request, username):
     logged_in_username = await sync_to_async(lambda: request.user.username)()
     if logged_in_username != username:
         return JsonResponse({"error": "Unauthorized access"}, status=403)
+    await anote_activity(username)
 
-    user_stats = await sync_to_async(UserStats.objects(username=username).no_cache().first)()
+    user_stats = await sync_to_async(UserStats.objects(username=username).summary().no_cache().first)()
     if not user_stats:
         return JsonResponse({"error": f"User {username} not found"}, status=404)
 
-    cache_key = f"rating_history_{username}"
-    history = await sync_to_async(cache.get)(cache_key)
+    history = await sync_to_async(history_codec.load)(username, dicts=True)
     lc_solved = user_stats.leetcode_solved
+    stale = False
 
     if not history:
-        print(f"Fetching fresh data for {username}")
-        history, lc_solved = await fetch_and_store_rating_history_async(username)
-        await sync_to_async(cache.set)(cache_key, history, timeout=None)
-
-    # Ensure history is a list before sorting
-    if isinstance(history, dict):
-        # If history is a dict, try to extract a list from a known key or values
-        history = history.get('rating_history', []) if 'rating_history' in history else list(history.values())
-    elif not isinstance(history, list):
-        print(f"Unexpected history type for {username}: {type(history)}")
-        history = []  # Fallback to empty list if type is unrecognized
-
-    # Sort history by date ascending (oldest first) so chart draws left-to-right
-    if history:
-        try:
-            history.sort(key=lambda x: x.date if hasattr(x, 'date') else x.get('date', datetime.min) or datetime.min)
-        except AttributeError:
-            history.sort(key=lambda x: x.get('date', datetime.min.isoformat()))
-
-    processed_history = []
-    for entry in history:
-        # Handle both RatingHistory objects and dictionaries
-        if hasattr(entry, 'to_mongo'):  # Convert RatingHistory object to dict
-            entry = entry.to_mongo().to_dict()
-        entry_dict = {
-            "platform": entry.get('platform', ''),
-            "contest": entry.get('contest', ''),
-            "old_rating": entry.get('old_rating', 0),
-            "new_rating": entry.get('new_rating', 0),
-            "rank": entry.get('rank', 0),
-            "change": entry.get('change', 0),
-            "date": entry.get('date', "1970-01-01T00:00:00")
-        }
-        processed_history.append(entry_dict)
-
-    user_stats.codeforces_rating = max((h["new_rating"] for h in processed_history if h["platform"] == "Codeforces"),
-                                       default=0)
+        print(f"No cached history for {username} — serving stored stats")
+        history, lc_solved, stale = await aload_history(username, user_stats)
+
+    # Oldest first so the chart draws left-to-right
+    processed_history = _history_rows(history)
+
+    peak = peaks(processed_history)
+    user_stats.codeforces_rating = peak.get("Codeforces", 0)
     user_stats.leetcode_solved = lc_solved if lc_solved is not None else 0
-    user_stats.codechef_rating = max((h["new_rating"] for h in processed_history if h["platform"] == "CodeChef"),
-                                     default=0)
-    def _to_rh(e):
-        from datetime import datetime as _dt
-        d = e.copy()
-        if isinstance(d.get('date'), str):
-            try: d['date'] = _dt.fromisoformat(d['date'].replace('Z',''))
-            except Exception: d['date'] = _dt(1970,1,1)
-        return RatingHistory(**d)
-    user_stats.rating_history = [_to_rh(e) for e in processed_history]
-    await sync_to_async(user_stats.save)()
+    user_stats.codechef_rating = peak.get("CodeChef", 0)
 
     compare_username = request.GET.get("compare_to", "").strip()
     compare_history = []
+    compare_stale = False
     if compare_username and compare_username != username:
         print(f"Fetching comparison data for {compare_username}")
-        compare_user_stats = await sync_to_async(UserStats.objects(username=compare_username).no_cache().first)()
+        compare_user_stats = await sync_to_async(UserStats.objects(username=compare_username).summary().no_cache().first)()
         if compare_user_stats:
-            compare_cache_key = f"rating_history_{compare_username}"
-            compare_history_raw = await sync_to_async(cache.get)(compare_cache_key)
+            compare_history_raw = await sync_to_async(history_codec.load)(compare_username, dicts=True)
             if not compare_history_raw:
-                compare_history_raw, compare_lc_solved = await fetch_and_store_rating_history_async(compare_username)
-                await sync_to_async(cache.set)(compare_cache_key, compare_history_raw, timeout=None)
+                compare_history_raw, compare_lc_solved, compare_stale = await aload_history(
+                    compare_username, compare_user_stats)
             else:
                 compare_lc_solved = compare_user_stats.leetcode_solved
+            compare_history = _history_rows(compare_history_raw)
 
-            # Ensure compare_history_raw is a list
-            if isinstance(compare_history_raw, dict):
-                compare_history_raw = compare_history_raw.get('rating_history', []) if 'rating_history' in compare_history_raw else list(compare_history_raw.values())
-            elif not isinstance(compare_history_raw, list):
-                print(f"Unexpected compare_history type for {compare_username}: {type(compare_history_raw)}")
-                compare_history_raw = []
-
-            if compare_history_raw:
-                try:
-                    compare_history_raw.sort(key=lambda x: x.date if hasattr(x, 'date') else x.get('date', datetime.min) or datetime.min)
-                except AttributeError as e:
-                    print(f"Error sorting compare_history for {compare_username}: {e}")
-                    compare_history_raw.sort(key=lambda x: x.get('date', datetime.min.isoformat()))
-
-            for entry in compare_history_raw:
-                if hasattr(entry, 'to_mongo'):
-                    entry = entry.to_mongo().to_dict()
-                entry_dict = {
-                    "platform": entry.get('platform', ''),
-                    "contest": entry.get('contest', ''),
-                    "old_rating": entry.get('old_rating', 0),
-                    "new_rating": entry.get('new_rating', 0),
-                    "rank": entry.get('rank', 0),
-                    "change": entry.get('change', 0),
-                    "date": entry.get('date', "1970-01-01T00:00:00")
-                }
-                compare_history.append(entry_dict)
-
-            compare_user_stats.codeforces_rating = max(
-                (h["new_rating"] for h in compare_history if h["platform"] == "Codeforces"), default=0)
+            compare_peak = peaks(compare_history)
+            compare_user_stats.codeforces_rating = compare_peak.get("Codeforces", 0)
             compare_user_stats.leetcode_solved = compare_lc_solved
-            compare_user_stats.codechef_rating = max(
-                (h["new_rating"] for h in compare_history if h["platform"] == "CodeChef"), default=0)
-            compare_user_stats.rating_history = [_to_rh(e) for e in compare_history]
-            await sync_to_async(compare_user_stats.save)()
+            compare_user_stats.codechef_rating = compare_peak.get("CodeChef", 0)
         else:
             compare_history = []
 
     return JsonResponse({
         "user1": {
             "username": username,
-            "rating_history": processed_history
+            "rating_history": processed_history,
+            "status": "stale" if stale else "fresh",
         },
         "compare_to": {
             "username": compare_username,
-            "rating_history": compare_history
-        } if compare_username else None
+            "rating_history": compare_history,
+            "status": "stale" if compare_stale else "fresh",
+        } if compare_username else None,
+        "stale": stale or compare_stale,
+        "platform_status": platform_status(),
     })
 
 
@@ -246,10 +174,9 @@ async def compare_performance(request):
         return await sync_to_async(render)(request, "tracker/error.html",
                                            {"message": "Please log in to view performance trends"})
 
-    user_stats = await sync_to_async(UserStats.objects(username=user.username).no_cache().first)()
+    user_stats = await sync_to_async(UserStats.objects(username=user.username).summary().no_cache().first)()
     if not user_stats:
         user_stats = UserStats(username=user.username)
-        await sync_to_async(user_stats.save)()
 
     context = {
         "user": user_stats,
@@ -259,10 +186,28 @@ async def compare_performance(request):
     return await sync_to_async(render)(request, "tracker/performance.html", context)
 
 
+@login_required
+@require_GET
+def performance_analytics_view(request, username):
+    """Server-side analytics of `username` (and ?compare_to=) for the performance pages."""
+    stats = UserStats.objects(username=username).only("username", "last_updated").first()
+    if not stats:
+        return JsonResponse({"error": f"User {username} not found"}, status=404)
+    out = {"user1": {"username": username, "platforms": user_analytics(username, stats)}}
+
+    compare_username = request.GET.get("compare_to", "").strip()
+    if compare_username and compare_username != username:
+        compare = UserStats.objects(username=compare_username).only("username", "last_updated").first()
+        out["compare_to"] = ({"username": compare_username,
+                              "platforms": user_analytics(compare_username, compare)}
+                             if compare else None)
+    return JsonResponse(out)
+
+
 def user_performance_view(request, username):
     if not username:
         return render(request, "tracker/performance.html", {"error": "Username is missing"})
-    user = UserStats.objects(username=username).first()
+    user = UserStats.objects(username=username).summary().first()
     if not user:
         return render(request, "tracker/performance.html", {"error": "User not found"})
     return render(request, "tracker/performance.html", {"username": username, "user": user})
@@ -272,17 +217,18 @@ def user_performance_view(request, username):
 def user_stats(request, username):
     if username != request.user.username:
         return redirect('tracker:user_stats', username=request.user.username)
+    note_activity(username)
 
-    stats = UserStats.objects(username=username).first()
+    stats = UserStats.objects(username=username).summary().first()
     if not stats:
         return render(request, 'tracker/stats.html', {'message': 'User stats not found.', 'username': username})
 
-    cache_key = f"rating_history_{username}"
-    rating_history = cache.get(cache_key)
+    rating_history = history_codec.load(username)
+    stale = False
 
     if not rating_history:
-        rating_history, leetcode_solved = fetch_and_store_rating_history(username)
-        cache.set(cache_key, rating_history, timeout=None)
+        # Stored stats now; a stale result is refreshed in the background and pushed over the socket
+        rating_history, leetcode_solved, stale = load_history(username, stats)
     else:
         leetcode_solved = stats.leetcode_solved
 
@@ -297,4 +243,7 @@ def user_stats(request, username):
         'leetcode_solved': leetcode_solved,
         'codechef_rating': codechef_rating,
         'rating_history': rating_history,
+        'stale': stale,
+        'platform_status': platform_status(),
+        'unavailable_platforms': unavailable_platforms(),
     })
\ No newline at end of file